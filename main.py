@@ -1,6 +1,40 @@
 
 import argparse
-from scripts.src.orchestrator import run_auto_short, run_auto_long
+import json
+import os
+import subprocess
+import sys
+
+# Módulos que todo comando importa e que precisam abrir rápido (workers, utilitários).
+# Nenhum deles pode puxar dependências pesadas (SDK da OpenAI, numpy) no import.
+IMPORT_BUDGET_MODULES = ("scripts.src.orchestrator", "scripts.src.renderer", "scripts.src.ffmpeg_tools")
+HEAVY_MODULES = ("openai", "numpy")
+
+_IMPORT_PROBE = (
+    "import json, sys, time; t = time.perf_counter(); import {mod}; "
+    "ms = (time.perf_counter() - t) * 1000.0; "
+    "print(json.dumps({{'ms': ms, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))"
+)
+
+
+def check_import_budget(budget_ms: float) -> bool:
+    """Mede o import de cada módulo em um processo novo (sem cache de módulos) contra o orçamento."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+    for mod in IMPORT_BUDGET_MODULES:
+        code = _IMPORT_PROBE.format(mod=mod, heavy=HEAVY_MODULES)
+        res = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        if res.returncode != 0:
+            print(f"❌ {mod}: falhou ao importar\n{res.stderr.strip()}")
+            ok = False
+            continue
+        data = json.loads(res.stdout.strip().splitlines()[-1])
+        within = data["ms"] <= budget_ms and not data["heavy"]
+        ok = ok and within
+        heavy = f" | carregou {', '.join(data['heavy'])}" if data["heavy"] else ""
+        print(f"{'✅' if within else '❌'} {mod}: {data['ms']:.0f} ms (orçamento {budget_ms:.0f} ms){heavy}")
+    return ok
+
 
 def main():
     parser = argparse.ArgumentParser()
@@ -9,9 +43,48 @@ def main():
     parser.add_argument("--long-only", action="store_true")
     parser.add_argument("--run-all", action="store_true")
     parser.add_argument("--minutes", type=float, default=None)
+    parser.add_argument("--profile", choices=["final", "draft"], default=None,
+                        help="final (padrão) ou draft: render rápido de revisão (ver AO_RENDER_PROFILE)")
+    parser.add_argument("--window", type=float, default=None,
+                        help="draft: renderiza só N segundos (ex.: 15)")
+    parser.add_argument("--window-start", type=float, default=None,
+                        help="draft: início da janela em segundos")
+    parser.add_argument("--batch", type=int, default=None, metavar="N",
+                        help="gera N vídeos em pipeline (shorts; com --long-only longs; com --run-all ambos)")
+    parser.add_argument("--cache", choices=["stats", "gc"], default=None,
+                        help="estatísticas ou limpeza (cota/LRU) dos caches e sai")
+    parser.add_argument("--import-budget", type=float, nargs="?", const=float(os.getenv("AO_IMPORT_BUDGET_MS", "500")),
+                        default=None, metavar="MS",
+                        help="verifica o tempo de import dos módulos principais (padrão 500 ms) e sai")
 
     args = parser.parse_args()
 
+    if args.import_budget is not None:
+        sys.exit(0 if check_import_budget(args.import_budget) else 1)
+
+    if args.cache:
+        from scripts.src.cache_index import main as cache_main
+
+        sys.exit(cache_main([args.cache]))
+
+    # O renderer lê o perfil do ambiente no momento do render
+    if args.profile:
+        os.environ["AO_RENDER_PROFILE"] = args.profile
+    if args.window is not None:
+        os.environ["AO_DRAFT_WINDOW_SEC"] = str(args.window)
+    if args.window_start is not None:
+        os.environ["AO_DRAFT_WINDOW_START"] = str(args.window_start)
+
+    if args.batch:
+        from scripts.src.batch import run_batch
+
+        kinds = ["long"] if args.long_only else ["short", "long"] if args.run_all else ["short"]
+        report = run_batch(args.batch, kinds)
+        sys.exit(0 if report.failed == 0 else 1)
+
+    # import tardio: --help/--import-budget não carregam o pipeline
+    from scripts.src.orchestrator import run_auto_long, run_auto_short
+
     if args.shorts_only:
         run_auto_short()
         return
@@ -1,6 +1,6 @@
 # scripts/src/audio_mix.py
 from pathlib import Path
-from .ffmpeg_tools import ensure_ffmpeg, run_ffmpeg_with_progress
+from .ffmpeg_tools import PRIORITY_HIGH, ensure_ffmpeg, run_ffmpeg_with_progress
 
 def mix_voice_with_music(
     voice_path: str,
@@ -67,5 +67,6 @@ def mix_voice_with_music(
         str(out_file),
     ]
 
-    run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label=label)
+    # mix é curto e está no caminho crítico do render: passa na frente na fila
+    run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label=label, priority=PRIORITY_HIGH)
     return str(out_file)
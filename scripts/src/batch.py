@@ -0,0 +1,282 @@
+# scripts/src/batch.py
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from scripts.src.cache_index import release_pins
+from scripts.src.orchestrator import (
+    long_audio_stage,
+    long_render_stage,
+    long_script_stage,
+    long_visual_stage,
+    short_audio_stage,
+    short_render_stage,
+    short_script_stage,
+    short_visual_stage,
+)
+
+# Batch: N vídeos por execução, com os estágios em pipeline.
+# Enquanto o item k-1 renderiza, o item k faz TTS/mix e o item k+1 gera roteiro.
+#
+# Entre estágios há filas limitadas (AO_BATCH_QUEUE, padrão 2): um estágio rápido
+# (roteiro) não abre dezenas de itens à frente do render. Workers por estágio:
+#   AO_BATCH_SCRIPT_WORKERS=1   roteiro + legendas (OpenAI)
+#   AO_BATCH_VISUAL_WORKERS=1   plano visual / imagens
+#   AO_BATCH_AUDIO_WORKERS=2    TTS + mix (rede + ffmpeg leve)
+#   AO_BATCH_RENDER_WORKERS=1   render (o scheduler global do ffmpeg continua valendo)
+# Um item que falha em um estágio segue pela fila sem executar os demais e entra
+# no relatório como falha; o batch não para.
+# Entradas de cache usadas por um item ficam protegidas do despejo até ele terminar:
+# a cada item concluído, libera-se o que foi usado antes do início do item mais antigo
+# ainda em andamento (ver cache_index.release_pins).
+
+BATCH_STAGES = ("roteiro", "visual", "audio", "render")
+
+_STAGE_ENV = {
+    "roteiro": ("AO_BATCH_SCRIPT_WORKERS", 1),
+    "visual": ("AO_BATCH_VISUAL_WORKERS", 1),
+    "audio": ("AO_BATCH_AUDIO_WORKERS", 2),
+    "render": ("AO_BATCH_RENDER_WORKERS", 1),
+}
+
+_DONE = object()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except Exception:
+        return default
+
+
+@dataclass
+class BatchItem:
+    index: int
+    kind: str  # short | long
+    tag: str
+    data: Optional[Dict[str, Any]] = None
+    duration_sec: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    stage_sec: Dict[str, float] = field(default_factory=dict)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.result is not None
+
+
+@dataclass
+class BatchStage:
+    name: str
+    fn: Callable[[BatchItem], None]
+    workers: int = 1
+
+
+@dataclass
+class BatchReport:
+    batch_id: str
+    items: List[BatchItem]
+    wall_sec: float
+    stage_busy_sec: Dict[str, float]
+
+    @property
+    def ok(self) -> int:
+        return sum(1 for it in self.items if it.ok)
+
+    @property
+    def failed(self) -> int:
+        return len(self.items) - self.ok
+
+    @property
+    def videos_per_hour(self) -> float:
+        return self.ok * 3600.0 / self.wall_sec if self.wall_sec > 0 else 0.0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "wall_sec": round(self.wall_sec, 3),
+            "ok": self.ok,
+            "failed": self.failed,
+            "videos_per_hour": round(self.videos_per_hour, 2),
+            "stage_busy_sec": {k: round(v, 3) for k, v in self.stage_busy_sec.items()},
+            "items": [
+                {k: v for k, v in asdict(it).items() if k != "data"}
+                for it in self.items
+            ],
+        }
+
+
+# ===== estágios =====
+def _stage_script(item: BatchItem) -> None:
+    item.data = short_script_stage() if item.kind == "short" else long_script_stage()
+    item.data["_output_tag"] = item.tag
+
+
+def _stage_visual(item: BatchItem) -> None:
+    item.data = short_visual_stage(item.data) if item.kind == "short" else long_visual_stage(item.data)
+    item.data["_output_tag"] = item.tag
+
+
+def _stage_audio(item: BatchItem) -> None:
+    item.duration_sec = short_audio_stage(item.data) if item.kind == "short" else long_audio_stage(item.data)
+
+
+def _stage_render(item: BatchItem) -> None:
+    render = short_render_stage if item.kind == "short" else long_render_stage
+    item.result = render(item.data, item.duration_sec)
+
+
+_STAGE_FNS = {
+    "roteiro": _stage_script,
+    "visual": _stage_visual,
+    "audio": _stage_audio,
+    "render": _stage_render,
+}
+
+
+def default_stages(workers: Optional[Dict[str, int]] = None) -> List[BatchStage]:
+    workers = workers or {}
+    out: List[BatchStage] = []
+    for name in BATCH_STAGES:
+        env, default = _STAGE_ENV[name]
+        n = workers.get(name) or _env_int(env, default)
+        out.append(BatchStage(name=name, fn=_STAGE_FNS[name], workers=max(1, n)))
+    return out
+
+
+# ===== pipeline =====
+def run_pipeline(
+    items: Sequence[BatchItem],
+    stages: Sequence[BatchStage],
+    *,
+    queue_size: int = 2,
+    on_item_done: Optional[Callable[[BatchItem], None]] = None,
+) -> Dict[str, float]:
+    """
+    Executa os itens pelos estágios, cada estágio com seus workers e filas limitadas entre eles.
+    Retorna o tempo ocupado (soma dos workers) por estágio.
+    """
+    busy: Dict[str, float] = {s.name: 0.0 for s in stages}
+    lock = threading.Lock()
+
+    # fila de entrada sem limite (os itens já existem); entre estágios, limitada
+    queues: List["queue.Queue[Any]"] = [queue.Queue()]
+    queues += [queue.Queue(maxsize=max(1, queue_size)) for _ in range(len(stages) - 1)]
+    queues.append(queue.Queue())
+
+    def _worker(i: int, stage: BatchStage) -> None:
+        q_in, q_out = queues[i], queues[i + 1]
+        while True:
+            item = q_in.get()
+            if item is _DONE:
+                return
+            if i == 0:
+                item.started_at = time.time()
+            if item.error is None:
+                t0 = time.perf_counter()
+                try:
+                    stage.fn(item)
+                except Exception as e:
+                    item.error = f"{stage.name}: {e}"
+                    print(f"❌ Batch item {item.index + 1} ({item.kind}) falhou em {stage.name}: {e}")
+                    traceback.print_exc()
+                dt = time.perf_counter() - t0
+                item.stage_sec[stage.name] = round(dt, 3)
+                with lock:
+                    busy[stage.name] += dt
+            if i == len(stages) - 1:
+                item.finished_at = time.time()
+                if on_item_done:
+                    on_item_done(item)
+            q_out.put(item)
+
+    pools: List[List[threading.Thread]] = []
+    for i, stage in enumerate(stages):
+        pool = [
+            threading.Thread(target=_worker, args=(i, stage), name=f"batch-{stage.name}-{w}", daemon=True)
+            for w in range(stage.workers)
+        ]
+        for t in pool:
+            t.start()
+        pools.append(pool)
+
+    for item in items:
+        queues[0].put(item)
+    for _ in range(stages[0].workers):
+        queues[0].put(_DONE)
+
+    # estágio i termina -> sentinelas para os workers do estágio i+1
+    for i, pool in enumerate(pools):
+        for t in pool:
+            t.join()
+        if i + 1 < len(stages):
+            for _ in range(stages[i + 1].workers):
+                queues[i + 1].put(_DONE)
+    return busy
+
+
+def run_batch(
+    n: int,
+    kinds: Sequence[str] = ("short",),
+    *,
+    queue_size: Optional[int] = None,
+    workers: Optional[Dict[str, int]] = None,
+    stages: Optional[Sequence[BatchStage]] = None,
+    report_dir: Optional[str] = None,
+) -> BatchReport:
+    """
+    Gera n vídeos de cada tipo em kinds ("short", "long") em pipeline.
+    Cada item grava arquivos com sufixo próprio (ex.: short_auto_<batch>_01.mp4).
+    """
+    n = max(1, int(n))
+    kinds = [k for k in kinds if k in ("short", "long")] or ["short"]
+    batch_id = time.strftime("%Y%m%d-%H%M%S")
+    items = [
+        BatchItem(index=i, kind=kind, tag=f"{batch_id}_{kind[0]}{k + 1:02d}")
+        for i, (kind, k) in enumerate((kind, k) for kind in kinds for k in range(n))
+    ]
+    stages = list(stages) if stages else default_stages(workers)
+    queue_size = queue_size or max(1, _env_int("AO_BATCH_QUEUE", 2))
+
+    print(
+        f"🏁 Batch {batch_id}: {len(items)} vídeos | "
+        + " -> ".join(f"{s.name} x{s.workers}" for s in stages)
+        + f" | fila {queue_size}"
+    )
+    t0 = time.perf_counter()
+    done = [0]
+
+    def _progress(item: BatchItem) -> None:
+        done[0] += 1
+        elapsed = time.perf_counter() - t0
+        status = "✅" if item.ok else "❌"
+        print(f"{status} Batch: {done[0]}/{len(items)} | {done[0] * 3600.0 / max(elapsed, 1e-6):.1f} vídeos/h")
+        in_flight = [it.started_at for it in items if it.started_at and not it.finished_at]
+        release_pins(min(in_flight, default=time.time()))
+
+    busy = run_pipeline(items, stages, queue_size=queue_size, on_item_done=_progress)
+    release_pins()
+    report = BatchReport(batch_id=batch_id, items=list(items), wall_sec=time.perf_counter() - t0, stage_busy_sec=busy)
+
+    report_dir = report_dir or os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")), "output", "batch")
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, f"batch_{batch_id}.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report.to_json(), f, ensure_ascii=False, indent=2)
+
+    print(
+        f"🏁 Batch {batch_id}: {report.ok} ok, {report.failed} falhas em {report.wall_sec / 60.0:.1f} min "
+        f"| {report.videos_per_hour:.1f} vídeos/h"
+    )
+    print("   Ocupação por estágio: " + ", ".join(f"{k} {v:.0f}s" for k, v in busy.items()))
+    print(f"📄 Relatório: {report_path}")
+    return report
@@ -0,0 +1,481 @@
+# scripts/src/cache_index.py
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .file_lock import file_lock
+
+# Índice de um cache de arquivos (imagens, TTS): <dir>/index.json
+#   entries: chave -> arquivo, bytes, criado/último uso, hits, metadados (modelo, tamanho...)
+#   groups:  grupo -> último número de variante reservado (reserve_group_key)
+#   totals:  hits/misses acumulados + custo e tempo de API gastos nos misses
+# Toda edição acontece sob file_lock e é gravada de forma atômica (tmp + os.replace).
+#
+# Cota em bytes (env por cache, ex.: AO_IMAGE_CACHE_MAX_MB; 0 = sem limite): ao gravar
+# uma entrada nova, as menos usadas recentemente (LRU) são removidas até caber.
+# Entradas usadas no run atual ficam "pinadas" e não são despejadas automaticamente (um
+# render em andamento pode depender delas); `release_pins` libera ao fim do run (ou, no
+# batch, as pinadas antes do início do item mais antigo ainda em andamento).
+# `gc` pela linha de comando não tem essa proteção.
+#
+# Hits não reescrevem o índice a cada lookup: se a entrada foi gravada por este processo
+# há menos de AO_CACHE_TOUCH_SEC (padrão 60), o hit fica pendente em memória e vai junto
+# na próxima edição do índice (put, outro lookup, fim do run ou saída do processo).
+#
+# Grupos: entradas com meta["group"] são variantes intercambiáveis de uma mesma chave
+# (ex.: intenção de cena). `acquire_group` devolve a variante mais antiga que ainda
+# tem reusos no período; esgotadas todas, o chamador gera outra (`reserve_group_key`).
+#
+#   python main.py --cache stats
+#   python main.py --cache gc            (ou: python -m scripts.src.cache_index gc --max-mb 500)
+
+INDEX_VERSION = 1
+TMP_MAX_AGE_SEC = 3600
+
+
+def _touch_sec() -> float:
+    try:
+        return max(0.0, float(os.getenv("AO_CACHE_TOUCH_SEC", "60") or 60))
+    except ValueError:
+        return 60.0
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    file: str  # relativo ao diretório do cache
+    bytes: int
+    created_at: float
+    last_used_at: float
+    hits: int = 0
+    meta: Dict[str, Any] = field(default_factory=dict)
+    reuses: Dict[str, int] = field(default_factory=dict)  # período (ex.: "2026-10") -> reusos do grupo
+
+
+@dataclass
+class CacheStats:
+    name: str
+    path: str
+    entries: int
+    bytes: int
+    quota_bytes: int
+    hits_total: int
+    misses_total: int
+    miss_usd_total: float
+    miss_sec_total: float
+    run_hits: int
+    run_misses: int
+    work_label: str = "API"  # o que um hit economiza (API, transcode...)
+
+    @property
+    def hit_ratio(self) -> float:
+        n = self.hits_total + self.misses_total
+        return self.hits_total / n if n else 0.0
+
+    @property
+    def saved_usd(self) -> float:
+        return self.hits_total * (self.miss_usd_total / self.misses_total if self.misses_total else 0.0)
+
+    @property
+    def saved_sec(self) -> float:
+        return self.hits_total * (self.miss_sec_total / self.misses_total if self.misses_total else 0.0)
+
+    def lines(self) -> List[str]:
+        quota = f"{round(self.quota_bytes / 2**20, 2):g} MB" if self.quota_bytes else "sem limite"
+        return [
+            f"🗃️ Cache de {self.name}: {self.path}",
+            f"   {self.entries} entradas | {self.bytes / 2**20:.1f} MB (cota {quota})",
+            f"   hits {self.hits_total} / misses {self.misses_total} ({self.hit_ratio:.0%})"
+            f" | economia estimada ~${self.saved_usd:.2f}, ~{self.saved_sec / 60.0:.1f} min de {self.work_label}",
+        ]
+
+
+@dataclass
+class GcResult:
+    dropped_missing: int = 0
+    adopted: int = 0
+    tmp_removed: int = 0
+    evicted: int = 0
+    freed_bytes: int = 0
+
+
+class CacheIndex:
+    def __init__(
+        self, name: str, cache_dir: Path, *, quota_env: str, default_quota_mb: float, file_glob: str, work_label: str = "API",
+        key_pattern: Optional[str] = None,
+    ):
+        self.name = name
+        # gc só adota (e mantém) arquivos cujo nome sem extensão casa com key_pattern
+        self._key_re = re.compile(key_pattern) if key_pattern else None
+        self.work_label = work_label
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "index.json"
+        self.quota_env = quota_env
+        self.default_quota_mb = float(default_quota_mb)
+        self.file_glob = file_glob
+        self._pinned: Dict[str, float] = {}  # chave -> último uso neste processo
+        self._pending: Dict[str, Tuple[int, float]] = {}  # chave -> (hits, último uso) ainda não gravados
+        self._touched: Dict[str, float] = {}  # chave -> quando este processo gravou a entrada
+        self._run_lock = threading.Lock()
+        self.run_hits = 0
+        self.run_misses = 0
+
+    # ===== persistência =====
+    def quota_bytes(self) -> int:
+        try:
+            mb = float(os.getenv(self.quota_env, str(self.default_quota_mb)) or self.default_quota_mb)
+        except ValueError:
+            mb = self.default_quota_mb
+        return int(max(0.0, mb) * 2**20)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "entries": {}, "totals": {"hits": 0, "misses": 0, "miss_usd": 0.0, "miss_sec": 0.0}}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f"index.json.tmp{os.getpid()}-{threading.get_ident()}")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    @contextmanager
+    def _edit(self, flush: bool = True) -> Iterator[Dict[str, Any]]:
+        with file_lock(str(self.index_path)):
+            data = self._load()
+            if flush:
+                self._apply_pending(data)
+            yield data
+            self._save(data)
+
+    def _apply_pending(self, data: Dict[str, Any]) -> None:
+        """Soma os hits pendentes deste processo no índice carregado (sob o lock)."""
+        with self._run_lock:
+            pending, self._pending = self._pending, {}
+        entries, totals = data["entries"], data["totals"]
+        now = time.time()
+        for key, (hits, used_at) in pending.items():
+            totals["hits"] = int(totals.get("hits", 0)) + hits
+            entry = entries.get(key)
+            if entry is None:  # despejada por outro processo
+                continue
+            entry["hits"] = int(entry.get("hits", 0)) + hits
+            entry["last_used_at"] = max(float(entry.get("last_used_at", 0)), used_at)
+            self._touched[key] = now
+
+    def flush(self) -> None:
+        """Grava os hits pendentes."""
+        with self._run_lock:
+            if not self._pending:
+                return
+        with self._edit():
+            pass
+
+    def release_pins(self, before: Optional[float] = None) -> None:
+        """Libera para o despejo as entradas pinadas (todas, ou as usadas pela última vez antes de `before`)."""
+        with self._run_lock:
+            if before is None:
+                self._pinned.clear()
+            else:
+                self._pinned = {k: t for k, t in self._pinned.items() if t >= before}
+
+    def _entry_for_file(self, key: str, path: Path) -> Dict[str, Any]:
+        st = path.stat()
+        return asdict(CacheEntry(
+            key=key, file=path.name, bytes=int(st.st_size),
+            created_at=float(st.st_mtime), last_used_at=float(st.st_mtime),
+        ))
+
+    # ===== uso normal =====
+    def lookup(self, key: str, path: Path) -> Optional[Path]:
+        """Hit: atualiza último uso/contadores e retorna o caminho. None se o arquivo não existe."""
+        if not path.exists():
+            return None
+        now = time.time()
+        with self._run_lock:
+            self.run_hits += 1
+            self._pinned[key] = now
+            hits, _ = self._pending.get(key, (0, now))
+            self._pending[key] = (hits + 1, now)
+            if now - self._touched.get(key, float("-inf")) < _touch_sec():
+                return path
+        with self._edit(flush=False) as data:
+            if key not in data["entries"]:  # arquivo anterior ao índice
+                data["entries"][key] = self._entry_for_file(key, path)
+            self._apply_pending(data)
+        return path
+
+    def put(self, key: str, path: Path, *, cost_usd: float = 0.0, api_sec: float = 0.0, **meta: Any) -> None:
+        """Registra um arquivo recém-gerado (miss) e aplica a cota."""
+        now = time.time()
+        with self._run_lock:
+            self.run_misses += 1
+            self._pinned[key] = now
+            protect = set(self._pinned)
+        with self._edit() as data:
+            entry = self._entry_for_file(key, path)
+            entry["created_at"] = entry["last_used_at"] = now
+            entry["meta"] = meta
+            data["entries"][key] = entry
+            totals = data["totals"]
+            totals["misses"] = int(totals.get("misses", 0)) + 1
+            totals["miss_usd"] = float(totals.get("miss_usd", 0.0)) + float(cost_usd)
+            totals["miss_sec"] = float(totals.get("miss_sec", 0.0)) + float(api_sec)
+            evicted, freed = self._evict(data, self.quota_bytes(), protect)
+        self._touched[key] = now
+        if evicted:
+            print(f"🧹 Cache de {self.name}: {evicted} entradas antigas removidas ({freed / 2**20:.1f} MB)")
+
+    def _evict(self, data: Dict[str, Any], max_bytes: int, protect: Set[str]) -> Tuple[int, int]:
+        if max_bytes <= 0:
+            return 0, 0
+        entries: Dict[str, Dict[str, Any]] = data["entries"]
+        total = sum(int(e.get("bytes", 0)) for e in entries.values())
+        evicted = freed = 0
+        for key, entry in sorted(entries.items(), key=lambda kv: float(kv[1].get("last_used_at", 0))):
+            if total <= max_bytes:
+                break
+            if key in protect:
+                continue
+            try:
+                (self.cache_dir / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue  # em uso (Windows): tenta na próxima
+            size = int(entry.get("bytes", 0))
+            total -= size
+            freed += size
+            evicted += 1
+            del entries[key]
+        return evicted, freed
+
+    # ===== grupos =====
+    def acquire_group(self, group: str, *, max_reuses: int, period: str) -> Optional[Tuple[str, Path]]:
+        """(chave, caminho) de uma variante do grupo com reuso disponível no período; conta como hit.
+        max_reuses <= 0: sem limite."""
+        now = time.time()
+        found: Optional[Tuple[str, Path]] = None
+        with self._edit() as data:
+            variants = [
+                (key, entry) for key, entry in data["entries"].items()
+                if (entry.get("meta") or {}).get("group") == group
+            ]
+            for key, entry in sorted(variants, key=lambda kv: float(kv[1].get("created_at", 0))):
+                path = self.cache_dir / entry["file"]
+                if not path.exists():
+                    continue
+                reuses = entry.setdefault("reuses", {})
+                used = int(reuses.get(period, 0))
+                if max_reuses > 0 and used >= max_reuses:
+                    continue
+                reuses[period] = used + 1
+                entry["hits"] = int(entry.get("hits", 0)) + 1
+                entry["last_used_at"] = now
+                data["totals"]["hits"] = int(data["totals"].get("hits", 0)) + 1
+                found = (key, path)
+                break
+        if found is not None:
+            with self._run_lock:
+                self.run_hits += 1
+                self._pinned[found[0]] = now
+                self._touched[found[0]] = now
+        return found
+
+    def reserve_group_key(self, group: str, suffix: str) -> str:
+        """
+        Reserva (sob o lock do índice) a chave de uma nova variante do grupo: <grupo>-1, <grupo>-2, ...
+        O número vem de um contador por grupo no índice (data["groups"]), que só cresce:
+        variantes despejadas não têm o número reaproveitado.
+        A entrada reservada ainda não tem arquivo: acquire_group a ignora, outro processo
+        reserva o número seguinte e `put` a completa. Se a geração falhar, `gc` a descarta.
+        """
+        now = time.time()
+        with self._edit() as data:
+            entries = data["entries"]
+            counters: Dict[str, int] = data.setdefault("groups", {})
+            n = int(counters.get(group, 0))
+            if not n:  # índice anterior ao contador: parte do maior número existente
+                prefix = f"{group}-"
+                n = max((int(k[len(prefix):]) for k in entries if k.startswith(prefix) and k[len(prefix):].isdigit()), default=0)
+            n += 1
+            while f"{group}-{n}" in entries:
+                n += 1
+            counters[group] = n
+            key = f"{group}-{n}"
+            entries[key] = asdict(CacheEntry(
+                key=key, file=f"{key}{suffix}", bytes=0, created_at=now, last_used_at=now,
+                meta={"group": group, "reserved": True},
+            ))
+        with self._run_lock:
+            self._pinned[key] = now
+        return key
+
+    def savings(self, hits: int) -> Tuple[float, float]:
+        """(USD, segundos de API) economizados por `hits`, pela média dos misses registrados."""
+        totals = self._load()["totals"]
+        misses = int(totals.get("misses", 0))
+        if not misses:
+            return 0.0, 0.0
+        return hits * float(totals.get("miss_usd", 0.0)) / misses, hits * float(totals.get("miss_sec", 0.0)) / misses
+
+    # ===== manutenção =====
+    def stats(self) -> CacheStats:
+        data = self._load()
+        entries = data["entries"]
+        totals = data["totals"]
+        return CacheStats(
+            name=self.name,
+            path=str(self.cache_dir),
+            entries=len(entries),
+            bytes=sum(int(e.get("bytes", 0)) for e in entries.values()),
+            quota_bytes=self.quota_bytes(),
+            hits_total=int(totals.get("hits", 0)),
+            misses_total=int(totals.get("misses", 0)),
+            miss_usd_total=float(totals.get("miss_usd", 0.0)),
+            miss_sec_total=float(totals.get("miss_sec", 0.0)),
+            run_hits=self.run_hits,
+            run_misses=self.run_misses,
+            work_label=self.work_label,
+        )
+
+    def gc(self, max_bytes: Optional[int] = None) -> GcResult:
+        """Reconcilia índice x disco (entradas órfãs, arquivos sem índice, temporários) e aplica a cota."""
+        res = GcResult()
+        if not self.cache_dir.is_dir():
+            return res
+        now = time.time()
+        with self._edit() as data:
+            entries: Dict[str, Dict[str, Any]] = data["entries"]
+            for key in [k for k, e in entries.items() if not (self.cache_dir / e["file"]).exists() or not self._is_key(k)]:
+                del entries[key]
+                res.dropped_missing += 1
+            indexed = {e["file"] for e in entries.values()}
+            for p in self.cache_dir.glob(self.file_glob):
+                if ".tmp" in p.name:
+                    if now - p.stat().st_mtime > TMP_MAX_AGE_SEC:
+                        try:
+                            p.unlink()
+                            res.tmp_removed += 1
+                        except OSError:
+                            pass
+                    continue
+                if p.name not in indexed and p.is_file() and self._is_key(p.stem):
+                    entries[p.stem] = self._entry_for_file(p.stem, p)
+                    res.adopted += 1
+            quota = self.quota_bytes() if max_bytes is None else int(max_bytes)
+            with self._run_lock:
+                protect = set(self._pinned)
+            res.evicted, res.freed_bytes = self._evict(data, quota, protect)
+        return res
+
+    def _is_key(self, key: str) -> bool:
+        return self._key_re is None or self._key_re.fullmatch(key) is not None
+
+    def run_report(self) -> str:
+        hits, misses = self.run_hits, self.run_misses
+        usd, sec = self.savings(hits)
+        n = hits + misses
+        ratio = f"{hits / n:.0%}" if n else "-"
+        return f"🗃️ Cache de {self.name} (este run): {hits} hits / {misses} misses ({ratio}) | economia ~${usd:.2f}, ~{sec:.0f}s de {self.work_label}"
+
+
+_INDEXES: Dict[str, CacheIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_cache_index(
+    name: str, cache_dir: Path, *, quota_env: str, default_quota_mb: float, file_glob: str, work_label: str = "API",
+    key_pattern: Optional[str] = None,
+) -> CacheIndex:
+    """Uma instância por diretório (os contadores do run ficam nela)."""
+    k = os.path.abspath(str(cache_dir))
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(k)
+        if idx is None:
+            idx = _INDEXES[k] = CacheIndex(
+                name, Path(cache_dir), quota_env=quota_env, default_quota_mb=default_quota_mb, file_glob=file_glob,
+                work_label=work_label, key_pattern=key_pattern,
+            )
+        return idx
+
+
+def known_caches(project_root: Path) -> List[CacheIndex]:
+    from .image_cache import image_cache_index
+    from .image_variants import variant_cache_index, variants_dir
+    from .still_grade import graded_cache_index
+    from .tts_cache import tts_cache_dir, tts_cache_index
+
+    return [
+        image_cache_index(project_root / "output" / "images"),
+        graded_cache_index(project_root / "output" / "images" / "graded"),
+        variant_cache_index(variants_dir(project_root)),
+        tts_cache_index(tts_cache_dir(project_root)),
+    ]
+
+
+def release_pins(before: Optional[float] = None) -> None:
+    """Fim de um run (ou de um item do batch): libera as entradas pinadas e grava hits pendentes."""
+    with _INDEXES_LOCK:
+        indexes = list(_INDEXES.values())
+    for idx in indexes:
+        idx.release_pins(before)
+        idx.flush()
+
+
+def _flush_all() -> None:
+    with _INDEXES_LOCK:
+        indexes = list(_INDEXES.values())
+    for idx in indexes:
+        try:
+            idx.flush()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_all)
+
+
+def print_run_reports(project_root: Path) -> None:
+    """Hits/misses deste processo em cada cache usado (fim de um run)."""
+    for idx in known_caches(project_root):
+        if idx.run_hits or idx.run_misses:
+            print(idx.run_report())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="cache", description="Estatísticas e limpeza dos caches (imagens, stills com grade, variantes, TTS)")
+    p.add_argument("action", choices=["stats", "gc"])
+    p.add_argument("--max-mb", type=float, default=None, help="gc: cota a aplicar agora (padrão: a do ambiente)")
+    args = p.parse_args(argv)
+
+    root = Path(__file__).resolve().parents[2]
+    for idx in known_caches(root):
+        if args.action == "gc":
+            max_bytes = None if args.max_mb is None else int(args.max_mb * 2**20)
+            r = idx.gc(max_bytes)
+            print(
+                f"🧹 {idx.name}: {r.evicted} removidas ({r.freed_bytes / 2**20:.1f} MB) | "
+                f"{r.adopted} adotadas | {r.dropped_missing} órfãs no índice | {r.tmp_removed} temporários"
+            )
+        for line in idx.stats().lines():
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
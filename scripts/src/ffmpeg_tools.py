@@ -1,201 +1,802 @@
 # scripts/src/ffmpeg_tools.py
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
 import os
+import queue
 import shutil
 import subprocess
+import threading
 import time
-from typing import List, Optional, Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple
+
+# Resolução dos binários memoizada por processo (chave inclui FFMPEG_PATH,
+# então trocar a variável no meio da execução ainda é respeitado).
+_TOOL_CACHE: Dict[tuple, str] = {}
+_TOOL_LOCK = threading.Lock()
+
+
+def clear_tool_cache() -> None:
+    with _TOOL_LOCK:
+        _TOOL_CACHE.clear()
+
 
 def ensure_ffmpeg(ffmpeg_path: Optional[str] = None) -> str:
     if ffmpeg_path and os.path.isfile(ffmpeg_path):
         return ffmpeg_path
+    key = ("ffmpeg", os.getenv("FFMPEG_PATH"))
+    with _TOOL_LOCK:
+        cached = _TOOL_CACHE.get(key)
+    if cached:
+        return cached
+
     env_path = os.getenv("FFMPEG_PATH")
+    found = None
     if env_path and os.path.isfile(env_path):
-        return env_path
-    which = shutil.which("ffmpeg")
-    if which:
-        return which
-    raise RuntimeError(
-        "FFmpeg não encontrado. Instale o FFmpeg e/ou adicione ao PATH, "
-        "ou defina a variável de ambiente FFMPEG_PATH apontando para ffmpeg.exe."
-    )
+        found = env_path
+    else:
+        found = shutil.which("ffmpeg")
+    if not found:
+        raise RuntimeError(
+            "FFmpeg não encontrado. Instale o FFmpeg e/ou adicione ao PATH, "
+            "ou defina a variável de ambiente FFMPEG_PATH apontando para ffmpeg.exe."
+        )
+    with _TOOL_LOCK:
+        _TOOL_CACHE[key] = found
+    return found
+
 
 def ensure_ffprobe() -> str:
-    """Tenta achar ffprobe no mesmo local do ffmpeg ou no PATH."""
+    """Tenta achar ffprobe no mesmo local do ffmpeg ou no PATH (memoizado)."""
     ffmpeg = ensure_ffmpeg()
+    key = ("ffprobe", ffmpeg)
+    with _TOOL_LOCK:
+        cached = _TOOL_CACHE.get(key)
+    if cached:
+        return cached
+
     ffmpeg_dir = os.path.dirname(ffmpeg)
     cand = os.path.join(ffmpeg_dir, "ffprobe.exe" if os.name == "nt" else "ffprobe")
-    if os.path.isfile(cand):
-        return cand
-    which = shutil.which("ffprobe")
-    if which:
-        return which
-    raise RuntimeError("ffprobe não encontrado. Instale FFmpeg completo (com ffprobe) ou adicione ao PATH.")
+    found = cand if os.path.isfile(cand) else shutil.which("ffprobe")
+    if not found:
+        raise RuntimeError("ffprobe não encontrado. Instale FFmpeg completo (com ffprobe) ou adicione ao PATH.")
+    with _TOOL_LOCK:
+        _TOOL_CACHE[key] = found
+    return found
 
-def get_media_duration_seconds(path: str) -> float:
-    """Retorna duração do arquivo (segundos) via ffprobe."""
+# ---------------------------------------------------------------------------
+# Scheduler global de jobs ffmpeg
+# ---------------------------------------------------------------------------
+# Todo ffmpeg "pesado" (encode/mix/render) pega um slot antes de rodar:
+# - fila por prioridade (menor número = antes; FIFO dentro da mesma prioridade)
+# - nº de encodes simultâneos limitado por núcleos e memória disponível (MemAvailable,
+#   que conta o page cache recuperável; relida a cada poucos segundos, não congelada)
+# - cada job recebe um orçamento de threads (-threads / -filter_complex_threads) calculado
+#   na concessão do slot: núcleos / (jobs rodando + na fila). Sozinho, o job usa todos os
+#   núcleos; com concorrência, os encodes não disputam os mesmos núcleos
+# Jobs leves (ffprobe) usam uma fila própria e não ocupam slot de encode.
+#
+# Env:
+#   AO_FFMPEG_MAX_JOBS=0            0 = automático
+#   AO_FFMPEG_THREADS_PER_JOB=2     alvo de threads por encode no modo automático
+#   AO_FFMPEG_JOB_MEM_GB=1.5        memória estimada por encode (limita o nº de jobs)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 50
+PRIORITY_LOW = 100
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        v = os.getenv(name)
+        return default if v is None or str(v).strip() == "" else int(float(str(v).strip()))
+    except ValueError:
+        return default
+
+
+def _available_memory_gb() -> Optional[float]:
+    """
+    Memória disponível para novos processos (inclui page cache recuperável):
+    MemAvailable do /proc/meminfo no Linux, psutil nos demais (se instalado).
+    None quando não dá para medir (o limite fica só por núcleos).
+    """
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / (1024 ** 2)  # kB
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil  # type: ignore
+    except ImportError:
+        return None
+    try:
+        return psutil.virtual_memory().available / (1024 ** 3)
+    except Exception:
+        return None
+
+
+_MEM_REFRESH_SEC = 2.0
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+    max_jobs: int
+    threads_per_job: int
+    running: int
+    queue_depth: int
+    peak_queue_depth: int
+    completed: int
+    light_running: int
+    utilization: float  # fração dos slots ocupados desde a criação do scheduler
+
+
+@dataclass(frozen=True)
+class JobSlot:
+    """Slot concedido: threads é o orçamento do job."""
+    label: str
+    priority: int
+    threads: int
+    waited_sec: float
+
+
+class FFmpegScheduler:
+    def __init__(self, max_jobs: Optional[int] = None, cores: Optional[int] = None):
+        self.cores = max(1, cores or os.cpu_count() or 1)
+        self._auto = not max_jobs or max_jobs <= 0
+        if self._auto:
+            per_job = max(1, _env_int("AO_FFMPEG_THREADS_PER_JOB", 2))
+            max_jobs = max(1, self.cores // per_job)
+        self._cpu_jobs = int(max_jobs)
+        try:
+            self._job_mem_gb = float(os.getenv("AO_FFMPEG_JOB_MEM_GB", "1.5") or 1.5)
+        except ValueError:
+            self._job_mem_gb = 1.5
+        self._mem_gb: Optional[float] = None
+        self._mem_read_at = 0.0
+
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []  # heap (priority, seq)
+        self._seq = itertools.count()
+        self._running = 0
+        self._light_running = 0
+        self._completed = 0
+        self._peak_queue = 0
+        self._busy_sec = 0.0
+        self._started = time.time()
+        self._local = threading.local()
+
+    @property
+    def max_jobs(self) -> int:
+        """
+        Encodes simultâneos agora. Automático: núcleos / AO_FFMPEG_THREADS_PER_JOB, limitado
+        pela memória disponível (os jobs em andamento já estão fora dela, então contam à parte).
+        """
+        if not self._auto or self._job_mem_gb <= 0:
+            return self._cpu_jobs
+        now = time.monotonic()
+        if now - self._mem_read_at > _MEM_REFRESH_SEC:
+            self._mem_gb = _available_memory_gb()
+            self._mem_read_at = now
+        if self._mem_gb is None:
+            return self._cpu_jobs
+        return max(1, min(self._cpu_jobs, self._running + int(self._mem_gb // self._job_mem_gb)))
+
+    @property
+    def threads_per_job(self) -> int:
+        """Orçamento com todos os slots ocupados (dimensionamento de pools; o slot real recebe _grant_threads)."""
+        return max(1, self.cores // self.max_jobs)
+
+    def _grant_threads(self) -> int:
+        """Chamar sob _cond, já contando o job que recebe o slot em _running."""
+        return max(1, self.cores // max(1, self._running + len(self._waiting)))
+
+    @contextmanager
+    def slot(self, label: str = "", priority: int = PRIORITY_NORMAL, light: bool = False) -> Iterator[JobSlot]:
+        """
+        Bloqueia até haver slot livre para este job (respeitando a prioridade).
+        Reentrante por thread: um job já dentro de um slot não pega outro (evita deadlock).
+        """
+        if getattr(self._local, "held", None) is not None:
+            yield self._local.held
+            return
+
+        t0 = time.time()
+        with self._cond:
+            if light:
+                while self._light_running >= self.cores:
+                    self._cond.wait()
+                self._light_running += 1
+                threads = self.threads_per_job
+            else:
+                ticket = (int(priority), next(self._seq))
+                heapq.heappush(self._waiting, ticket)
+                self._peak_queue = max(self._peak_queue, len(self._waiting))
+                while self._waiting[0] != ticket or self._running >= self.max_jobs:
+                    self._cond.wait()
+                heapq.heappop(self._waiting)
+                self._running += 1
+                threads = self._grant_threads()
+                self._cond.notify_all()
+
+        granted = JobSlot(label=label, priority=int(priority), threads=threads, waited_sec=time.time() - t0)
+        self._local.held = granted
+        started = time.time()
+        try:
+            yield granted
+        finally:
+            self._local.held = None
+            with self._cond:
+                if light:
+                    self._light_running -= 1
+                else:
+                    self._running -= 1
+                    self._busy_sec += time.time() - started
+                    self._completed += 1
+                self._cond.notify_all()
+
+    def stats(self) -> SchedulerStats:
+        with self._cond:
+            elapsed = max(1e-6, time.time() - self._started)
+            return SchedulerStats(
+                max_jobs=self.max_jobs,
+                threads_per_job=self.threads_per_job,
+                running=self._running,
+                queue_depth=len(self._waiting),
+                peak_queue_depth=self._peak_queue,
+                completed=self._completed,
+                light_running=self._light_running,
+                utilization=min(1.0, self._busy_sec / (elapsed * self.max_jobs)),
+            )
+
+
+_SCHEDULER: Optional[FFmpegScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> FFmpegScheduler:
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = FFmpegScheduler(max_jobs=_env_int("AO_FFMPEG_MAX_JOBS", 0))
+        return _SCHEDULER
+
+
+def with_thread_budget(cmd: List[str], threads: int) -> List[str]:
+    """
+    Aplica o orçamento de threads ao comando (sem sobrescrever o que já foi definido):
+    -threads antes da saída e -filter_complex_threads / -filter_threads como opção global.
+    """
+    if not cmd:
+        return cmd
+    out = list(cmd)
+    if "-filter_complex" in out and "-filter_complex_threads" not in out:
+        out[1:1] = ["-filter_complex_threads", str(threads)]
+    elif ("-vf" in out or "-af" in out) and "-filter_threads" not in out:
+        out[1:1] = ["-filter_threads", str(threads)]
+    if "-threads" not in out:
+        out[-1:-1] = ["-threads", str(threads)]
+    return out
+
+
+# ---------------------------------------------------------------------------
+# ffprobe: metadados completos em uma chamada JSON, cache por (path, size, mtime)
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    index: int
+    codec_type: str
+    codec_name: Optional[str] = None
+    duration_sec: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bit_rate: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    path: str
+    duration_sec: Optional[float]
+    format_name: Optional[str]
+    bit_rate: Optional[int]
+    size: int
+    streams: Tuple[StreamInfo, ...] = ()
+
+    def first(self, codec_type: str) -> Optional[StreamInfo]:
+        for st in self.streams:
+            if st.codec_type == codec_type:
+                return st
+        return None
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return self.first("video")
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return self.first("audio")
+
+    @property
+    def width(self) -> Optional[int]:
+        return self.video.width if self.video else None
+
+    @property
+    def height(self) -> Optional[int]:
+        return self.video.height if self.video else None
+
+    @property
+    def sample_rate(self) -> Optional[int]:
+        return self.audio.sample_rate if self.audio else None
+
+
+_PROBE_CACHE: Dict[Tuple[str, int, int], MediaInfo] = {}
+_PROBE_LOCK = threading.Lock()
+
+
+def _num(v: Any, cast: Callable[[Any], Any] = float) -> Any:
+    if v is None or v == "N/A":
+        return None
+    try:
+        return cast(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(v: Optional[str]) -> Optional[float]:
+    """'30000/1001' -> 29.97; '0/0' -> None."""
+    if not v or "/" not in v:
+        return _num(v)
+    n, d = v.split("/", 1)
+    n, d = _num(n), _num(d)
+    return n / d if n and d else None
+
+
+def _parse_probe_json(path: str, size: int, raw: str) -> MediaInfo:
+    data = json.loads(raw or "{}")
+    fmt = data.get("format") or {}
+    streams = tuple(
+        StreamInfo(
+            index=int(st.get("index", i)),
+            codec_type=str(st.get("codec_type") or ""),
+            codec_name=st.get("codec_name"),
+            duration_sec=_num(st.get("duration")),
+            width=_num(st.get("width"), int),
+            height=_num(st.get("height"), int),
+            fps=_rate(st.get("avg_frame_rate")) if st.get("codec_type") == "video" else None,
+            sample_rate=_num(st.get("sample_rate"), int),
+            channels=_num(st.get("channels"), int),
+            bit_rate=_num(st.get("bit_rate"), int),
+        )
+        for i, st in enumerate(data.get("streams") or [])
+    )
+    duration = _num(fmt.get("duration"))
+    if duration is None:
+        durations = [st.duration_sec for st in streams if st.duration_sec is not None]
+        duration = max(durations) if durations else None
+    return MediaInfo(
+        path=path,
+        duration_sec=duration,
+        format_name=fmt.get("format_name"),
+        bit_rate=_num(fmt.get("bit_rate"), int),
+        size=size,
+        streams=streams,
+    )
+
+
+def probe_media(path: str) -> MediaInfo:
+    """
+    Metadados do arquivo (duração, codecs, sample rate, dimensões) em UMA chamada ffprobe JSON.
+    Cacheado por (path, size, mtime): reprobar o mesmo arquivo não custa nada.
+    """
     if not path or not os.path.isfile(path):
-        raise FileNotFoundError(f"Arquivo não encontrado para medir duração: {path}")
-    ffprobe = ensure_ffprobe()
+        raise FileNotFoundError(f"Arquivo não encontrado para ffprobe: {path}")
+    st = os.stat(path)
+    key = (os.path.abspath(path), int(st.st_size), int(st.st_mtime_ns))
+    with _PROBE_LOCK:
+        cached = _PROBE_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     cmd = [
-        ffprobe,
+        ensure_ffprobe(),
         "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
         path,
     ]
-    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    with get_scheduler().slot(label="ffprobe", light=True):
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
     if res.returncode != 0:
-        raise RuntimeError(f"ffprobe falhou ao medir duração. STDERR:\n{res.stderr}")
+        raise RuntimeError(f"ffprobe falhou em {path}. STDERR:\n{res.stderr}")
     try:
-        return float(res.stdout.strip())
-    except Exception as e:
-        raise RuntimeError(f"Não foi possível interpretar duração retornada por ffprobe: {res.stdout!r}") from e
+        info = _parse_probe_json(path, int(st.st_size), res.stdout)
+    except ValueError as e:
+        raise RuntimeError(f"Não foi possível interpretar o JSON do ffprobe: {res.stdout[:500]!r}") from e
 
-def _read_kv_file(path: str) -> Dict[str, str]:
-    data: Dict[str, str] = {}
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                line = line.strip()
-                if not line or "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                data[k.strip()] = v.strip()
-    except Exception:
+    with _PROBE_LOCK:
+        _PROBE_CACHE[key] = info
+    return info
+
+
+def probe_media_many(paths: List[str], max_workers: Optional[int] = None) -> Dict[str, MediaInfo]:
+    """Probe concorrente de vários arquivos (paths repetidos são probados uma vez)."""
+    unique = list(dict.fromkeys(p for p in paths if p))
+    if not unique:
         return {}
-    return data
+    workers = max(1, min(len(unique), max_workers or (os.cpu_count() or 1)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(unique, pool.map(probe_media, unique)))
 
-def run_ffmpeg_with_progress(
-    cmd: List[str],
-    total_duration_sec: Optional[float] = None,
-    label: str = "Renderizando",
-    update_interval_sec: float = 0.5,
-    check: bool = True,
-    no_progress_timeout_sec: float = 30.0,
-) -> subprocess.CompletedProcess:
+
+def get_media_duration_seconds(path: str) -> float:
+    """Retorna duração do arquivo (segundos) via ffprobe (ver probe_media)."""
+    if not path or not os.path.isfile(path):
+        raise FileNotFoundError(f"Arquivo não encontrado para medir duração: {path}")
+    info = probe_media(path)
+    if info.duration_sec is None:
+        raise RuntimeError(f"ffprobe não retornou duração para: {path}")
+    return float(info.duration_sec)
+
+
+@dataclass(frozen=True)
+class FFmpegProgress:
+    """Um bloco de -progress do ffmpeg (emitido a cada progress=continue|end)."""
+    label: str
+    frame: Optional[int] = None
+    fps: Optional[float] = None
+    bitrate_kbps: Optional[float] = None
+    total_size: Optional[int] = None
+    out_time_sec: Optional[float] = None
+    speed: Optional[float] = None
+    total_sec: Optional[float] = None
+    eta_sec: Optional[float] = None
+    percent: Optional[float] = None
+    done: bool = False
+
+
+ProgressCallback = Callable[[FFmpegProgress], None]
+
+
+class FFmpegError(RuntimeError):
     """
-    Executa FFmpeg com progresso via arquivo (-progress <file>).
-    Evita deadlock no Windows usando DEVNULL, mas em caso de falha re-executa
-    rapidamente o mesmo comando SEM progresso para capturar STDERR útil.
+    Falha do ffmpeg com o diagnóstico da PRÓPRIA execução (sem re-rodar o comando):
+    cauda do stderr (ring buffer) + último snapshot de progresso.
     """
-    out_path = cmd[-1] if cmd else None
-    out_dir = os.path.dirname(out_path) if out_path else os.getcwd()
-    os.makedirs(out_dir, exist_ok=True)
 
-    progress_file = os.path.join(out_dir, f".ffmpeg_progress_{int(time.time())}.txt")
+    def __init__(
+        self,
+        message: str,
+        *,
+        cmd: List[str],
+        returncode: Optional[int],
+        stderr_tail: str = "",
+        last_progress: Optional["FFmpegProgress"] = None,
+    ):
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr_tail = stderr_tail
+        self.last_progress = last_progress
+        detail = f"{message}\nCMD:\n{' '.join(cmd)}"
+        if last_progress is not None:
+            detail += f"\n\nÚLTIMO PROGRESSO:\n{_describe_progress(last_progress)}"
+        detail += f"\n\nSTDERR (últimas linhas):\n{stderr_tail}"
+        super().__init__(detail)
+
+
+def _describe_progress(ev: "FFmpegProgress") -> str:
+    parts = []
+    if ev.out_time_sec is not None:
+        parts.append(f"out_time={ev.out_time_sec:.2f}s")
+    if ev.total_sec:
+        parts.append(f"total={ev.total_sec:.2f}s")
+    if ev.frame is not None:
+        parts.append(f"frame={ev.frame}")
+    if ev.fps is not None:
+        parts.append(f"fps={ev.fps:.1f}")
+    if ev.speed is not None:
+        parts.append(f"speed={ev.speed:.2f}x")
+    return " | ".join(parts) or "(sem dados)"
+
+
+def _stderr_tail_lines() -> int:
     try:
-        if os.path.exists(progress_file):
-            os.remove(progress_file)
-    except Exception:
-        pass
+        return max(10, int(os.getenv("AO_FFMPEG_STDERR_LINES", "200")))
+    except ValueError:
+        return 200
 
-    progress_cmd = cmd[:-1] + ["-loglevel", "error", "-progress", progress_file, "-nostats"] + [cmd[-1]]
+_PROGRESS_SUBSCRIBERS: List[ProgressCallback] = []
+_SUBSCRIBERS_LOCK = threading.Lock()
 
-    proc = subprocess.Popen(
-        progress_cmd,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
 
-    def _fmt_time(seconds: float) -> str:
-        seconds = max(0.0, float(seconds))
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        return f"{h:02d}:{m:02d}:{s:02d}"
+def subscribe_progress(callback: ProgressCallback) -> Callable[[], None]:
+    """
+    Assina os eventos de progresso de TODOS os ffmpeg desta execução
+    (orquestrador, batch, exportador de métricas). Retorna a função para cancelar.
+    """
+    with _SUBSCRIBERS_LOCK:
+        _PROGRESS_SUBSCRIBERS.append(callback)
+
+    def _unsubscribe() -> None:
+        with _SUBSCRIBERS_LOCK:
+            if callback in _PROGRESS_SUBSCRIBERS:
+                _PROGRESS_SUBSCRIBERS.remove(callback)
 
-    last_print = 0.0
-    last_out_time = 0.0
-    last_change = time.time()
-    last_speed = None
+    return _unsubscribe
 
-    def _print(out_time_sec: Optional[float], speed: Optional[float]):
-        nonlocal last_print
-        now = time.time()
-        if now - last_print < update_interval_sec:
-            return
-        last_print = now
 
-        if out_time_sec is None:
-            if speed is not None:
-                print(f"⏳ {label}… | {speed:.2f}x")
-            else:
-                print(f"⏳ {label}…")
-            return
+def progress_subscribers(
+    update_interval_sec: float = 0.5, on_progress: Optional[ProgressCallback] = None, console: bool = True,
+) -> List[ProgressCallback]:
+    """Destinos dos eventos de um job: console (console=True), on_progress e os assinantes globais."""
+    subscribers: List[ProgressCallback] = []
+    if console:
+        subscribers.append(ConsoleProgressPrinter(update_interval_sec))
+    if on_progress is not None:
+        subscribers.append(on_progress)
+    with _SUBSCRIBERS_LOCK:
+        subscribers += _PROGRESS_SUBSCRIBERS
+    return subscribers
+
 
-        if total_duration_sec and total_duration_sec > 0:
-            pct = min(100.0, (out_time_sec / total_duration_sec) * 100.0)
-            eta_str = ""
+def emit_progress(subscribers: List[ProgressCallback], ev: FFmpegProgress) -> None:
+    """Entrega o evento a cada assinante; falha de um assinante não derruba o encode."""
+    for cb in subscribers:
+        try:
+            cb(ev)
+        except Exception:
+            pass
+
+
+def _parse_float(v: Optional[str]) -> Optional[float]:
+    if v is None:
+        return None
+    v = v.strip().lower().rstrip("x").replace("kbits/s", "").strip()
+    if not v or v == "n/a":
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        return None
+
+
+def _parse_out_time(block: Dict[str, str]) -> Optional[float]:
+    # out_time_us é o correto; out_time_ms (apesar do nome) também vem em microssegundos
+    for key in ("out_time_us", "out_time_ms"):
+        v = _parse_float(block.get(key))
+        if v is not None:
+            return max(0.0, v / 1_000_000.0)
+    t = block.get("out_time")
+    if t and t.count(":") == 2:
+        try:
+            hh, mm, ss = t.split(":")
+            return max(0.0, float(hh) * 3600 + float(mm) * 60 + float(ss))
+        except ValueError:
+            return None
+    return None
+
+
+class ProgressParser:
+    """
+    Parser incremental de -progress: recebe linha a linha (sem reler nada) e
+    devolve um FFmpegProgress quando um bloco termina.
+    """
+
+    def __init__(self, label: str = "", total_duration_sec: Optional[float] = None):
+        self.label = label
+        self.total_sec = float(total_duration_sec) if total_duration_sec and total_duration_sec > 0 else None
+        self._block: Dict[str, str] = {}
+        self.last: Optional[FFmpegProgress] = None
+
+    def feed(self, line: str) -> Optional[FFmpegProgress]:
+        line = line.strip()
+        if not line or "=" not in line:
+            return None
+        k, v = line.split("=", 1)
+        k, v = k.strip(), v.strip()
+        if k != "progress":
+            self._block[k] = v
+            return None
+
+        block, self._block = self._block, {}
+        out_time = _parse_out_time(block)
+        speed = _parse_float(block.get("speed"))
+        frame = _parse_float(block.get("frame"))
+        total_size = _parse_float(block.get("total_size"))
+
+        eta = pct = None
+        if self.total_sec and out_time is not None:
+            pct = min(100.0, out_time / self.total_sec * 100.0)
             if speed and speed > 0:
-                remaining = max(0.0, total_duration_sec - out_time_sec)
-                eta = remaining / speed
-                eta_str = f" | ETA {_fmt_time(eta)}"
-            spd_str = f" | {speed:.2f}x" if speed is not None else ""
-            print(f"⏳ {label}: {pct:5.1f}% | {_fmt_time(out_time_sec)} / {_fmt_time(total_duration_sec)}{spd_str}{eta_str}")
-        else:
-            spd_str = f" | {speed:.2f}x" if speed is not None else ""
-            print(f"⏳ {label}: {_fmt_time(out_time_sec)}{spd_str}")
+                eta = max(0.0, self.total_sec - out_time) / speed
 
-    while True:
-        if proc.poll() is not None:
-            break
+        self.last = FFmpegProgress(
+            label=self.label,
+            frame=int(frame) if frame is not None else None,
+            fps=_parse_float(block.get("fps")),
+            bitrate_kbps=_parse_float(block.get("bitrate")),
+            total_size=int(total_size) if total_size is not None else None,
+            out_time_sec=out_time,
+            speed=speed,
+            total_sec=self.total_sec,
+            eta_sec=eta,
+            percent=pct,
+            done=(v == "end"),
+        )
+        return self.last
 
-        prog = _read_kv_file(progress_file)
-        out_time_sec = None
 
-        if "out_time_ms" in prog:
-            try:
-                out_time_sec = float(prog["out_time_ms"]) / 1_000_000.0
-            except Exception:
-                out_time_sec = None
-        elif "out_time" in prog:
-            try:
-                hh, mm, ss = prog["out_time"].split(":")
-                out_time_sec = float(hh) * 3600 + float(mm) * 60 + float(ss)
-            except Exception:
-                out_time_sec = None
+def _fmt_time(seconds: float) -> str:
+    seconds = max(0.0, float(seconds))
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
 
-        speed = None
-        if "speed" in prog:
-            try:
-                sp = prog["speed"].lower().replace("x", "").strip()
-                speed = float(sp) if sp else None
-            except Exception:
-                speed = None
 
-        if out_time_sec is not None and out_time_sec > last_out_time + 0.01:
-            last_out_time = out_time_sec
-            last_change = time.time()
-        if speed is not None:
-            last_speed = speed
+class ConsoleProgressPrinter:
+    """Assinante padrão: imprime o progresso no console (no máximo 1 linha a cada interval_sec)."""
 
-        _print(out_time_sec if out_time_sec is not None else last_out_time, last_speed)
+    def __init__(self, interval_sec: float = 0.5):
+        self.interval_sec = interval_sec
+        self._last_print = 0.0
 
-        if time.time() - last_change > no_progress_timeout_sec:
-            proc.terminate()
-            raise RuntimeError(
-                f"FFmpeg parece travado (sem avanço de progresso por {no_progress_timeout_sec:.0f}s). "
-                "Isso pode indicar problema no comando ou I/O."
+    def __call__(self, ev: FFmpegProgress) -> None:
+        now = time.time()
+        if now - self._last_print < self.interval_sec:
+            return
+        self._last_print = now
+
+        spd_str = f" | {ev.speed:.2f}x" if ev.speed is not None else ""
+        if ev.out_time_sec is None:
+            print(f"⏳ {ev.label}…{spd_str}")
+        elif ev.total_sec:
+            eta_str = f" | ETA {_fmt_time(ev.eta_sec)}" if ev.eta_sec is not None else ""
+            print(
+                f"⏳ {ev.label}: {ev.percent or 0.0:5.1f}% | {_fmt_time(ev.out_time_sec)} / "
+                f"{_fmt_time(ev.total_sec)}{spd_str}{eta_str}"
             )
+        else:
+            print(f"⏳ {ev.label}: {_fmt_time(ev.out_time_sec)}{spd_str}")
 
-        time.sleep(update_interval_sec)
 
-    rc = proc.returncode
+def iter_ffmpeg_progress(
+    cmd: List[str],
+    total_duration_sec: Optional[float] = None,
+    label: str = "Renderizando",
+    check: bool = True,
+    no_progress_timeout_sec: float = 30.0,
+) -> Generator[FFmpegProgress, None, int]:
+    """
+    Executa o ffmpeg com -progress pipe:1 e gera os eventos conforme chegam
+    (o return code fica no valor de retorno do gerador).
+    O stdout é lido em uma thread (o loop principal consegue detectar travamento).
+    O comando não pode escrever a própria saída em stdout.
+    """
+    progress_cmd = cmd[:-1] + ["-loglevel", "error", "-progress", "pipe:1", "-nostats"] + [cmd[-1]]
+    proc = subprocess.Popen(
+        progress_cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    parser = ProgressParser(label, total_duration_sec)
+    events: "queue.Queue[Optional[FFmpegProgress]]" = queue.Queue()
+    # stderr drenado em paralelo (pipe cheio travaria o ffmpeg); só as últimas linhas ficam
+    stderr_tail: "deque[str]" = deque(maxlen=_stderr_tail_lines())
 
-    try:
-        if os.path.exists(progress_file):
-            os.remove(progress_file)
-    except Exception:
-        pass
+    def _drain_stderr() -> None:
+        for line in proc.stderr:  # type: ignore[union-attr]
+            stderr_tail.append(line.rstrip("\n"))
+
+    def _reader() -> None:
+        try:
+            for line in proc.stdout:  # type: ignore[union-attr]
+                ev = parser.feed(line)
+                if ev is not None:
+                    events.put(ev)
+        finally:
+            events.put(None)
 
-    cp = subprocess.CompletedProcess(progress_cmd, rc, stdout="", stderr="")
+    reader = threading.Thread(target=_reader, name="ffmpeg-progress", daemon=True)
+    drainer = threading.Thread(target=_drain_stderr, name="ffmpeg-stderr", daemon=True)
+    reader.start()
+    drainer.start()
+
+    def _error(message: str, rc: Optional[int]) -> FFmpegError:
+        drainer.join(timeout=1.0)
+        return FFmpegError(
+            message,
+            cmd=progress_cmd,
+            returncode=rc,
+            stderr_tail="\n".join(stderr_tail),
+            last_progress=parser.last,
+        )
+
+    last_out_time = 0.0
+    last_change = time.time()
+    finished = False
+    try:
+        while True:
+            try:
+                ev = events.get(timeout=0.5)
+            except queue.Empty:
+                ev = False  # type: ignore[assignment]
+            if ev is None:
+                break
+            if ev:
+                if ev.out_time_sec is not None and ev.out_time_sec > last_out_time + 0.01:
+                    last_out_time = ev.out_time_sec
+                    last_change = time.time()
+                yield ev
+            if time.time() - last_change > no_progress_timeout_sec:
+                proc.terminate()
+                raise _error(
+                    f"FFmpeg parece travado (sem avanço de progresso por {no_progress_timeout_sec:.0f}s). "
+                    "Isso pode indicar problema no comando ou I/O.",
+                    None,
+                )
+        finished = True
+    finally:
+        if not finished and proc.poll() is None:
+            proc.terminate()
+        rc = proc.wait()
+        reader.join(timeout=1.0)
 
     if check and rc != 0:
-        debug_cmd = cmd[:-1] + ["-loglevel", "error"] + [cmd[-1]]
-        dbg = subprocess.run(debug_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
-        raise RuntimeError(
-            "FFmpeg falhou.\n"
-            f"CMD:\n{' '.join(debug_cmd)}\n\nSTDERR:\n{dbg.stderr}"
+        raise _error(f"FFmpeg falhou (código {rc}).", rc)
+    return rc
+
+
+def run_ffmpeg_with_progress(
+    cmd: List[str],
+    total_duration_sec: Optional[float] = None,
+    label: str = "Renderizando",
+    update_interval_sec: float = 0.5,
+    check: bool = True,
+    no_progress_timeout_sec: float = 30.0,
+    on_progress: Optional[ProgressCallback] = None,
+    console: bool = True,
+    priority: int = PRIORITY_NORMAL,
+) -> subprocess.CompletedProcess:
+    """
+    Executa FFmpeg lendo o progresso em stream (-progress pipe:1, ver iter_ffmpeg_progress).
+    Cada evento vai para: impressão no console (console=True), on_progress e os
+    assinantes globais (subscribe_progress). Falha de um assinante não derruba o encode.
+    Em caso de falha levanta FFmpegError com a cauda do stderr desta execução (sem re-rodar).
+    O job passa pelo scheduler global (get_scheduler): espera slot e recebe orçamento de threads.
+    """
+    subscribers = progress_subscribers(update_interval_sec, on_progress, console)
+
+    with get_scheduler().slot(label=label, priority=priority) as slot:
+        events = iter_ffmpeg_progress(
+            with_thread_budget(cmd, slot.threads),
+            total_duration_sec=total_duration_sec,
+            label=label,
+            check=check,
+            no_progress_timeout_sec=no_progress_timeout_sec,
         )
+        while True:
+            try:
+                ev = next(events)
+            except StopIteration as stop:
+                rc = stop.value
+                break
+            emit_progress(subscribers, ev)
 
-    return cp
+    return subprocess.CompletedProcess(cmd, rc, stdout="", stderr="")
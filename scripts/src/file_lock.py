@@ -0,0 +1,69 @@
+# scripts/src/file_lock.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# Lock exclusivo entre processos (e threads) via arquivo <alvo>.lock.
+# Windows: msvcrt.locking; demais: fcntl.flock. O lock some com o processo, então um
+# run que morre no meio não deixa o cache/ledger travado.
+
+_THREAD_LOCKS: Dict[str, threading.Lock] = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _THREAD_LOCKS_GUARD:
+        return _THREAD_LOCKS.setdefault(path, threading.Lock())
+
+
+@contextmanager
+def file_lock(path: str, timeout_sec: float = 60.0) -> Iterator[None]:
+    lock_path = os.path.abspath(path) + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    tlock = _thread_lock(lock_path)
+    if not tlock.acquire(timeout=timeout_sec):
+        raise TimeoutError(f"Timeout aguardando lock: {lock_path}")
+    try:
+        f = open(lock_path, "a+b")
+        try:
+            deadline = time.monotonic() + timeout_sec
+            if os.name == "nt":
+                import msvcrt
+
+                while True:
+                    try:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"Timeout aguardando lock: {lock_path}")
+                        time.sleep(0.05)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                while True:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except OSError:
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"Timeout aguardando lock: {lock_path}")
+                        time.sleep(0.05)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+    finally:
+        tlock.release()
@@ -3,10 +3,16 @@ from __future__ import annotations
 
 import json
 import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .file_lock import file_lock
 
 @dataclass
 class BudgetConfig:
@@ -18,6 +24,28 @@ class BudgetConfig:
     # Pasta do ledger
     ledger_dir: Path = Path("output") / "budget"
 
+# Ledger append-only (output/budget/budget_ledger.jsonl): uma linha JSON por gasto,
+# nunca reescrito. Ao lado, budget_index.json guarda o total corrente por mês, as
+# reservas em aberto e até que byte do ledger já foi somado; consultar o saldo lê só o
+# índice (não cresce com o histórico). Tudo sob file_lock: threads e processos
+# (imagens em paralelo, batch, dois runs ao mesmo tempo) enxergam as reservas uns dos
+# outros, então ninguém aprova junto o último dólar do mês.
+# - reserve_spend: checa e reserva o custo estimado antes da chamada à API
+# - commit_spend: grava o gasto real e solta a reserva; release_spend: só solta
+# Reservas de um processo que morreu expiram após AO_BUDGET_RESERVATION_TTL_SEC (padrão 900).
+# Se o índice se perder, ele é refeito relendo o ledger; o budget_ledger.json antigo é
+# convertido na primeira leitura (e renomeado para .migrated).
+INDEX_VERSION = 1
+_EPS_USD = 1e-9  # somas de float (0.06 - 3 x 0.02) não podem barrar a última imagem
+
+
+@dataclass
+class SpendReservation:
+    cfg: "BudgetConfig"
+    amount_usd: float
+    id: str
+
+
 def _month_key(now: Optional[datetime] = None) -> str:
     now = now or datetime.now()
     return now.strftime("%Y-%m")
@@ -32,7 +60,9 @@ def _load_json(path: Path) -> Dict[str, Any]:
 
 def _save_json(path: Path, data: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}-{threading.get_ident()}")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
 
 def load_budget_config(project_root: Path) -> BudgetConfig:
     limit = float(os.getenv("AO_BUDGET_USD", "15").strip() or "15")
@@ -40,20 +70,152 @@ def load_budget_config(project_root: Path) -> BudgetConfig:
     return BudgetConfig(monthly_limit_usd=limit, cost_per_image_usd=cpi, ledger_dir=project_root / "output" / "budget")
 
 def ledger_path(cfg: BudgetConfig) -> Path:
+    return cfg.ledger_dir / "budget_ledger.jsonl"
+
+def _index_path(cfg: BudgetConfig) -> Path:
+    return cfg.ledger_dir / "budget_index.json"
+
+def _legacy_path(cfg: BudgetConfig) -> Path:
     return cfg.ledger_dir / "budget_ledger.json"
 
-def get_month_spend(cfg: BudgetConfig, now: Optional[datetime] = None) -> Tuple[float, Dict[str, Any]]:
+def _reservation_ttl_sec() -> float:
+    try:
+        return float(os.getenv("AO_BUDGET_RESERVATION_TTL_SEC", "900") or "900")
+    except ValueError:
+        return 900.0
+
+def _empty_index() -> Dict[str, Any]:
+    return {"version": INDEX_VERSION, "offset": 0, "months": {}, "pending": {}}
+
+def _apply_record(index: Dict[str, Any], rec: Dict[str, Any]) -> None:
+    month = str(rec.get("month") or "")
+    months = index["months"]
+    months[month] = float(months.get(month, 0.0)) + float(rec.get("amount_usd", 0.0) or 0.0)
+    index["pending"].pop(str(rec.get("reservation") or ""), None)
+
+def _encode_record(rec: Dict[str, Any]) -> bytes:
+    return (json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+def _migrate_legacy(cfg: BudgetConfig) -> None:
+    """budget_ledger.json (mês -> itens, reescrito a cada gasto) -> linhas do ledger."""
+    legacy = _legacy_path(cfg)
+    if ledger_path(cfg).exists() or not legacy.exists():
+        return
+    lines: List[bytes] = []
+    for month, month_data in sorted((_load_json(legacy) or {}).items()):
+        for item in (month_data or {}).get("items") or []:
+            lines.append(_encode_record({
+                "ts": item.get("ts"),
+                "month": month,
+                "kind": item.get("kind", "image"),
+                "amount_usd": float(item.get("amount_usd", 0.0) or 0.0),
+                "meta": item.get("meta") or {},
+            }))
+    tmp = ledger_path(cfg).with_name(f"budget_ledger.jsonl.tmp{os.getpid()}")
+    tmp.write_bytes(b"".join(lines))
+    os.replace(tmp, ledger_path(cfg))
+    os.replace(legacy, legacy.with_name(legacy.name + ".migrated"))
+    print(f"🧮 Budget: {len(lines)} gastos migrados para {ledger_path(cfg).name}")
+
+def _sync_index(cfg: BudgetConfig) -> Dict[str, Any]:
+    """Índice em dia com o ledger (soma só as linhas novas). Chamar sob o lock."""
+    _migrate_legacy(cfg)
+    index = _load_json(_index_path(cfg))
+    if index.get("version") != INDEX_VERSION:
+        index = _empty_index()
     path = ledger_path(cfg)
-    data = _load_json(path) or {}
-    month = _month_key(now)
-    month_data = data.get(month) or {"spent_usd": 0.0, "items": []}
-    spent = float(month_data.get("spent_usd", 0.0) or 0.0)
-    return spent, data
+    size = path.stat().st_size if path.exists() else 0
+    offset = int(index.get("offset", 0))
+    if size < offset:  # ledger trocado/truncado por fora: refaz do zero
+        index, offset = _empty_index(), 0
+    if size > offset:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        complete = tail[: tail.rfind(b"\n") + 1]
+        for raw in complete.splitlines():
+            try:
+                _apply_record(index, json.loads(raw))
+            except ValueError:
+                continue
+        offset += len(complete)
+        if offset < size:
+            # linha incompleta de um processo que morreu no meio da escrita (ninguém grava sem o lock)
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        index["offset"] = offset
+    now = time.time()
+    index["pending"] = {k: v for k, v in index["pending"].items() if float(v.get("expires_at", 0)) > now}
+    return index
+
+@contextmanager
+def _locked_index(cfg: BudgetConfig) -> Iterator[Dict[str, Any]]:
+    with file_lock(str(_index_path(cfg))):
+        index = _sync_index(cfg)
+        yield index
+        _save_json(_index_path(cfg), index)
+
+def _remaining(cfg: BudgetConfig, index: Dict[str, Any], month: str) -> float:
+    pending = sum(float(p.get("usd", 0.0)) for p in index["pending"].values() if p.get("month") == month)
+    return cfg.monthly_limit_usd - float(index["months"].get(month, 0.0)) - pending
+
+def _append_record(cfg: BudgetConfig, index: Dict[str, Any], rec: Dict[str, Any]) -> None:
+    line = _encode_record(rec)
+    path = ledger_path(cfg)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    _apply_record(index, rec)
+    index["offset"] = int(index.get("offset", 0)) + len(line)
+
+def get_month_spend(cfg: BudgetConfig, now: Optional[datetime] = None) -> Tuple[float, Dict[str, Any]]:
+    """(gasto confirmado no mês, índice)."""
+    with _locked_index(cfg) as index:
+        return float(index["months"].get(_month_key(now), 0.0)), index
 
 def can_spend(cfg: BudgetConfig, estimate_usd: float, now: Optional[datetime] = None) -> Tuple[bool, float]:
-    spent, _ = get_month_spend(cfg, now)
-    remaining = cfg.monthly_limit_usd - spent
-    return (estimate_usd <= remaining), remaining
+    with _locked_index(cfg) as index:
+        remaining = _remaining(cfg, index, _month_key(now))
+    return (estimate_usd <= remaining + _EPS_USD), remaining
+
+def reserve_spend(
+    cfg: BudgetConfig,
+    estimate_usd: float,
+    now: Optional[datetime] = None,
+) -> Tuple[Optional[SpendReservation], float]:
+    """
+    Checa e reserva o custo estimado de uma vez (atômico entre threads e processos).
+    Retorna (reserva ou None se não couber, restante antes da reserva).
+    """
+    month = _month_key(now)
+    with _locked_index(cfg) as index:
+        remaining = _remaining(cfg, index, month)
+        if estimate_usd > remaining + _EPS_USD:
+            return None, remaining
+        res = SpendReservation(cfg=cfg, amount_usd=float(estimate_usd), id=uuid.uuid4().hex)
+        index["pending"][res.id] = {
+            "usd": res.amount_usd,
+            "month": month,
+            "pid": os.getpid(),
+            "expires_at": time.time() + _reservation_ttl_sec(),
+        }
+        return res, remaining
+
+def release_spend(res: SpendReservation) -> None:
+    """Desfaz a reserva (chamada falhou, nada foi cobrado)."""
+    with _locked_index(res.cfg) as index:
+        index["pending"].pop(res.id, None)
+
+def commit_spend(
+    res: SpendReservation,
+    kind: str,
+    meta: Optional[Dict[str, Any]] = None,
+    amount_usd: Optional[float] = None,
+) -> None:
+    """Troca a reserva pelo gasto real no ledger (uma linha; a reserva sai junto)."""
+    _record(res.cfg, res.amount_usd if amount_usd is None else amount_usd, kind, meta, None, reservation=res.id)
 
 def record_spend(
     cfg: BudgetConfig,
@@ -62,19 +224,25 @@ def record_spend(
     meta: Optional[Dict[str, Any]] = None,
     now: Optional[datetime] = None
 ) -> None:
-    now = now or datetime.now()
-    month = _month_key(now)
-    path = ledger_path(cfg)
-    data = _load_json(path) or {}
-    month_data = data.get(month) or {"spent_usd": 0.0, "items": []}
+    _record(cfg, amount_usd, kind, meta, now)
 
-    month_data["spent_usd"] = float(month_data.get("spent_usd", 0.0) or 0.0) + float(amount_usd)
-    item = {
+def _record(
+    cfg: BudgetConfig,
+    amount_usd: float,
+    kind: str,
+    meta: Optional[Dict[str, Any]],
+    now: Optional[datetime],
+    reservation: Optional[str] = None,
+) -> None:
+    now = now or datetime.now()
+    rec: Dict[str, Any] = {
         "ts": now.isoformat(timespec="seconds"),
+        "month": _month_key(now),
         "kind": kind,
         "amount_usd": float(amount_usd),
         "meta": meta or {},
     }
-    month_data["items"].append(item)
-    data[month] = month_data
-    _save_json(path, data)
+    if reservation:
+        rec["reservation"] = reservation
+    with _locked_index(cfg) as index:
+        _append_record(cfg, index, rec)
@@ -2,17 +2,48 @@
 from __future__ import annotations
 
 import hashlib
+import json
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional
+
+from .cache_index import CacheIndex, get_cache_index
+
+# output/images/<chave>.png + index.json (ver cache_index): metadados, LRU e cota
+# AO_IMAGE_CACHE_MAX_MB (padrão 2048; 0 = sem limite).
+#
+# Duas formas de chave:
+# - cache_key: texto exato do prompt (padrão)
+# - intent_cache_key: intenção canônica da cena (âncoras + template + versão do DNA),
+#   imune a mudanças de redação/espaços no template. Vira um grupo no índice, com
+#   variantes <chave>-1, <chave>-2... e limite de reusos por mês (ver image_openai).
 
 def cache_key(prompt: str, model: str, size: str) -> str:
     h = hashlib.sha256()
     h.update((model + "\n" + size + "\n" + prompt).encode("utf-8"))
     return h.hexdigest()[:24]
 
+def intent_cache_key(intent: Dict[str, str], model: str, size: str) -> str:
+    h = hashlib.sha256()
+    h.update((model + "\n" + size + "\n" + json.dumps(intent, sort_keys=True, ensure_ascii=False)).encode("utf-8"))
+    return "i" + h.hexdigest()[:23]
+
 def cache_path(images_dir: Path, key: str) -> Path:
     return images_dir / f"{key}.png"
 
+# chaves de cache_key / intent_cache_key (+ variante); outros PNGs no diretório (ex.: stills
+# com grade de versões antigas, <chave>.grade-<k>.png) não entram no índice nem na cota
+IMAGE_KEY_PATTERN = r"[0-9a-f]{24}|i[0-9a-f]{23}(-[0-9]+)?"
+
+def image_cache_index(images_dir: Path) -> CacheIndex:
+    return get_cache_index(
+        "imagens", images_dir,
+        quota_env="AO_IMAGE_CACHE_MAX_MB", default_quota_mb=2048, file_glob="*.png", key_pattern=IMAGE_KEY_PATTERN,
+    )
+
 def get_cached(images_dir: Path, key: str) -> Optional[Path]:
-    p = cache_path(images_dir, key)
-    return p if p.exists() else None
+    """Hit conta no índice (último uso + hits)."""
+    return image_cache_index(images_dir).lookup(key, cache_path(images_dir, key))
+
+def record_cached(images_dir: Path, key: str, *, cost_usd: float, api_sec: float, **meta: Any) -> None:
+    """Registra uma imagem recém-gerada no índice e aplica a cota."""
+    image_cache_index(images_dir).put(key, cache_path(images_dir, key), cost_usd=cost_usd, api_sec=api_sec, **meta)
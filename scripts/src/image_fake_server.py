@@ -0,0 +1,111 @@
+# scripts/src/image_fake_server.py
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+# Endpoint local que imita POST /v1/images/generations, para testar o estágio de imagens
+# (concorrência, limite de requisições, single-flight, budget) sem custo:
+#   python -m scripts.src.image_fake_server --port 8765 --latency 2
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python main.py --shorts-only
+# Responde com um PNG de cor sólida derivada do prompt e conta as requisições recebidas.
+
+
+def solid_png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """PNG RGB de cor sólida (sem dependências)."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    raw = zlib.compress(row * height, 9)
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+class FakeImageServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_sec: float = 0.0, image_px: int = 64):
+        self.latency_sec = float(latency_sec)
+        self.image_px = int(image_px)
+        self.requests = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):  # silencioso
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/images/generations"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    server._active += 1
+                    server.max_concurrent = max(server.max_concurrent, server._active)
+                try:
+                    time.sleep(server.latency_sec)
+                    digest = zlib.crc32(str(body.get("prompt", "")).encode("utf-8"))
+                    rgb = (digest & 0xFF, (digest >> 8) & 0xFF, (digest >> 16) & 0xFF)
+                    png = solid_png(server.image_px, server.image_px, rgb)
+                    payload = json.dumps({"created": int(time.time()), "data": [{"b64_json": base64.b64encode(png).decode("ascii")}]})
+                finally:
+                    with server._lock:
+                        server._active -= 1
+                data = payload.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self) -> "FakeImageServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Endpoint falso de geração de imagens (compatível com o SDK da OpenAI)")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=2.0, help="segundos por imagem")
+    p.add_argument("--size", type=int, default=64, help="lado do PNG devolvido")
+    args = p.parse_args()
+
+    srv = FakeImageServer(port=args.port, latency_sec=args.latency, image_px=args.size).start()
+    print(f"🏁 Endpoint falso em {srv.base_url} (latência {args.latency:.1f}s). Ctrl+C para sair.")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   requisições: {srv.requests} | pico simultâneo: {srv.max_concurrent}")
+    except KeyboardInterrupt:
+        srv.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,13 +3,16 @@ from __future__ import annotations
 
 import base64
 import os
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
-from openai import OpenAI
-
-from .image_budget import load_budget_config, can_spend, record_spend
-from .image_cache import cache_key, get_cached, cache_path
+from .image_budget import commit_spend, load_budget_config, release_spend, reserve_spend
+from .image_cache import cache_key, cache_path, get_cached, image_cache_index, intent_cache_key, record_cached
+from .openai_client import get_openai_client
+from .rate_limit import SingleFlight, TokenBucket
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
@@ -17,9 +20,11 @@ def _project_root() -> Path:
 def _ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
-def _save_png_from_b64(b64_data: str, out_path: Path) -> None:
+def _write_atomic(out_path: Path, data: bytes) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_bytes(base64.b64decode(b64_data))
+    tmp = out_path.with_name(f"{out_path.stem}.tmp{os.getpid()}-{threading.get_ident()}{out_path.suffix}")
+    tmp.write_bytes(data)
+    os.replace(tmp, out_path)
 
 def _extract_b64_from_response(resp: Any) -> Optional[str]:
     # Compatibilidade com diferentes formatos do SDK/endpoint
@@ -35,15 +40,149 @@ def _extract_b64_from_response(resp: Any) -> Optional[str]:
         pass
     return None
 
+# Imagens em paralelo (ver visual_image_pipeline):
+# - mesma chave de cache em andamento -> uma única chamada (single-flight)
+# - requisições reais passam por um token bucket: AO_IMAGE_RPM (padrão 30, 0 = sem limite)
+#   com rajada AO_IMAGE_BURST (padrão 3)
+# - o custo é reservado no budget antes da chamada e confirmado/devolvido depois
+# Para testar sem custo: python -m scripts.src.image_fake_server e OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+#
+# Chave por intenção (intent=...): cada variante pode ser reaproveitada até
+# AO_IMAGE_INTENT_MAX_REUSES vezes por mês (padrão 4; 0 = sem limite); esgotadas, gera outra.
+_IMAGE_FLIGHTS: SingleFlight[Tuple[str, bool]] = SingleFlight()
+_BUCKET: Optional[Tuple[Tuple[float, int], TokenBucket]] = None
+_BUCKET_LOCK = threading.Lock()
+
+
+def image_rate_limiter() -> TokenBucket:
+    """Token bucket compartilhado pelas chamadas de imagem (recriado se o env mudar)."""
+    global _BUCKET
+    try:
+        rpm = float(os.getenv("AO_IMAGE_RPM", "30") or "30")
+        burst = int(os.getenv("AO_IMAGE_BURST", "3") or "3")
+    except ValueError:
+        rpm, burst = 30.0, 3
+    with _BUCKET_LOCK:
+        if _BUCKET is None or _BUCKET[0] != (rpm, burst):
+            _BUCKET = ((rpm, burst), TokenBucket(rpm / 60.0, burst))
+        return _BUCKET[1]
+
+
+def _request_image_bytes(client: Any, model: str, prompt: str, size: str) -> Tuple[bytes, Optional[str]]:
+    """Chama a API e devolve (bytes do PNG, via). via='url' quando a imagem veio por download."""
+    resp = None
+
+    # Alguns endpoints/contas rejeitam 'response_format' com erro 400 ("Unknown parameter").
+    # Tentamos com b64_json e, se falhar por esse motivo, refazemos sem o parâmetro.
+    try:
+        resp = client.images.generate(
+            model=model,
+            prompt=prompt,
+            size=size,
+            response_format="b64_json",
+        )
+    except Exception as e:
+        msg = str(e)
+        if "response_format" in msg and ("Unknown parameter" in msg or "unknown_parameter" in msg):
+            resp = client.images.generate(
+                model=model,
+                prompt=prompt,
+                size=size,
+            )
+        else:
+            raise
+
+    b64_img = _extract_b64_from_response(resp)
+    if b64_img:
+        return base64.b64decode(b64_img), None
+
+    # Fallback: alguns formatos retornam URL. Baixa e salva localmente.
+    try:
+        data = getattr(resp, "data", None)
+        if data and isinstance(data, list) and data:
+            item = data[0]
+            url = item.get("url") if isinstance(item, dict) else getattr(item, "url", None)
+            if url:
+                import requests  # type: ignore
+
+                r = requests.get(url, timeout=60)
+                r.raise_for_status()
+                return r.content, "url"
+    except Exception:
+        pass
+
+    raise RuntimeError("OpenAI não retornou b64_json para a imagem. Verifique modelo/SDK.")
+
+
+def _intent_max_reuses() -> int:
+    try:
+        return int(os.getenv("AO_IMAGE_INTENT_MAX_REUSES", "4") or "4")
+    except ValueError:
+        return 4
+
+
+def _generate_uncached(
+    root: Path, images_dir: Path, key: str, prompt: str, model: str, size: str, force: bool, video_type: str,
+    group: Optional[str] = None,
+) -> Tuple[str, bool]:
+    # outra chamada pode ter terminado entre a checagem do cache e o single-flight
+    cached = get_cached(images_dir, key)
+    if cached and not force:
+        return str(cached), True
+
+    cfg = load_budget_config(root)
+    estimate = float(os.getenv("AO_COST_PER_IMAGE_USD", str(cfg.cost_per_image_usd)))
+    reservation, remaining = reserve_spend(cfg, estimate)
+    if reservation is None:
+        raise RuntimeError(
+            f"Budget guard: limite mensal atingido. Tentou gastar ~${estimate:.2f}, "
+            f"restante ~${remaining:.2f}. Ajuste AO_BUDGET_USD/AO_COST_PER_IMAGE_USD ou aguarde o próximo mês."
+        )
+
+    try:
+        image_rate_limiter().acquire()
+        client = get_openai_client()
+        t0 = time.perf_counter()
+        png, via = _request_image_bytes(client, model, prompt, size)
+        api_sec = time.perf_counter() - t0
+        out_path = cache_path(images_dir, key)
+        _write_atomic(out_path, png)
+    except BaseException:
+        release_spend(reservation)
+        raise
+
+    meta: Dict[str, Any] = {"model": model, "size": size, "cache_key": key}
+    if via:
+        meta["via"] = via
+    commit_spend(reservation, kind="image", meta=meta)
+    extra: Dict[str, Any] = {"group": group} if group else {}
+    record_cached(images_dir, key, cost_usd=estimate, api_sec=api_sec, model=model, size=size, video_type=video_type, **extra)
+    return str(out_path), False
+
+
+def _generate_for_intent(
+    root: Path, images_dir: Path, group: str, prompt: str, model: str, size: str, force: bool, video_type: str
+) -> Tuple[str, bool]:
+    idx = image_cache_index(images_dir)
+    if not force:
+        hit = idx.acquire_group(group, max_reuses=_intent_max_reuses(), period=datetime.now().strftime("%Y-%m"))
+        if hit is not None:
+            return str(hit[1]), True
+    key = idx.reserve_group_key(group, ".png")
+    return _generate_uncached(root, images_dir, key, prompt, model, size, force, video_type, group=group)
+
+
 def generate_image_cached(
     prompt: str,
     video_type: str = "short",
     model: Optional[str] = None,
     size: Optional[str] = None,
     force: bool = False,
+    intent: Optional[Dict[str, str]] = None,
 ) -> Tuple[str, bool]:
     """
-    Gera imagem via OpenAI com cache + budget guard.
+    Gera imagem via OpenAI com cache + budget guard. Seguro para chamar de várias threads.
+    Com `intent` (visual_extractor.canonical_intent), a chave é a intenção e não o texto do prompt.
     Retorna (path_png, from_cache).
     """
     root = _project_root()
@@ -57,83 +196,20 @@ def generate_image_cached(
         # Shorts: 1024; Longs: 1024 (por enquanto). Pode subir para 1536/2048 depois com orçamento.
         size = os.getenv("AO_IMAGE_SIZE", "1024x1024")
 
+    if intent is not None:
+        group = intent_cache_key(intent, model=model, size=size)
+        (path, from_cache), shared = _IMAGE_FLIGHTS.do(
+            group, lambda: _generate_for_intent(root, images_dir, group, prompt, model, size, force, video_type)
+        )
+        return path, from_cache or shared
+
     key = cache_key(prompt=prompt, model=model, size=size)
     cached = get_cached(images_dir, key)
     if cached and not force:
         return str(cached), True
 
-    cfg = load_budget_config(root)
-    estimate = float(os.getenv("AO_COST_PER_IMAGE_USD", str(cfg.cost_per_image_usd)))
-    ok, remaining = can_spend(cfg, estimate)
-    if not ok:
-        raise RuntimeError(
-            f"Budget guard: limite mensal atingido. Tentou gastar ~${estimate:.2f}, "
-            f"restante ~${remaining:.2f}. Ajuste AO_BUDGET_USD/AO_COST_PER_IMAGE_USD ou aguarde o próximo mês."
-        )
-
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    # Tentamos pedir b64 para salvar local e manter pipeline offline.
-    resp = None
-
-    # Alguns endpoints/contas rejeitam 'response_format' com erro 400 ("Unknown parameter").
-    # Tentamos com b64_json e, se falhar por esse motivo, refazemos sem o parâmetro.
-    try:
-        resp = client.images.generate(
-            model=model,
-            prompt=prompt,
-            size=size,
-            response_format="b64_json",
-        )
-    except Exception as e:
-        msg = str(e)
-        if "response_format" in msg and ("Unknown parameter" in msg or "unknown_parameter" in msg):
-            resp = client.images.generate(
-                model=model,
-                prompt=prompt,
-                size=size,
-            )
-        else:
-            raise
-
-    b64_img = _extract_b64_from_response(resp)
-    if not b64_img:
-        # Fallback: alguns formatos retornam URL. Baixa e salva localmente.
-        try:
-            data = getattr(resp, "data", None)
-            if data and isinstance(data, list) and data:
-                item = data[0]
-                url = item.get("url") if isinstance(item, dict) else getattr(item, "url", None)
-                if url:
-                    import requests  # type: ignore
-
-                    r = requests.get(url, timeout=60)
-                    r.raise_for_status()
-                    out_path = cache_path(images_dir, key)
-                    out_path.parent.mkdir(parents=True, exist_ok=True)
-                    out_path.write_bytes(r.content)
-
-                    record_spend(
-                        cfg,
-                        amount_usd=estimate,
-                        kind="image",
-                        meta={"model": model, "size": size, "cache_key": key, "via": "url"},
-                    )
-                    return str(out_path), False
-        except Exception:
-            pass
-
-    if not b64_img:
-        raise RuntimeError("OpenAI não retornou b64_json para a imagem. Verifique modelo/SDK.")
-
-    out_path = cache_path(images_dir, key)
-    _save_png_from_b64(b64_img, out_path)
-
-    record_spend(
-        cfg,
-        amount_usd=estimate,
-        kind="image",
-        meta={"model": model, "size": size, "cache_key": key},
+    (path, from_cache), shared = _IMAGE_FLIGHTS.do(
+        key, lambda: _generate_uncached(root, images_dir, key, prompt, model, size, force, video_type)
     )
-
-    return str(out_path), False
+    # shared: outra thread pagou por esta imagem agora há pouco
+    return path, from_cache or shared
@@ -0,0 +1,115 @@
+# scripts/src/image_variants.py
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .cache_index import CacheIndex, get_cache_index
+from .scene_cache import file_sha256
+
+# Variantes pré-enquadradas das imagens, uma por geometria de saída:
+#   output/images/variants/<sha da fonte>-<w>x<h>-<reframe>-v<versão>.ppm
+# O enquadramento (scale/crop, blur_pad, fit) é o mesmo _build_reframe_chain do renderer,
+# feito UMA vez por imagem e geometria; re-renders e outros aspectos reaproveitam o arquivo.
+# PPM (rgb24 sem compressão) decodifica sem inflate: o ffmpeg só copia os bytes.
+# A chave é o conteúdo da fonte (inclui o grade do still_grade, se ativo), não o caminho.
+#
+# AO_IMAGE_VARIANTS=0 desliga (o renderer volta a enquadrar no grafo).
+# AO_IMAGE_VARIANT_CACHE_MAX_MB (padrão 1024; 0 = sem limite): cota LRU, ver cache_index.
+# AO_IMAGE_VARIANT_WORKERS (padrão 4): variantes geradas em paralelo.
+
+VARIANT_VERSION = 1
+
+
+def variants_enabled() -> bool:
+    return (os.getenv("AO_IMAGE_VARIANTS", "1") or "1").strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def variants_dir(project_root: Path) -> Path:
+    return Path(project_root) / "output" / "images" / "variants"
+
+
+def variant_cache_index(cache_dir: Path) -> CacheIndex:
+    return get_cache_index(
+        "variantes de imagem", cache_dir,
+        quota_env="AO_IMAGE_VARIANT_CACHE_MAX_MB", default_quota_mb=1024, file_glob="*.ppm", work_label="transcode",
+    )
+
+
+def variant_key(src: str, width: int, height: int, reframe: str) -> str:
+    return f"{file_sha256(src)[:24]}-{int(width)}x{int(height)}-{reframe}-v{VARIANT_VERSION}"
+
+
+def _variant_workers(n: int) -> int:
+    try:
+        workers = int(os.getenv("AO_IMAGE_VARIANT_WORKERS", "4") or "4")
+    except ValueError:
+        workers = 4
+    return max(1, min(workers, n))
+
+
+def _transcode(ffmpeg: str, src: str, out_path: Path, width: int, height: int, reframe: str) -> None:
+    from .renderer import _build_reframe_chain
+
+    chain = _build_reframe_chain("0:v", "still", width=width, height=height, reframe=reframe, tag="v")
+    tmp = out_path.with_name(f"{out_path.stem}.tmp{os.getpid()}-{threading.get_ident()}.ppm")
+    cmd = [
+        ffmpeg, "-y", "-v", "error",
+        "-i", src,
+        "-filter_complex", chain,
+        "-map", "[still]",
+        "-frames:v", "1",
+        "-f", "image2", "-c:v", "ppm", "-pix_fmt", "rgb24",
+        str(tmp),
+    ]
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if res.returncode != 0 or not tmp.is_file() or tmp.stat().st_size == 0:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        err = res.stderr.decode("utf-8", errors="replace")
+        raise RuntimeError(f"Falha ao gerar variante {width}x{height} ({reframe}) de {src}\n{err}")
+    os.replace(tmp, out_path)
+
+
+def ensure_variant(
+    ffmpeg: str, src: str, width: int, height: int, reframe: str, cache_dir: Path,
+) -> str:
+    """Caminho da variante (gerada uma vez; hit conta no índice)."""
+    idx = variant_cache_index(cache_dir)
+    key = variant_key(src, width, height, reframe)
+    out_path = Path(cache_dir) / f"{key}.ppm"
+    if idx.lookup(key, out_path) is not None:
+        return str(out_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    _transcode(ffmpeg, src, out_path, width, height, reframe)
+    idx.put(key, out_path, api_sec=time.perf_counter() - t0, width=width, height=height, reframe=reframe)
+    return str(out_path)
+
+
+def target_variants(
+    ffmpeg: str,
+    image_paths: List[str],
+    *,
+    width: int,
+    height: int,
+    reframe: str,
+    project_root: Path,
+    workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """imagem original -> variante width x height já enquadrada, uma vez por imagem única."""
+    unique = list(dict.fromkeys(p for p in image_paths if p))
+    if not unique:
+        return {}
+    cache_dir = variants_dir(project_root)
+    n_workers = _variant_workers(len(unique)) if workers is None else max(1, int(workers))
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="variant") as pool:
+        futures = {p: pool.submit(ensure_variant, ffmpeg, p, width, height, reframe, cache_dir) for p in unique}
+        return {p: fut.result() for p, fut in futures.items()}
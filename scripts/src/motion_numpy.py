@@ -0,0 +1,285 @@
+# scripts/src/motion_numpy.py
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ffmpeg_tools import (
+    FFmpegError,
+    FFmpegProgress,
+    emit_progress,
+    ensure_ffmpeg,
+    get_scheduler,
+    progress_subscribers,
+    with_thread_budget,
+)
+from .renderer import (
+    RenderTarget,
+    _RenderInputs,
+    _build_post_chain,
+    _build_reframe_chain,
+    _scene_frame_counts,
+    _scene_image_paths,
+    _scene_runs,
+    _target_variants,
+    _scene_pan_params,
+    _scene_zoom_params,
+    _post_inputs,
+    _target_codec_args,
+)
+
+# Motor de movimento alternativo (AO_MOTION_ENGINE=numpy):
+# - cada imagem é decodificada/enquadrada UMA vez (ffmpeg -> rgb24)
+# - as janelas de zoom/pan da cena inteira são calculadas de uma vez (vetorizado)
+# - os frames são reamostrados em NumPy e enviados como rawvideo para um único encoder
+# - o progresso (frames já enviados) sai como FFmpegProgress para o console e para os
+#   assinantes de subscribe_progress, como nos outros motores
+#
+# Parallax: no grafo ffmpeg o FG é opaco e cobre o quadro inteiro, então o BG desfocado
+# nunca aparece; aqui renderizamos direto o resultado visível (mesmo zoom/pan do FG).
+
+
+def _require_numpy():
+    try:
+        import numpy as np  # type: ignore
+    except ImportError as e:
+        raise RuntimeError("AO_MOTION_ENGINE=numpy requer numpy. Instale com: pip install numpy") from e
+    return np
+
+
+def _stderr_tail(raw: bytes, lines: int = 40) -> str:
+    return "\n".join(raw.decode("utf-8", errors="replace").strip().splitlines()[-lines:])
+
+
+def decode_still(path: str, width: int, height: int, reframe: str = "crop"):
+    """Decodifica e enquadra a imagem em width x height uma única vez. Retorna array (H, W, 3) uint8."""
+    np = _require_numpy()
+    chain = _build_reframe_chain("0:v", "still", width=width, height=height, reframe=reframe, tag="n")
+    cmd = [
+        ensure_ffmpeg(), "-v", "error",
+        "-i", path,
+        "-filter_complex", chain,
+        "-map", "[still]",
+        "-frames:v", "1",
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-",
+    ]
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    expected = width * height * 3
+    if res.returncode != 0 or len(res.stdout) < expected:
+        raise FFmpegError(
+            f"Falha ao decodificar imagem para o motor NumPy: {path}",
+            cmd=cmd, returncode=res.returncode, stderr_tail=_stderr_tail(res.stderr),
+        )
+    return np.frombuffer(res.stdout[:expected], dtype=np.uint8).reshape(height, width, 3)
+
+
+def motion_windows(motion: Dict[str, Any], frames: int, width: int, height: int):
+    """
+    Janelas de recorte (x0, y0, w, h) para todos os frames da cena, em float32.
+    Mesma semântica do zoompan do renderer: zoom linear on/frames e pan por _scene_pan_params.
+    """
+    np = _require_numpy()
+    zoom_start, zoom_end = _scene_zoom_params(motion)
+    x_start, x_end = _scene_pan_params(motion)
+    t = np.arange(frames, dtype=np.float32) / float(max(1, frames))
+    zoom = zoom_start + (zoom_end - zoom_start) * t
+    w = width / zoom
+    h = height / zoom
+    x0 = (width - w) * (x_start + (x_end - x_start) * t)
+    y0 = (height - h) * 0.5
+    return x0, y0, w, h
+
+
+def _axis_coords(np, start: float, size: float, out_n: int, src_n: int) -> Tuple[Any, Any, Any]:
+    pos = start + (np.arange(out_n, dtype=np.float32) + 0.5) * (size / out_n) - 0.5
+    pos = np.clip(pos, 0.0, src_n - 1)
+    i0 = np.floor(pos).astype(np.int32)
+    i1 = np.minimum(i0 + 1, src_n - 1)
+    frac = (pos - i0).astype(np.float32)
+    return i0, i1, frac
+
+
+def resample_window(img, x0: float, y0: float, w: float, h: float, out_w: int, out_h: int):
+    """Recorte sub-pixel + redimensionamento bilinear separável (linhas, depois colunas)."""
+    np = _require_numpy()
+    src_h, src_w = img.shape[0], img.shape[1]
+    yi0, yi1, fy = _axis_coords(np, y0, h, out_h, src_h)
+    xi0, xi1, fx = _axis_coords(np, x0, w, out_w, src_w)
+
+    # só as colunas tocadas pela janela
+    c0, c1 = int(xi0.min()), int(xi1.max()) + 1
+    cols = img[:, c0:c1]
+    fy = fy[:, None, None]
+    rows = cols[yi0] * (1.0 - fy) + cols[yi1] * fy
+    fx = fx[None, :, None]
+    out = rows[:, xi0 - c0] * (1.0 - fx) + rows[:, xi1 - c0] * fx
+    return (out + 0.5).astype(np.uint8)
+
+
+def iter_scene_frames(
+    img,
+    motion: Dict[str, Any],
+    frames: int,
+    width: int,
+    height: int,
+    first: int = 0,
+    last: Optional[int] = None,
+):
+    """Frames [first, last) da cena (o movimento é sempre calculado sobre a cena inteira)."""
+    np = _require_numpy()
+    src = img.astype(np.float32)
+    x0, y0, w, h = motion_windows(motion, frames, width, height)
+    for i in range(max(0, first), min(frames, frames if last is None else last)):
+        yield resample_window(src, float(x0[i]), float(y0[i]), float(w[i]), float(h[i]), width, height)
+
+
+def _encoder_cmd(
+    inputs: _RenderInputs,
+    target: RenderTarget,
+    out_path: str,
+    duration_sec: float,
+) -> List[str]:
+    cmd: List[str] = [
+        ensure_ffmpeg(), "-y",
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-s", f"{target.width}x{target.height}",
+        "-r", str(inputs.fps),
+        "-i", "-",
+    ]
+    # janela do perfil draft: o vídeo chega já cortado; áudio e legendas são deslocados
+    start, length = inputs.window if inputs.window else (0.0, float(duration_sec))
+    post = _post_inputs(
+        inputs.root, target.width, target.height, inputs.fps, inputs.wm_path, first_idx=1, start_sec=start,
+    )
+    cmd += post.args
+    if start > 0:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", inputs.audio_path]
+    audio_input_idx = 1 + post.count
+
+    parts: List[str] = [
+        "[0:v]format=rgba[vbase]" if start <= 0
+        else f"[0:v]format=rgba,setpts=PTS-STARTPTS+{start:.6f}/TB[vbase]"
+    ]
+    post_parts, vout = _build_post_chain("vbase", post, inputs.ass_arg)
+    parts += post_parts
+    if start > 0:
+        parts.append(f"[{vout}]setpts=PTS-STARTPTS[vwin]")
+        vout = "vwin"
+
+    cmd += [
+        "-filter_complex", ";".join(parts),
+        "-map", f"[{vout}]",
+        "-map", f"{audio_input_idx}:a",
+        "-shortest",
+        "-t", f"{length:.3f}",
+        *_target_codec_args([target]),
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+        "-loglevel", "error",
+        out_path,
+    ]
+    return cmd
+
+
+def _frames_progress(label: str, frame: int, fps: float, total_frames: int, elapsed: float, done: bool = False) -> FFmpegProgress:
+    out_time = frame / fps
+    total = total_frames / fps
+    speed = out_time / elapsed if elapsed > 0 else None
+    return FFmpegProgress(
+        label=label,
+        frame=frame,
+        fps=frame / elapsed if elapsed > 0 else None,
+        out_time_sec=out_time,
+        speed=speed,
+        total_sec=total or None,
+        eta_sec=max(0.0, total - out_time) / speed if speed else None,
+        percent=min(100.0, frame / total_frames * 100.0) if total_frames else None,
+        done=done,
+    )
+
+
+def render_target_numpy(inputs: _RenderInputs, target: RenderTarget, duration_sec: float) -> str:
+    """Renderiza uma target enviando todos os frames (rawvideo) para um único encoder via stdin."""
+    _require_numpy()
+    out_path = target.out_path(inputs.root)
+    scenes = inputs.scenes
+    image_paths = _scene_image_paths(scenes, inputs.img_any or "")
+    frame_counts = _scene_frame_counts(len(image_paths), duration_sec, inputs.fps)
+    runs = _scene_runs(scenes, image_paths, frame_counts)
+
+    win_first, win_last = 0, sum(frame_counts)
+    if inputs.window:
+        win_first = int(round(inputs.window[0] * inputs.fps))
+        win_last = min(win_last, win_first + int(round(inputs.window[1] * inputs.fps)))
+
+    variants, reframe = _target_variants(image_paths, target, inputs.root)
+    stills: Dict[str, Any] = {}
+    cmd = _encoder_cmd(inputs, target, out_path, duration_sec)
+    label = f"{target.label} (numpy)"
+    subscribers = progress_subscribers()
+    total_frames = max(0, win_last - win_first)
+    last_ev: Optional[FFmpegProgress] = None
+    io_error: Optional[OSError] = None
+
+    with get_scheduler().slot(label=target.label) as slot, tempfile.TemporaryFile() as err_file:
+        cmd = with_thread_budget(cmd, slot.threads)
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=err_file)
+        t0 = last_emit = time.time()
+        written = 0
+        try:
+            run_start = 0
+            for run in runs:
+                frames = run.frames
+                first, last = win_first - run_start, win_last - run_start
+                run_start += frames
+                if last <= 0 or first >= frames:
+                    continue
+                img_path = run.image_path
+                if img_path not in stills:
+                    stills[img_path] = decode_still(variants.get(img_path, img_path), target.width, target.height, reframe)
+                for frame in iter_scene_frames(
+                    stills[img_path], run.motion, frames, target.width, target.height, first=first, last=last,
+                ):
+                    proc.stdin.write(frame.tobytes())
+                    written += 1
+                    now = time.time()
+                    if now - last_emit >= 0.5:
+                        last_emit = now
+                        last_ev = _frames_progress(label, written, inputs.fps, total_frames, now - t0)
+                        emit_progress(subscribers, last_ev)
+        except BrokenPipeError:
+            pass  # o encoder fechou o stdin: o return code decide abaixo
+        except OSError as e:
+            io_error = e
+            proc.kill()
+        finally:
+            try:
+                proc.stdin.close()
+            except Exception:
+                pass
+            rc = proc.wait()
+
+        if io_error is not None:
+            err_file.seek(0)
+            raise FFmpegError(
+                f"Falha de I/O ao enviar frames ao encoder (motor NumPy): {io_error}",
+                cmd=cmd, returncode=rc, stderr_tail=_stderr_tail(err_file.read()), last_progress=last_ev,
+            ) from io_error
+        # BrokenPipe com rc == 0: o encoder já atingiu -t e encerrou normalmente
+        if rc != 0:
+            err_file.seek(0)
+            raise FFmpegError(
+                "FFmpeg falhou (motor NumPy).",
+                cmd=cmd, returncode=rc, stderr_tail=_stderr_tail(err_file.read()), last_progress=last_ev,
+            )
+    emit_progress(subscribers, _frames_progress(label, written, inputs.fps, total_frames, time.time() - t0, done=True))
+    return out_path
+
+
+def render_targets_numpy(inputs: _RenderInputs, targets: List[RenderTarget], duration_sec: float) -> Dict[str, str]:
+    return {t.name: render_target_numpy(inputs, t, float(duration_sec)) for t in targets}
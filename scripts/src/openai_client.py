@@ -0,0 +1,28 @@
+# scripts/src/openai_client.py
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Optional, Tuple
+
+# Cliente OpenAI criado no primeiro uso e compartilhado (roteiro, TTS, imagens).
+# Importar o SDK custa centenas de ms: comandos que só renderizam/legendam não pagam isso.
+
+_CLIENT: Optional[Tuple[Optional[str], Any]] = None
+_LOCK = threading.Lock()
+
+
+def get_openai_client(require_key: bool = False) -> Any:
+    """Retorna o cliente OpenAI (recriado só se OPENAI_API_KEY mudar)."""
+    global _CLIENT
+    api_key = os.getenv("OPENAI_API_KEY")
+    if require_key and not api_key:
+        raise RuntimeError("OPENAI_API_KEY não encontrada. Defina a variável de ambiente antes de rodar.")
+    with _LOCK:
+        if _CLIENT is None or _CLIENT[0] != api_key:
+            try:
+                from openai import OpenAI  # type: ignore
+            except ImportError as e:
+                raise RuntimeError("SDK da OpenAI não instalado. Instale com: pip install openai") from e
+            _CLIENT = (api_key, OpenAI(api_key=api_key))
+        return _CLIENT[1]
@@ -6,10 +6,7 @@ import os
 import re
 from typing import Any, Dict, List, Optional, Union
 
-from openai import OpenAI
-
-# OpenAI client reads OPENAI_API_KEY from environment by default
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from .openai_client import get_openai_client
 
 
 def _extract_json_candidate(text: str) -> Optional[str]:
@@ -136,7 +133,7 @@ def _repair_to_json(model: str, bad_output: str) -> str:
         "Conteúdo:\n"
         + bad_output
     )
-    resp = client.chat.completions.create(
+    resp = get_openai_client().chat.completions.create(
         model=model,
         messages=[
             {"role": "system", "content": "Você é um conversor rigoroso para JSON válido."},
@@ -189,7 +186,7 @@ def generate_short_script() -> Dict[str, Any]:
         "}\n"
     )
 
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model=model,
         messages=[
             {
@@ -343,7 +340,7 @@ def _repair_long_to_json(model: str, bad_output: str, scenes_count: int) -> str:
         "Conteúdo:\\n"
         + bad_output
     )
-    resp = client.chat.completions.create(
+    resp = get_openai_client().chat.completions.create(
         model=model,
         messages=[
             {"role": "system", "content": "Você é um reparador de JSON. Retorne somente JSON válido."},
@@ -445,7 +442,7 @@ def generate_long_script() -> Dict[str, Any]:
         "Regras finais: JSON puro; não inclua 'pausa final' nem '...'.\\n"
     )
 
-    resp = client.chat.completions.create(
+    resp = get_openai_client().chat.completions.create(
         model=model,
         messages=[
             {"role": "system", "content": "Você cria roteiros LONG (PT-BR) com estética documental e tom neutro. Responda sempre em JSON puro."},
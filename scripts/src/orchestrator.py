@@ -37,19 +37,22 @@ def _encode_voice_to_m4a(voice_mp3: str, out_m4a: str, duration_sec: float) -> N
         "-loglevel", "error",
         out_m4a,
     ]
-    run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label="Encodando voz (sem trilha)")
+    run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label="Encodando voz (sem trilha)", priority=PRIORITY_HIGH)
 
 import os
 import json
-from typing import Dict, Any, Union
+from pathlib import Path
+from typing import Dict, Any, Tuple, Union
 
 from scripts.src.openai_generators import generate_short_script, generate_long_script
 from scripts.src.tts_openai import generate_tts_mp3
 from scripts.src.audio_mix import mix_voice_with_music
-from scripts.src.renderer import render_short_video, render_long_video_16x9, render_long_video_9x16
-from scripts.src.ffmpeg_tools import get_media_duration_seconds
+from scripts.src.renderer import _output_tag, _project_root, _tagged_filename, render_short_video, render_long_videos
+from scripts.src.ffmpeg_tools import PRIORITY_HIGH, ensure_ffmpeg, get_media_duration_seconds, run_ffmpeg_with_progress
 from scripts.src.subtitle_validator import validate_subtitles
 from scripts.src.subtitle_from_script import apply_subtitles_from_script
+from scripts.src.run_graph import RunGraph
+from scripts.src.cache_index import print_run_reports, release_pins
 
 # Compat: visual_extractor teve nomes diferentes ao longo dos patches
 import scripts.src.visual_extractor as _ve
@@ -114,20 +117,27 @@ def _ensure_scenes(short_data: Dict[str, Any]) -> None:
     if not isinstance(scenes, list) or not scenes:
         short_data["scenes"] = [{"scene_id": 1, "subtitle_chunks": ["…"]}]
 
-def run_auto_short() -> Dict[str, Any]:
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+def _audio_out_paths(root: str, data: Dict[str, Any], voice_name: str, mixed_name: str) -> Tuple[str, str]:
+    """voice/mixed em output/audio; itens de batch (_output_tag) ganham arquivos próprios."""
+    out_audio_dir = os.path.join(root, "output", "audio")
+    os.makedirs(out_audio_dir, exist_ok=True)
+    tag = _output_tag(data)
+    return (
+        os.path.join(out_audio_dir, _tagged_filename(voice_name, tag)),
+        os.path.join(out_audio_dir, _tagged_filename(mixed_name, tag)),
+    )
 
-    requested_duration_sec = float(os.getenv("AO_SHORT_SECONDS", "55"))
-    # Por padrão, usamos a duração REAL do áudio (evita drift de legendas).
-    # Se quiser forçar exatamente AO_SHORT_SECONDS, defina AO_FORCE_SHORT_SECONDS=1.
-    duration_sec = requested_duration_sec
-    print(f"▶ Gerando SHORT ({int(requested_duration_sec)}s) em modo automático...")
 
+# ===== Estágios do SHORT (usados por run_auto_short e pelo batch) =====
+def short_generate_script() -> Dict[str, Any]:
     print("🧠 Gerando roteiro automático...")
     short_data_raw = generate_short_script()
     short_data = _ensure_dict(short_data_raw)
     _ensure_scenes(short_data)
+    return short_data
 
+
+def short_subtitle_stage(short_data: Dict[str, Any]) -> Dict[str, Any]:
     narration_text = str(short_data.get("narration") or "").strip()
 
     # ✅ Legendas DEVEM vir da narração (não do plano visual)
@@ -137,18 +147,33 @@ def run_auto_short() -> Dict[str, Any]:
         short_data["scenes"] = scenes
 
     validate_subtitles(short_data, strict=os.getenv("AO_SUBS_STRICT", "0") == "1")
+    return short_data
+
+
+def short_script_stage() -> Dict[str, Any]:
+    """Roteiro + legendas a partir da narração."""
+    return short_subtitle_stage(short_generate_script())
 
+
+def short_visual_stage(short_data: Dict[str, Any]) -> Dict[str, Any]:
     # Plano visual é para imagens/movimento (não para texto das legendas)
     short_data = _build_visual_plan(short_data)
     try:
         print(f"🧩 Plano visual: {len(short_data.get('scenes', []))} cenas")
     except Exception:
         print("🧩 Plano visual: ok")
+    return short_data
 
-    out_audio_dir = os.path.join(root, "output", "audio")
-    os.makedirs(out_audio_dir, exist_ok=True)
-    voice_path = os.path.join(out_audio_dir, "voice.mp3")
-    mixed_path = os.path.join(out_audio_dir, "mixed.m4a")
+
+def short_audio_stage(short_data: Dict[str, Any]) -> float:
+    """TTS + mix. Grava short_data['_audio_path'] e retorna a duração do vídeo."""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    requested_duration_sec = float(os.getenv("AO_SHORT_SECONDS", "55"))
+    # Por padrão, usamos a duração REAL do áudio (evita drift de legendas).
+    # Se quiser forçar exatamente AO_SHORT_SECONDS, defina AO_FORCE_SHORT_SECONDS=1.
+    duration_sec = requested_duration_sec
+    narration_text = str(short_data.get("narration") or "").strip()
+    voice_path, mixed_path = _audio_out_paths(root, short_data, "voice.mp3", "mixed.m4a")
 
     print("🎙️ Gerando narração (OpenAI TTS)...")
     generate_tts_mp3(
@@ -171,38 +196,62 @@ def run_auto_short() -> Dict[str, Any]:
             duration_sec = float(requested_duration_sec)
         else:
             duration_sec = measured
-    
 
     print("🎚️ Mixando voz + trilha (ducking)...")
     mix_voice_with_music(voice_path, mixed_path, duration_sec=duration_sec)
 
     short_data["_audio_path"] = mixed_path
+    return duration_sec
 
+
+def short_render_stage(short_data: Dict[str, Any], duration_sec: float) -> Dict[str, Any]:
     print("🎬 Renderizando vídeo SHORT...")
     out_video = render_short_video(short_data, duration_sec=duration_sec)
     print(f"✅ SHORT finalizado!\n📄 Vídeo: {out_video}")
-    return {"video": out_video, "audio": mixed_path}
+    return {"video": out_video, "audio": short_data["_audio_path"]}
 
 
-def run_auto_long() -> Dict[str, Any]:
+def _with_audio(visual_data: Dict[str, Any], script_data: Dict[str, Any]) -> Dict[str, Any]:
+    """O plano visual pode devolver outro dict: leva o áudio do ramo de TTS para ele."""
+    if visual_data is not script_data:
+        visual_data["_audio_path"] = script_data["_audio_path"]
+    return visual_data
+
+
+def run_auto_short() -> Dict[str, Any]:
     """
-    Pipeline LONG automático:
-    - Roteiro LONG (JSON)
-    - Legendas extraídas da narração
-    - Visual plan (imagens/motion)
-    - TTS + mix (ducking)
-    - Render 16:9 e 9:16
+    Assim que o roteiro existe, TTS+mix e legendas -> plano visual/imagens rodam em paralelo;
+    só o render espera os dois (latência ~ roteiro + max(TTS, imagens) + render).
     """
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    requested_duration_sec = float(os.getenv("AO_SHORT_SECONDS", "55"))
+    print(f"▶ Gerando SHORT ({int(requested_duration_sec)}s) em modo automático...")
 
-    print("▶ Gerando LONG em modo automático...")
+    graph = RunGraph()
+    graph.add("roteiro", short_generate_script)
+    graph.add("audio", short_audio_stage, "roteiro")
+    graph.add("legendas", short_subtitle_stage, "roteiro")
+    graph.add("visual", short_visual_stage, "legendas")
+    graph.add("render", lambda data, dur, src: short_render_stage(_with_audio(data, src), dur), "visual", "audio", "roteiro")
+    res = graph.run()
+    print(res.summary("SHORT"))
+    print_run_reports(Path(_project_root()))
+    release_pins()
+    return res["render"]
+
+
+# ===== Estágios do LONG =====
+def long_generate_script() -> Dict[str, Any]:
     print("🧠 Gerando roteiro LONG automático...")
     long_data = _ensure_dict(generate_long_script())
 
     narration_text = str(long_data.get("narration") or "").strip()
     if not narration_text:
         raise RuntimeError("Roteiro LONG veio sem 'narration'.")
+    return long_data
+
 
+def long_subtitle_stage(long_data: Dict[str, Any]) -> Dict[str, Any]:
+    narration_text = str(long_data.get("narration") or "").strip()
     scenes = long_data.get("scenes") or []
     apply_subtitles_from_script(
         scenes,
@@ -212,8 +261,14 @@ def run_auto_long() -> Dict[str, Any]:
     long_data["scenes"] = scenes
 
     validate_subtitles(long_data, strict=os.getenv("AO_SUBS_STRICT", "0") == "1")
+    return long_data
+
+
+def long_script_stage() -> Dict[str, Any]:
+    return long_subtitle_stage(long_generate_script())
+
 
-    # Visual plan
+def long_visual_stage(long_data: Dict[str, Any]) -> Dict[str, Any]:
     if os.getenv("AO_IMAGES_ENABLED", "1") == "1":
         try:
             long_data = _build_visual_plan(long_data)
@@ -223,12 +278,14 @@ def run_auto_long() -> Dict[str, Any]:
                 print("🧩 Plano visual: ok")
         except Exception as e:
             print(f"⚠️ Falha ao gerar imagens (continuando sem imagens): {e}")
+    return long_data
 
-    out_audio_dir = os.path.join(root, "output", "audio")
-    os.makedirs(out_audio_dir, exist_ok=True)
 
-    voice_path = os.path.join(out_audio_dir, "voice_long.mp3")
-    mixed_path = os.path.join(out_audio_dir, "mixed_long.m4a")
+def long_audio_stage(long_data: Dict[str, Any]) -> float:
+    """TTS + mix (ou voz pura). Grava long_data['_audio_path'] e retorna a duração final."""
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    narration_text = str(long_data.get("narration") or "").strip()
+    voice_path, mixed_path = _audio_out_paths(root, long_data, "voice_long.mp3", "mixed_long.m4a")
 
     print("🎙️ Gerando narração LONG (OpenAI TTS)...")
     generate_tts_mp3(
@@ -268,14 +325,39 @@ def run_auto_long() -> Dict[str, Any]:
         pass
 
     long_data["_audio_path"] = mixed_path
+    return duration_sec
+
 
+def long_render_stage(long_data: Dict[str, Any], duration_sec: float) -> Dict[str, Any]:
     print("🎬 Renderizando vídeo LONG (16:9 e 9:16)...")
-    out_16x9 = render_long_video_16x9(long_data, duration_sec=duration_sec)
-    out_9x16 = render_long_video_9x16(long_data, duration_sec=duration_sec)
+    outs = render_long_videos(long_data, duration_sec=duration_sec)
+    out_16x9 = outs["16x9"]
+    out_9x16 = outs["9x16"]
 
     print("✅ LONG finalizado!")
     print(f"📄 16:9: {out_16x9}")
     print(f"📄 9:16: {out_9x16}")
 
-    return {"video_16x9": out_16x9, "video_9x16": out_9x16, "audio": mixed_path}
+    return {"video_16x9": out_16x9, "video_9x16": out_9x16, "audio": long_data["_audio_path"]}
+
 
+def run_auto_long() -> Dict[str, Any]:
+    """
+    Pipeline LONG automático:
+    - Roteiro LONG (JSON)
+    - Em paralelo: legendas extraídas da narração -> visual plan (imagens/motion)
+                   e TTS + mix (ducking)
+    - Render 16:9 e 9:16 (espera os dois ramos)
+    """
+    print("▶ Gerando LONG em modo automático...")
+    graph = RunGraph()
+    graph.add("roteiro", long_generate_script)
+    graph.add("audio", long_audio_stage, "roteiro")
+    graph.add("legendas", long_subtitle_stage, "roteiro")
+    graph.add("visual", long_visual_stage, "legendas")
+    graph.add("render", lambda data, dur, src: long_render_stage(_with_audio(data, src), dur), "visual", "audio", "roteiro")
+    res = graph.run()
+    print(res.summary("LONG"))
+    print_run_reports(Path(_project_root()))
+    release_pins()
+    return res["render"]
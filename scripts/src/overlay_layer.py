@@ -0,0 +1,160 @@
+# scripts/src/overlay_layer.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from .scene_cache import file_sha256
+
+# Camada estática pré-composta (RGBA) por resolução de saída:
+# - vinheta: máscara preta com alpha = 1 - fator da vinheta (equivale a multiplicar o quadro)
+# - watermark: já no tamanho final (12% da largura) e na posição final (canto inferior esquerdo)
+# O render faz um único overlay por frame com essa camada, em vez de vignette + scale2ref + overlay.
+# A chave inclui o hash do arquivo da watermark: trocar a marca invalida a camada.
+#
+# Granulado: textura curta e "loopável" (cinza 128 +- ruído) gerada uma vez por
+# (resolução, fps, intensidade) e misturada com blend=grainmerge, em vez de noise por frame.
+
+OVERLAY_LAYER_VERSION = 1
+GRAIN_TEXTURE_VERSION = 1
+
+WM_WIDTH_FRAC = 0.12
+WM_MARGIN_FRAC = 0.03
+
+
+def overlay_cache_dir(project_root: str) -> str:
+    d = os.path.join(project_root, "output", "cache", "overlays")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def overlay_layer_key(width: int, height: int, wm_path: Optional[str], vignette: Optional[float]) -> str:
+    payload: Dict[str, Any] = {
+        "v": OVERLAY_LAYER_VERSION,
+        "w": int(width),
+        "h": int(height),
+        "wm": file_sha256(wm_path) if wm_path else None,
+        "wm_frac": WM_WIDTH_FRAC,
+        "wm_margin": WM_MARGIN_FRAC,
+        "vignette": vignette,
+    }
+    raw = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _bake_cmd(
+    ffmpeg: str,
+    out_path: str,
+    width: int,
+    height: int,
+    wm_path: Optional[str],
+    vignette: Optional[float],
+) -> List[str]:
+    cmd: List[str] = [
+        ffmpeg, "-y",
+        "-f", "lavfi", "-i", f"color=c=black:s={width}x{height}:d=1",
+        "-f", "lavfi", "-i", f"color=c=white:s={width}x{height}:d=1",
+    ]
+    if vignette is not None:
+        # branco -> vinheta -> negativo = alpha da máscara preta
+        parts = [
+            "[0:v]format=rgba[blk]",
+            f"[1:v]format=gray,vignette=PI/{max(0.01, vignette):.3f},negate[mask]",
+            "[blk][mask]alphamerge[base]",
+        ]
+    else:
+        parts = ["[0:v]format=rgba,colorchannelmixer=aa=0[base]"]
+
+    current = "base"
+    if wm_path:
+        cmd += ["-i", wm_path]
+        wm_w = max(2, int(round(width * WM_WIDTH_FRAC)))
+        parts.append(f"[2:v]format=rgba,scale={wm_w}:-1[wm]")
+        parts.append(
+            f"[{current}][wm]overlay=x=W*{WM_MARGIN_FRAC}:y=H-h-H*{WM_MARGIN_FRAC}:format=auto,format=rgba[layer]"
+        )
+        current = "layer"
+
+    cmd += [
+        "-filter_complex", ";".join(parts),
+        "-map", f"[{current}]",
+        "-frames:v", "1",
+        "-f", "image2", "-c:v", "png",
+        "-loglevel", "error",
+        out_path,
+    ]
+    return cmd
+
+
+def static_overlay_layer(
+    ffmpeg: str,
+    project_root: str,
+    width: int,
+    height: int,
+    *,
+    wm_path: Optional[str],
+    vignette: Optional[float],
+) -> Optional[str]:
+    """
+    Retorna o PNG RGBA da camada estática para (width, height, watermark, vinheta),
+    gerando-o uma vez se necessário. None quando não há nada estático para sobrepor.
+    """
+    if not wm_path and vignette is None:
+        return None
+    cache_dir = overlay_cache_dir(project_root)
+    key = overlay_layer_key(width, height, wm_path, vignette)
+    out_path = os.path.join(cache_dir, f"{key}.png")
+    if os.path.isfile(out_path) and os.path.getsize(out_path) > 0:
+        return out_path
+
+    tmp_path = os.path.join(cache_dir, f"{key}.tmp{os.getpid()}.png")
+    cmd = _bake_cmd(ffmpeg, tmp_path, width, height, wm_path, vignette)
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    if res.returncode != 0 or not os.path.isfile(tmp_path):
+        raise RuntimeError(f"Falha ao gerar camada estática (watermark/vinheta).\nCMD:\n{' '.join(cmd)}\n\nSTDERR:\n{res.stderr}")
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def grain_texture(
+    ffmpeg: str,
+    project_root: str,
+    width: int,
+    height: int,
+    *,
+    fps: int,
+    strength: float,
+    frames: int = 12,
+) -> Optional[str]:
+    """
+    Clipe curto de granulado (yuv420p, croma neutro) para ser lido com -stream_loop -1.
+    None quando strength <= 0.
+    """
+    if strength <= 0:
+        return None
+    frames = max(2, int(frames))
+    cache_dir = overlay_cache_dir(project_root)
+    payload = {"v": GRAIN_TEXTURE_VERSION, "w": int(width), "h": int(height), "fps": int(fps), "s": round(float(strength), 3), "n": frames}
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+    out_path = os.path.join(cache_dir, f"grain_{key}.mkv")
+    if os.path.isfile(out_path) and os.path.getsize(out_path) > 0:
+        return out_path
+
+    tmp_path = os.path.join(cache_dir, f"grain_{key}.tmp{os.getpid()}.mkv")
+    cmd = [
+        ffmpeg, "-y",
+        "-f", "lavfi", "-i", f"color=c=0x808080:s={width}x{height}:r={int(fps)}",
+        "-vf", f"format=yuv420p,noise=c0s={float(strength):.2f}:c0f=t",
+        "-frames:v", str(frames),
+        "-c:v", "ffv1",
+        "-loglevel", "error",
+        tmp_path,
+    ]
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    if res.returncode != 0 or not os.path.isfile(tmp_path):
+        raise RuntimeError(f"Falha ao gerar textura de granulado.\nCMD:\n{' '.join(cmd)}\n\nSTDERR:\n{res.stderr}")
+    os.replace(tmp_path, out_path)
+    return out_path
@@ -0,0 +1,72 @@
+# scripts/src/rate_limit.py
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+# Primitivas de concorrência para chamadas de API (imagens, TTS):
+# - TokenBucket: limita requisições por minuto com rajada curta
+# - SingleFlight: chamadas simultâneas com a mesma chave esperam uma única execução
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """rate_per_sec <= 0 desliga o limite."""
+
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        self.rate = float(rate_per_sec)
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até haver um token. False se o timeout estourar."""
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SingleFlight(Generic[T]):
+    """A primeira chamada com uma chave executa fn; as concorrentes recebem o mesmo resultado (ou erro)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, "Future[T]"] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Retorna (resultado, compartilhado). compartilhado=True se outra chamada fez o trabalho."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+        if not leader:
+            return fut.result(), True
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return fut.result(), False
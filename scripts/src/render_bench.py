@@ -0,0 +1,332 @@
+# scripts/src/render_bench.py
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from .ffmpeg_tools import ensure_ffmpeg
+
+# Benchmark do renderer com assets sintéticos (sem OpenAI, sem arquivos do canal).
+#
+# Matriz: entrada pública (short, long 16:9, long 9:16) x movimento (ken/parallax) x
+# cinematic x watermark x nº de cenas x duração.
+# Cada caso roda em um processo próprio, então o pico de RSS dos ffmpeg filhos
+# é medido por caso, e com AO_RENDER_ROOT em um diretório temporário próprio: imagens,
+# stills com grade, variantes e cache de cenas começam vazios (todo caso é "frio"). Relatório em JSON: velocidade (x tempo real), tempo de parede,
+# pico de RSS e tamanho do arquivo, comparado com um baseline salvo.
+#
+# Uso:
+#   python -m scripts.src.render_bench --quick
+#   python -m scripts.src.render_bench --save-baseline
+#   python -m scripts.src.render_bench --motion parallax --scenes 18 --durations 480
+#   python -m scripts.src.render_bench --entry long_9x16 --quick
+#
+# O modo/engine/perfil de render vêm do ambiente (AO_RENDER_MODE, AO_MOTION_ENGINE,
+# AO_RENDER_PROFILE), então o mesmo benchmark compara os caminhos do renderer.
+
+ENTRIES = ("short", "long_16x9", "long_9x16")
+DEFAULT_SCENES = (7, 12, 18)
+DEFAULT_DURATIONS = (30.0, 120.0, 480.0)
+BASELINE_RELPATH = os.path.join("config", "render_bench_baseline.json")
+
+_DIRECTIONS = ("zoom_in", "zoom_out", "pan_left", "pan_right")
+_ENV_KEYS = ("AO_RENDER_MODE", "AO_MOTION_ENGINE", "AO_RENDER_PROFILE", "AO_SCENE_CACHE", "AO_FFMPEG_MAX_JOBS")
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    entry: str  # short | long_16x9 | long_9x16 (render_short_video, render_long_video_16x9/9x16)
+    motion: str  # ken_burns | parallax
+    cinematic: bool
+    watermark: bool
+    scenes: int
+    duration_sec: float
+
+    @property
+    def case_id(self) -> str:
+        motion = "parallax" if self.motion == "parallax" else "ken"
+        return f"{self.entry}-{motion}-cin{int(self.cinematic)}-wm{int(self.watermark)}-s{self.scenes}-d{int(self.duration_sec)}"
+
+
+@dataclass
+class BenchResult:
+    case_id: str
+    case: Dict[str, Any]
+    ok: bool
+    wall_sec: Optional[float] = None
+    speed_x: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    output_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+def bench_matrix(
+    entries: List[str],
+    motions: List[str],
+    cinematic: List[bool],
+    watermark: List[bool],
+    scenes: List[int],
+    durations: List[float],
+) -> List[BenchCase]:
+    return [
+        BenchCase(entry=e, motion=m, cinematic=c, watermark=w, scenes=int(n), duration_sec=float(d))
+        for e, m, c, w, n, d in itertools.product(entries, motions, cinematic, watermark, scenes, durations)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Assets sintéticos (gerados uma vez em output/bench/assets)
+# ---------------------------------------------------------------------------
+
+def _run_quiet(cmd: List[str]) -> None:
+    res = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    if res.returncode != 0:
+        raise RuntimeError(f"Falha ao gerar asset do benchmark.\nCMD:\n{' '.join(cmd)}\n\nSTDERR:\n{res.stderr}")
+
+
+def _bench_dir(root: str, *parts: str) -> str:
+    d = os.path.join(root, "output", "bench", *parts)
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def synthetic_image(root: str, index: int) -> str:
+    """Imagem 1536x1024 (tamanho das imagens geradas) com padrão e cor diferentes por índice."""
+    path = os.path.join(_bench_dir(root, "assets"), f"scene_{index:02d}.png")
+    if not os.path.isfile(path):
+        _run_quiet([
+            ensure_ffmpeg(), "-y", "-v", "error",
+            "-f", "lavfi", "-i", "testsrc2=s=1536x1024:d=1",
+            "-vf", f"hue=h={(index * 37) % 360}",
+            "-frames:v", "1", path,
+        ])
+    return path
+
+
+def synthetic_audio(root: str, duration_sec: float) -> str:
+    path = os.path.join(_bench_dir(root, "assets"), f"tone_{int(duration_sec)}s.m4a")
+    if not os.path.isfile(path):
+        _run_quiet([
+            ensure_ffmpeg(), "-y", "-v", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={float(duration_sec):.3f}",
+            "-c:a", "aac", "-b:a", "128k", path,
+        ])
+    return path
+
+
+def synthetic_watermark(root: str) -> str:
+    path = os.path.join(_bench_dir(root, "assets"), "watermark.png")
+    if not os.path.isfile(path):
+        _run_quiet([
+            ensure_ffmpeg(), "-y", "-v", "error",
+            "-f", "lavfi", "-i", "color=c=white@0.7:s=400x120,format=rgba",
+            "-frames:v", "1", path,
+        ])
+    return path
+
+
+def synthetic_data(case: BenchCase, root: str, images_dir: str) -> Dict[str, Any]:
+    """Cenas com cópias das imagens sintéticas em images_dir (o grade/variantes nascem ao lado)."""
+    os.makedirs(images_dir, exist_ok=True)
+    scenes: List[Dict[str, Any]] = []
+    for i in range(case.scenes):
+        image = os.path.join(images_dir, f"scene_{i:02d}.png")
+        shutil.copyfile(synthetic_image(root, i), image)
+        scenes.append({
+            "scene_id": i + 1,
+            "_image_path": image,
+            "motion_plan": {
+                "type": case.motion,
+                "direction": _DIRECTIONS[i % len(_DIRECTIONS)],
+                "intensity": "medium",
+            },
+            "subtitle_chunks": [f"Cena {i + 1} do benchmark", "legenda de teste"],
+        })
+    return {
+        "title": f"Benchmark {case.case_id}",
+        "scenes": scenes,
+        "_audio_path": synthetic_audio(root, case.duration_sec),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def _children_peak_rss_mb() -> Optional[float]:
+    try:
+        import resource  # type: ignore  # não existe no Windows
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux: KiB; macOS: bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _bench_root() -> str:
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def _entry_point(entry: str):
+    from . import renderer
+
+    return {
+        "short": renderer.render_short_video,
+        "long_16x9": renderer.render_long_video_16x9,
+        "long_9x16": renderer.render_long_video_9x16,
+    }[entry]
+
+
+def run_case(case: BenchCase) -> BenchResult:
+    """Roda UM caso neste processo (chamado pelo worker; ver run_bench)."""
+    root = _bench_root()
+    os.environ["AO_CINEMATIC_ENABLED"] = "1" if case.cinematic else "0"
+    os.environ["AO_PARALLAX_ENABLED"] = "1" if case.motion == "parallax" else "0"
+    os.environ["AO_WATERMARK_ENABLED"] = "1" if case.watermark else "0"
+    if case.watermark:
+        os.environ["AO_WATERMARK_PATH"] = synthetic_watermark(root)
+
+    render_fn = _entry_point(case.entry)
+    case_root = tempfile.mkdtemp(prefix=f"ao_bench_{case.case_id}_")
+    os.environ["AO_RENDER_ROOT"] = case_root
+    try:
+        data = synthetic_data(case, root, os.path.join(case_root, "output", "images"))
+        t0 = time.perf_counter()
+        out_path = render_fn(data, case.duration_sec)
+        wall = time.perf_counter() - t0
+        return BenchResult(
+            case_id=case.case_id,
+            case=asdict(case),
+            ok=True,
+            wall_sec=round(wall, 3),
+            speed_x=round(case.duration_sec / wall, 3) if wall > 0 else None,
+            peak_rss_mb=_children_peak_rss_mb(),
+            output_bytes=os.path.getsize(out_path) if os.path.isfile(out_path) else None,
+        )
+    finally:
+        shutil.rmtree(case_root, ignore_errors=True)
+
+
+def _spawn_case(case: BenchCase) -> BenchResult:
+    """Processo novo por caso: RSS isolado e nenhum estado (memo/cache) herdado."""
+    cmd = [sys.executable, "-m", "scripts.src.render_bench", "--worker", json.dumps(asdict(case))]
+    res = subprocess.run(cmd, cwd=_bench_root(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    lines = [ln for ln in res.stdout.splitlines() if ln.startswith("{")]
+    if res.returncode != 0 or not lines:
+        tail = "\n".join(res.stderr.strip().splitlines()[-20:])
+        return BenchResult(case_id=case.case_id, case=asdict(case), ok=False, error=tail or f"código {res.returncode}")
+    return BenchResult(**json.loads(lines[-1]))
+
+
+def run_bench(cases: List[BenchCase]) -> Dict[str, Any]:
+    results: List[BenchResult] = []
+    for i, case in enumerate(cases):
+        print(f"🏁 [{i + 1}/{len(cases)}] {case.case_id}")
+        r = _spawn_case(case)
+        if r.ok:
+            print(f"   {r.wall_sec:.1f}s | {r.speed_x:.2f}x tempo real | RSS {r.peak_rss_mb or 0:.0f} MB | {(r.output_bytes or 0) / 1e6:.1f} MB")
+        else:
+            print(f"   ❌ falhou: {(r.error or '').splitlines()[-1:]}")
+        results.append(r)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "env": {k: os.getenv(k) for k in _ENV_KEYS if os.getenv(k) is not None},
+        "results": [asdict(r) for r in results],
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressões de velocidade/memória acima da tolerância (fração) em relação ao baseline."""
+    base = {r["case_id"]: r for r in baseline.get("results", []) if r.get("ok")}
+    regressions: List[str] = []
+    for r in report.get("results", []):
+        b = base.get(r["case_id"])
+        if not b or not r.get("ok"):
+            continue
+        if b.get("speed_x") and r.get("speed_x") and r["speed_x"] < b["speed_x"] * (1.0 - tolerance):
+            regressions.append(f"{r['case_id']}: velocidade {r['speed_x']:.2f}x < baseline {b['speed_x']:.2f}x")
+        if b.get("peak_rss_mb") and r.get("peak_rss_mb") and r["peak_rss_mb"] > b["peak_rss_mb"] * (1.0 + tolerance):
+            regressions.append(f"{r['case_id']}: RSS {r['peak_rss_mb']:.0f} MB > baseline {b['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def _csv(value: str, cast=str) -> List[Any]:
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def _bools(value: str) -> List[bool]:
+    return [v in ("1", "true", "on", "yes") for v in _csv(value.lower())]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do renderer com assets sintéticos")
+    parser.add_argument("--quick", action="store_true", help="só 7 cenas / 30 s (smoke)")
+    parser.add_argument("--entry", default=",".join(ENTRIES), help="short,long_16x9,long_9x16")
+    parser.add_argument("--motion", default="ken_burns,parallax")
+    parser.add_argument("--cinematic", default="0,1")
+    parser.add_argument("--watermark", default="0,1")
+    parser.add_argument("--scenes", default=",".join(str(n) for n in DEFAULT_SCENES))
+    parser.add_argument("--durations", default=",".join(str(int(d)) for d in DEFAULT_DURATIONS))
+    parser.add_argument("--out", default=None, help="relatório JSON (padrão output/bench/report.json)")
+    parser.add_argument("--baseline", default=None, help=f"baseline para comparar (padrão {BASELINE_RELPATH})")
+    parser.add_argument("--save-baseline", action="store_true", help="grava este relatório como baseline")
+    parser.add_argument("--tolerance", type=float, default=float(os.getenv("AO_BENCH_TOLERANCE", "0.10")))
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_case(BenchCase(**json.loads(args.worker)))
+        print(json.dumps(asdict(result)))
+        return 0
+
+    root = _bench_root()
+    entries = _csv(args.entry)
+    unknown = [e for e in entries if e not in ENTRIES]
+    if unknown:
+        parser.error(f"--entry inválida: {', '.join(unknown)} (use {', '.join(ENTRIES)})")
+    scenes = [7] if args.quick else _csv(args.scenes, int)
+    durations = [30.0] if args.quick else _csv(args.durations, float)
+    cases = bench_matrix(entries, _csv(args.motion), _bools(args.cinematic), _bools(args.watermark), scenes, durations)
+
+    report = run_bench(cases)
+    out_path = args.out or os.path.join(_bench_dir(root), "report.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 Relatório: {out_path}")
+
+    baseline_path = args.baseline or os.path.join(root, BASELINE_RELPATH)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📌 Baseline salvo: {baseline_path}")
+    elif os.path.isfile(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ Regressões (tolerância {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"   - {line}")
+            return 1
+        print(f"✅ Sem regressões em relação ao baseline (tolerância {args.tolerance:.0%})")
+
+    return 0 if all(r["ok"] for r in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,495 @@
+# scripts/src/render_farm.py
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from .ffmpeg_tools import ensure_ffmpeg
+from .file_lock import file_lock
+from .render_segments import (
+    SegmentJob,
+    _run_segment,
+    _segment_threads,
+    build_motion_clip_cmd,
+    composite_clips,
+    motion_clip_key,
+    plan_segment_jobs,
+)
+from .renderer import _env_float, _project_root
+from .scene_cache import commit_clip, file_sha256, get_cached_clip, scene_cache_dir, scene_clip_path, tmp_clip_path
+
+# Render distribuído por diretório compartilhado (AO_RENDER_MODE=farm).
+#
+# O coordenador (o processo do render) divide o vídeo nos mesmos clipes de movimento do
+# cache de cenas, publica só os que faltam e espera. Workers em qualquer nó que enxergue
+# o diretório (SMB/NFS, ou uma pasta local para teste) pegam jobs, renderizam e devolvem
+# o clipe. No fim o coordenador guarda os clipes no cache de cenas e faz o composite
+# (efeitos + watermark + legendas + áudio) uma única vez.
+#
+# Layout de uma rodada (<AO_FARM_DIR>/<run_id>/):
+#   run.json              metadados; a rodada só fica visível para workers depois dele
+#   assets/<sha>.<ext>    imagens das cenas (o worker não precisa do projeto)
+#   jobs/<id>.json        comando ffmpeg com {ffmpeg} {image} {out} {threads}
+#   leases/<id>.json      lease exclusivo (O_EXCL) renovado por heartbeat
+#   clips/<id>.mp4        clipe devolvido (gravação atômica)
+#   done/<id>.json        marcador de conclusão
+#   failed/<id>.<n>.json  uma tentativa que falhou ou cujo lease expirou
+#
+# Worker morto = lease não renovado: qualquer participante move o lease expirado para
+# failed/ e o job volta para a fila, até AO_FARM_MAX_ATTEMPTS. Renovar, soltar e retomar
+# um lease acontecem sob file_lock (leases/<id>.json.lock), então o heartbeat nunca
+# regrava um lease que outro participante já retomou ou que outro worker pegou depois. Os prazos usam o relógio
+# de cada máquina (mantenha os nós com NTP).
+#
+# Env:
+#   AO_FARM_DIR                diretório compartilhado (padrão output/farm)
+#   AO_FARM_LEASE_SEC=60       validade do lease (heartbeat a cada 1/3)
+#   AO_FARM_MAX_ATTEMPTS=3
+#   AO_FARM_LOCAL_WORKERS=1    workers dentro do coordenador (0 = só workers remotos)
+#   AO_FARM_TIMEOUT_SEC=0      0 = espera indefinidamente
+#   AO_FARM_POLL_SEC=1
+#   AO_FARM_KEEP=0             1 mantém a rodada no diretório ao final
+#
+# Worker em outro nó:
+#   python -m scripts.src.render_farm worker --farm Z:\farm --jobs 2
+
+def farm_root() -> str:
+    d = (os.getenv("AO_FARM_DIR") or "").strip() or os.path.join(_project_root(), "output", "farm")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except Exception:
+        return default
+
+
+def _lease_sec() -> float:
+    return max(5.0, _env_float("AO_FARM_LEASE_SEC", 60.0))
+
+
+def _max_attempts() -> int:
+    return max(1, _env_int("AO_FARM_MAX_ATTEMPTS", 3))
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _write_json_atomic(path: str, payload: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp{uuid.uuid4().hex[:8]}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FarmRun:
+    """Uma rodada de jobs no diretório compartilhado."""
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self.run_id = os.path.basename(run_dir)
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.run_dir, *parts)
+
+    @classmethod
+    def create(cls, root: str) -> "FarmRun":
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        run = cls(os.path.join(root, run_id))
+        for sub in ("assets", "jobs", "leases", "clips", "done", "failed"):
+            os.makedirs(run.path(sub), exist_ok=True)
+        return run
+
+    def open(self, n_jobs: int, label: str) -> None:
+        _write_json_atomic(
+            self.path("run.json"),
+            {"label": label, "jobs": n_jobs, "coordinator": _worker_id(), "created_at": time.time()},
+        )
+
+    def is_open(self) -> bool:
+        return os.path.isfile(self.path("run.json"))
+
+    def close(self) -> None:
+        if os.getenv("AO_FARM_KEEP", "0") == "1":
+            return
+        # run.json primeiro: workers param de pegar jobs antes de a pasta sumir
+        try:
+            os.remove(self.path("run.json"))
+        except OSError:
+            pass
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    # ===== estado dos jobs =====
+    def job_ids(self) -> List[str]:
+        return sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(self.path("jobs", "*.json")))
+
+    def is_done(self, job_id: str) -> bool:
+        return os.path.isfile(self.path("done", f"{job_id}.json"))
+
+    def failures(self, job_id: str) -> List[str]:
+        return sorted(glob.glob(self.path("failed", f"{job_id}.*.json")))
+
+    def attempts(self, job_id: str) -> int:
+        return len(self.failures(job_id))
+
+    def clip_path(self, job_id: str) -> str:
+        return self.path("clips", f"{job_id}.mp4")
+
+    def publish_asset(self, image_path: str) -> str:
+        """Copia a imagem para assets/ (endereçada pelo conteúdo). Retorna o caminho relativo."""
+        ext = os.path.splitext(image_path)[1].lower() or ".png"
+        rel = os.path.join("assets", f"{file_sha256(image_path)}{ext}")
+        dst = self.path(rel)
+        if not os.path.isfile(dst):
+            tmp = f"{dst}.tmp{uuid.uuid4().hex[:8]}"
+            shutil.copyfile(image_path, tmp)
+            os.replace(tmp, dst)
+        return rel
+
+    def publish_job(self, job_id: str, argv: List[str], image_rel: str, *, frames: int, label: str) -> None:
+        _write_json_atomic(
+            self.path("jobs", f"{job_id}.json"),
+            {"id": job_id, "argv": argv, "image": image_rel, "frames": frames, "label": label},
+        )
+
+    # ===== leases =====
+    def try_lease(self, job_id: str, worker: str) -> Optional[str]:
+        """Lease exclusivo via O_EXCL. Retorna o token ou None se outro worker já pegou."""
+        token = uuid.uuid4().hex
+        lease = self.path("leases", f"{job_id}.json")
+        try:
+            fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"worker": worker, "token": token, "expires_at": time.time() + _lease_sec()}, f)
+        return token
+
+    def _lease_lock(self, lease: str):
+        return file_lock(lease, timeout_sec=_lease_sec())
+
+    def renew_lease(self, job_id: str, token: str) -> bool:
+        lease = self.path("leases", f"{job_id}.json")
+        with self._lease_lock(lease):
+            cur = _read_json(lease)
+            if not cur or cur.get("token") != token:
+                return False  # expirou e foi retomado por outro participante
+            _write_json_atomic(lease, dict(cur, expires_at=time.time() + _lease_sec()))
+            return True
+
+    def release_lease(self, job_id: str, token: str) -> None:
+        lease = self.path("leases", f"{job_id}.json")
+        with self._lease_lock(lease):
+            cur = _read_json(lease)
+            if cur and cur.get("token") == token:
+                try:
+                    os.remove(lease)
+                except OSError:
+                    pass
+
+    def record_failure(self, job_id: str, payload: Dict[str, Any]) -> None:
+        _write_json_atomic(self.path("failed", f"{job_id}.{uuid.uuid4().hex[:8]}.json"), payload)
+
+    def reclaim_expired(self) -> int:
+        """Devolve para a fila os jobs cujo worker parou de renovar o lease."""
+        now = time.time()
+        reclaimed = 0
+        for lease in glob.glob(self.path("leases", "*.json")):
+            cur = _read_json(lease)
+            if cur is None or float(cur.get("expires_at", 0)) > now:
+                continue
+            job_id = os.path.splitext(os.path.basename(lease))[0]
+            dst = self.path("failed", f"{job_id}.{uuid.uuid4().hex[:8]}.json")
+            with self._lease_lock(lease):
+                cur = _read_json(lease)  # pode ter sido renovado enquanto esperávamos o lock
+                if cur is None or float(cur.get("expires_at", 0)) > time.time():
+                    continue
+                try:
+                    os.rename(lease, dst)
+                except OSError:
+                    continue
+            _write_json_atomic(dst, dict(cur, error="lease expirado (worker parou de responder)"))
+            reclaimed += 1
+        return reclaimed
+
+
+def open_runs(root: str) -> List[FarmRun]:
+    return [FarmRun(os.path.dirname(p)) for p in sorted(glob.glob(os.path.join(root, "*", "run.json")))]
+
+
+# ===== worker =====
+def _materialize_cmd(run: FarmRun, spec: Dict[str, Any], out_path: str, threads: int) -> List[str]:
+    values = {
+        "{ffmpeg}": ensure_ffmpeg(),
+        "{image}": run.path(spec["image"]),
+        "{out}": out_path,
+        "{threads}": str(threads),
+    }
+    return [values.get(a, a) for a in spec["argv"]]
+
+
+def _heartbeat(run: FarmRun, job_id: str, token: str, stop: threading.Event) -> None:
+    while not stop.wait(_lease_sec() / 3.0):
+        if not run.renew_lease(job_id, token):
+            return
+
+
+def run_leased_job(run: FarmRun, job_id: str, token: str, threads: int, worker: str) -> bool:
+    """Renderiza um job já com lease. True se o clipe foi devolvido."""
+    spec = _read_json(run.path("jobs", f"{job_id}.json"))
+    if spec is None:
+        run.release_lease(job_id, token)
+        return False
+
+    stop = threading.Event()
+    hb = threading.Thread(target=_heartbeat, args=(run, job_id, token, stop), daemon=True)
+    hb.start()
+    final = run.clip_path(job_id)
+    tmp = f"{os.path.splitext(final)[0]}.tmp{uuid.uuid4().hex[:8]}.mp4"
+    t0 = time.time()
+    try:
+        _run_segment(_materialize_cmd(run, spec, tmp, threads))
+        os.replace(tmp, final)
+        _write_json_atomic(
+            run.path("done", f"{job_id}.json"),
+            {"worker": worker, "sec": round(time.time() - t0, 3), "finished_at": time.time()},
+        )
+        return True
+    except Exception as e:
+        # qualquer falha conta como tentativa (senão o job voltaria para a fila para sempre)
+        if run.is_open():
+            run.record_failure(job_id, {"worker": worker, "error": f"{type(e).__name__}: {e}"[-4000:]})
+        return False
+    finally:
+        stop.set()
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        run.release_lease(job_id, token)
+
+
+def work_once(root: str, *, threads: int, only_run: Optional[str] = None) -> bool:
+    """Pega e renderiza um job pendente de qualquer rodada aberta. False se não havia nada."""
+    worker = _worker_id()
+    max_attempts = _max_attempts()
+    for run in open_runs(root):
+        if only_run and run.run_id != only_run:
+            continue
+        run.reclaim_expired()
+        for job_id in run.job_ids():
+            if run.is_done(job_id) or run.attempts(job_id) >= max_attempts:
+                continue
+            token = run.try_lease(job_id, worker)
+            if token is None:
+                continue
+            if run.is_done(job_id):  # concluído entre a checagem e o lease
+                run.release_lease(job_id, token)
+                continue
+            print(f"🧱 Worker {worker}: {run.run_id}/{job_id[:12]}")
+            run_leased_job(run, job_id, token, threads, worker)
+            return True
+    return False
+
+
+def worker_loop(
+    root: str,
+    *,
+    jobs: int = 1,
+    once: bool = False,
+    stop: Optional[threading.Event] = None,
+    only_run: Optional[str] = None,
+) -> None:
+    """N threads, cada uma supervisionando um ffmpeg por vez. once=True sai quando a fila esvazia."""
+    stop = stop or threading.Event()
+    jobs = max(1, int(jobs))
+    threads = _segment_threads(jobs)
+    poll = max(0.1, _env_float("AO_FARM_POLL_SEC", 1.0))
+
+    def _loop() -> None:
+        while not stop.is_set():
+            try:
+                did = work_once(root, threads=threads, only_run=only_run)
+            except Exception as e:  # rodada removida no meio, disco indisponível...
+                print(f"⚠️ Worker: {e}")
+                did = False
+            if not did:
+                if once:
+                    return
+                stop.wait(poll)
+
+    pool = [threading.Thread(target=_loop, daemon=True) for _ in range(jobs)]
+    for t in pool:
+        t.start()
+    try:
+        for t in pool:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+# ===== coordenador =====
+def _cmd_template(job: SegmentJob, **kwargs: Any) -> List[str]:
+    """Comando do clipe de movimento com caminhos/threads trocados por placeholders do worker."""
+    cmd = build_motion_clip_cmd(replace(job, image_path="{image}"), out_path="{out}", threads=1, **kwargs)
+    cmd[0] = "{ffmpeg}"
+    i = cmd.index("-threads")
+    cmd[i + 1] = "{threads}"
+    return cmd
+
+
+def _wait_for_run(run: FarmRun, job_ids: List[str], label: str) -> None:
+    timeout = _env_float("AO_FARM_TIMEOUT_SEC", 0.0)
+    poll = max(0.1, _env_float("AO_FARM_POLL_SEC", 1.0))
+    max_attempts = _max_attempts()
+    t0 = time.time()
+    last_done = -1
+    last_notice = t0
+    while True:
+        reclaimed = run.reclaim_expired()
+        if reclaimed:
+            print(f"⚠️ {label}: {reclaimed} lease(s) expirado(s), jobs voltaram para a fila")
+        done = sum(1 for j in job_ids if run.is_done(j))
+        if done != last_done:
+            print(f"⏳ {label}: farm {done}/{len(job_ids)} clipes")
+            last_done = done
+        if done == len(job_ids):
+            return
+        for j in job_ids:
+            if not run.is_done(j) and run.attempts(j) >= max_attempts:
+                last = _read_json(run.failures(j)[-1]) or {}
+                raise RuntimeError(
+                    f"Job {j[:12]} da farm falhou {max_attempts}x (rodada {run.run_id}).\n"
+                    f"Último erro ({last.get('worker', '?')}): {last.get('error', '?')}"
+                )
+        now = time.time()
+        if timeout > 0 and now - t0 > timeout:
+            raise RuntimeError(f"Farm sem concluir em {timeout:.0f}s ({done}/{len(job_ids)}). Rodada: {run.run_dir}")
+        if now - last_notice > 30:
+            leased = len(glob.glob(run.path("leases", "*.json")))
+            print(f"⏳ {label}: aguardando workers ({leased} jobs em andamento) em {run.run_dir}")
+            last_notice = now
+        time.sleep(poll)
+
+
+def render_scene_farm(
+    scenes: List[Dict[str, Any]],
+    image_paths: List[str],
+    *,
+    audio_path: str,
+    wm_path: Optional[str],
+    ass_arg: str,
+    duration_sec: float,
+    width: int,
+    height: int,
+    fps: int,
+    parallax_enabled: bool,
+    out_path: str,
+    label: str,
+    reframe: str = "crop",
+) -> str:
+    """
+    Como render_scene_segments com cache de cenas, mas os clipes que faltam são renderizados
+    por workers da farm. Concat + efeitos + áudio ficam no coordenador (composite_clips).
+    """
+    seg_dir = os.path.splitext(out_path)[0] + "_segments"
+    jobs = plan_segment_jobs(scenes, image_paths, duration_sec=duration_sec, fps=fps, seg_dir=seg_dir)
+    geometry = dict(width=width, height=height, fps=fps, parallax_enabled=parallax_enabled, reframe=reframe)
+
+    cache_dir = scene_cache_dir(_project_root())
+    keys = [motion_clip_key(job, **geometry) for job in jobs]
+    missing: Dict[str, SegmentJob] = {}
+    for key, job in zip(keys, jobs):
+        if not get_cached_clip(cache_dir, key) and key not in missing:
+            missing[key] = job
+    print(f"🗃️ {label}: cache de cenas {len(jobs) - len(missing)}/{len(jobs)} reaproveitadas | {len(missing)} para a farm")
+
+    if missing:
+        run = FarmRun.create(farm_root())
+        stop = threading.Event()
+        local: Optional[threading.Thread] = None
+        try:
+            for key, job in missing.items():
+                image_rel = run.publish_asset(job.image_path)
+                run.publish_job(key, _cmd_template(job, **geometry), image_rel, frames=job.frames, label=label)
+            run.open(len(missing), label)
+            print(f"🧱 {label}: {len(missing)} jobs publicados em {run.run_dir}")
+
+            n_local = max(0, _env_int("AO_FARM_LOCAL_WORKERS", 1))
+            if n_local:
+                local = threading.Thread(
+                    target=worker_loop,
+                    args=(os.path.dirname(run.run_dir),),
+                    kwargs=dict(jobs=n_local, stop=stop, only_run=run.run_id),
+                    daemon=True,
+                )
+                local.start()
+
+            _wait_for_run(run, list(missing), label)
+
+            for key in missing:
+                final = scene_clip_path(cache_dir, key)
+                tmp = tmp_clip_path(final)
+                shutil.copyfile(run.clip_path(key), tmp)
+                commit_clip(tmp, final)
+        finally:
+            stop.set()
+            if local is not None:
+                local.join(timeout=5)
+            run.close()
+
+    return composite_clips(
+        [scene_clip_path(cache_dir, k) for k in keys],
+        audio_path=audio_path,
+        wm_path=wm_path,
+        ass_arg=ass_arg,
+        out_path=out_path,
+        duration_sec=duration_sec,
+        width=width,
+        height=height,
+        fps=fps,
+        label=label,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(prog="render_farm", description="Worker da farm de render (AO_RENDER_MODE=farm)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("worker", help="Pega jobs do diretório compartilhado e renderiza")
+    w.add_argument("--farm", default=None, help="Diretório compartilhado (padrão: AO_FARM_DIR ou output/farm)")
+    w.add_argument("--jobs", type=int, default=1, help="ffmpeg simultâneos neste nó")
+    w.add_argument("--once", action="store_true", help="Sai quando não houver jobs pendentes")
+    args = p.parse_args(argv)
+
+    root = args.farm or farm_root()
+    os.makedirs(root, exist_ok=True)
+    ensure_ffmpeg()
+    print(f"🏁 Worker da farm em {root} ({args.jobs} jobs simultâneos). Ctrl+C para sair.")
+    worker_loop(root, jobs=args.jobs, once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
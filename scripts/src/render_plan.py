@@ -0,0 +1,232 @@
+# scripts/src/render_plan.py
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .renderer import (
+    RenderTarget,
+    _RenderInputs,
+    _cinematic_enabled,
+    _env_float,
+    _scene_frame_counts,
+    _scene_image_paths,
+    _scene_runs,
+)
+
+# Planejador de custo do render.
+#
+# Antes de lançar o ffmpeg, o grafo vira um objeto (segmentos x targets + pós-processamento)
+# e o custo é estimado em "pixel-work": pixels por frame x peso de cada etapa x frames.
+# Com orçamento de tempo (AO_RENDER_BUDGET_SEC), efeitos caros são rebaixados até caber:
+#   1) blur do parallax em meia resolução, depois em 1/4
+#   2) parallax -> ken burns, começando pelos segmentos mais longos
+# As decisões voltam para o motion_plan das cenas (type / _blur_scale), então
+# todos os motores (grafo, segmentos, cache) respeitam o mesmo plano.
+#
+# Env:
+#   AO_RENDER_BUDGET_SEC=0      0 = sem orçamento (só estima e loga)
+#   AO_RENDER_MPX_PER_SEC=0     vazão da máquina em Mpx-work/s; 0 = 25 x núcleos
+#                               (calibre com python -m scripts.src.render_bench)
+
+# Pesos relativos por pixel de saída, por frame
+W_ZOOMPAN = 1.0
+W_PARALLAX_EXTRA = 1.3  # crop animado do BG + overlay RGBA do FG
+W_NUMPY_RESAMPLE = 2.0
+W_GRAIN = 0.5
+W_OVERLAY = 0.5
+W_SUBS = 0.1
+W_FORMAT = 0.3
+# Pesos por pixel, uma vez por segmento (entrada de frame único)
+W_BLUR_ONCE = 4.0
+W_REFRAME_ONCE = 1.0
+
+_ENCODER_WEIGHTS = {
+    "ultrafast": 0.6,
+    "superfast": 0.8,
+    "veryfast": 1.2,
+    "faster": 1.6,
+    "fast": 2.0,
+    "medium": 3.0,
+    "slow": 5.0,
+}
+
+_BLUR_STEPS = (0.5, 0.25)
+
+
+@dataclass
+class PlanSegment:
+    index: int
+    image_path: str
+    frames: int
+    motion: str  # ken | parallax
+    scene_indices: List[int]
+    blur_scale: float = 1.0
+
+
+@dataclass
+class PlanTarget:
+    name: str
+    width: int
+    height: int
+    reframe: str
+    encoder_weight: float
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+@dataclass
+class RenderPlan:
+    engine: str
+    fps: int
+    duration_sec: float
+    frame_fraction: float  # < 1 quando o perfil draft renderiza só uma janela
+    targets: List[PlanTarget]
+    segments: List[PlanSegment]
+    grain: bool
+    overlay: bool
+    budget_sec: Optional[float] = None
+    mpx_per_sec: float = 1.0
+    downgrades: List[str] = field(default_factory=list)
+
+    def per_frame_weight(self, seg: PlanSegment) -> float:
+        w = W_NUMPY_RESAMPLE if self.engine == "numpy" else W_ZOOMPAN
+        if seg.motion == "parallax":
+            w += W_PARALLAX_EXTRA
+        w += W_FORMAT + W_SUBS
+        if self.grain:
+            w += W_GRAIN
+        if self.overlay:
+            w += W_OVERLAY
+        return w
+
+    def pixel_work(self) -> float:
+        """Pixel-work total (unidades de pixel x peso) de todas as targets."""
+        total = 0.0
+        for t in self.targets:
+            for seg in self.segments:
+                frames = seg.frames * self.frame_fraction
+                total += frames * t.pixels * (self.per_frame_weight(seg) + t.encoder_weight)
+                once = W_REFRAME_ONCE
+                if seg.motion == "parallax":
+                    once += W_BLUR_ONCE * seg.blur_scale * seg.blur_scale
+                total += t.pixels * once
+        return total
+
+    def predicted_sec(self) -> float:
+        return self.pixel_work() / (self.mpx_per_sec * 1e6)
+
+    def parallax_count(self) -> int:
+        return sum(1 for s in self.segments if s.motion == "parallax")
+
+    def fit_budget(self) -> None:
+        """Rebaixa efeitos, do mais barato visualmente ao mais caro, até caber no orçamento."""
+        if not self.budget_sec or self.predicted_sec() <= self.budget_sec:
+            return
+        parallax = [s for s in self.segments if s.motion == "parallax"]
+        for scale in _BLUR_STEPS:
+            if not parallax or self.predicted_sec() <= self.budget_sec:
+                return
+            for s in parallax:
+                s.blur_scale = scale
+            self.downgrades.append(f"blur do parallax em {scale:g}x da resolução ({len(parallax)} segmentos)")
+        for s in sorted(parallax, key=lambda s: s.frames, reverse=True):
+            if self.predicted_sec() <= self.budget_sec:
+                return
+            s.motion = "ken"
+            s.blur_scale = 1.0
+            self.downgrades.append(f"segmento {s.index + 1}: parallax -> ken burns ({s.frames} frames)")
+
+    def apply(self, scenes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Escreve as decisões do plano no motion_plan das cenas (cópias; o roteiro não muda)."""
+        out = list(scenes)
+        for seg in self.segments:
+            if seg.motion == "parallax" and seg.blur_scale >= 1.0:
+                continue
+            for idx in seg.scene_indices:
+                scene = out[idx] if idx < len(out) else None
+                if not isinstance(scene, dict):
+                    continue
+                motion = dict(scene.get("motion_plan") or {})
+                if seg.motion == "ken" and motion.get("type") == "parallax":
+                    motion["type"] = "ken_burns"
+                    motion.pop("_blur_scale", None)
+                elif seg.motion == "parallax":
+                    motion["_blur_scale"] = seg.blur_scale
+                out[idx] = dict(scene, motion_plan=motion)
+        return out
+
+    def summary(self) -> str:
+        sizes = ", ".join(f"{t.width}x{t.height}" for t in self.targets)
+        budget = f" (orçamento {self.budget_sec:.0f}s)" if self.budget_sec else ""
+        return (
+            f"🧮 Plano de render [{self.engine}]: {len(self.segments)} segmentos "
+            f"({self.parallax_count()} parallax) | {sizes} @ {self.fps} fps | "
+            f"~{self.pixel_work() / 1e9:.1f} Gpx-work | previsto ~{self.predicted_sec():.0f}s{budget}"
+        )
+
+
+def _machine_mpx_per_sec() -> float:
+    v = _env_float("AO_RENDER_MPX_PER_SEC", 0.0)
+    return v if v > 0 else 25.0 * (os.cpu_count() or 1)
+
+
+def _encoder_weight(target: RenderTarget, profile_preset: Optional[str]) -> float:
+    preset = (target.preset or profile_preset or "medium").lower()
+    return _ENCODER_WEIGHTS.get(preset, _ENCODER_WEIGHTS["medium"])
+
+
+def plan_render(
+    inputs: _RenderInputs,
+    targets: List[RenderTarget],
+    duration_sec: float,
+    *,
+    engine: str,
+) -> RenderPlan:
+    """Monta o plano, aplica o orçamento (se houver) e loga o resultado."""
+    image_paths = _scene_image_paths(inputs.scenes, inputs.img_any or "")
+    frame_counts = _scene_frame_counts(len(image_paths), duration_sec, inputs.fps)
+    runs = _scene_runs(inputs.scenes, image_paths, frame_counts)
+
+    parallax_on = inputs.parallax_enabled and engine != "numpy"
+    segments = [
+        PlanSegment(
+            index=i,
+            image_path=run.image_path,
+            frames=run.frames,
+            motion="parallax" if parallax_on and (run.motion or {}).get("type") == "parallax" else "ken",
+            scene_indices=list(run.scene_indices),
+            blur_scale=float((run.motion or {}).get("_blur_scale", 1.0)),
+        )
+        for i, run in enumerate(runs)
+    ]
+    budget = _env_float("AO_RENDER_BUDGET_SEC", 0.0)
+    plan = RenderPlan(
+        engine=engine,
+        fps=inputs.fps,
+        duration_sec=float(duration_sec),
+        frame_fraction=inputs.render_seconds(duration_sec) / max(1e-6, float(duration_sec)),
+        targets=[
+            PlanTarget(t.name, t.width, t.height, t.reframe, _encoder_weight(t, inputs.profile.preset))
+            for t in targets
+        ],
+        segments=segments,
+        grain=_cinematic_enabled(inputs.profile) and _env_float("AO_CINEMATIC_GRAIN", 0.0) > 0,
+        overlay=bool(inputs.wm_path) or _cinematic_enabled(inputs.profile),
+        budget_sec=budget if budget > 0 else None,
+        mpx_per_sec=_machine_mpx_per_sec(),
+    )
+
+    before = plan.predicted_sec()
+    plan.fit_budget()
+    print(plan.summary())
+    if plan.downgrades:
+        print(f"   ↘ rebaixado de ~{before:.0f}s para caber no orçamento:")
+        for d in plan.downgrades:
+            print(f"     - {d}")
+        if plan.budget_sec and plan.predicted_sec() > plan.budget_sec:
+            print("   ⚠️ ainda acima do orçamento sem efeitos caros; renderizando assim mesmo.")
+    return plan
@@ -0,0 +1,98 @@
+# scripts/src/render_profile.py
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Perfis de render:
+# - final: resolução cheia, 25 fps, encoder padrão
+# - draft: revisão rápida de ritmo/legendas (resolução reduzida, preset rápido,
+#          efeitos opcionais e, se quiser, só uma janela de tempo)
+#
+# Env:
+#   AO_RENDER_PROFILE=final|draft
+#   AO_DRAFT_SCALE=0.33        fração da resolução
+#   AO_DRAFT_FPS=15
+#   AO_DRAFT_EFFECTS=0         1 mantém cinematic/parallax no draft
+#   AO_DRAFT_WINDOW_SEC=15     0 = vídeo inteiro
+#   AO_DRAFT_WINDOW_START=0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        v = os.getenv(name)
+        return default if v is None or str(v).strip() == "" else float(str(v).strip())
+    except Exception:
+        return default
+
+
+def _env_bool(name: str, default: str = "0") -> bool:
+    return str(os.getenv(name, default)).strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str = "final"
+    scale: float = 1.0
+    fps: int = 25
+    preset: Optional[str] = None
+    crf: Optional[int] = None
+    effects: bool = True
+    window_start: float = 0.0
+    window_sec: float = 0.0
+
+    @property
+    def is_draft(self) -> bool:
+        return self.name == "draft"
+
+    def scale_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Escala mantendo dimensões pares (exigência do yuv420p)."""
+        if self.scale >= 1.0:
+            return width, height
+        w = max(2, int(round(width * self.scale / 2.0)) * 2)
+        h = max(2, int(round(height * self.scale / 2.0)) * 2)
+        return w, h
+
+    def encoder_args(self) -> List[str]:
+        args: List[str] = []
+        if self.preset:
+            args += ["-preset", self.preset]
+        if self.crf is not None:
+            args += ["-crf", str(self.crf)]
+        return args
+
+    def window(self, duration_sec: float) -> Optional[Tuple[float, float]]:
+        """(início, duração) da janela dentro de duration_sec, ou None para o vídeo inteiro."""
+        if self.window_sec <= 0:
+            return None
+        start = max(0.0, min(float(self.window_start), float(duration_sec)))
+        length = max(0.0, min(float(self.window_sec), float(duration_sec) - start))
+        if length <= 0:
+            return None
+        return start, length
+
+    def out_filename(self, filename: str) -> str:
+        if not self.is_draft:
+            return filename
+        base, ext = os.path.splitext(filename)
+        return f"{base}_draft{ext}"
+
+
+FINAL_PROFILE = RenderProfile()
+
+
+def get_render_profile(name: Optional[str] = None) -> RenderProfile:
+    name = (name or os.getenv("AO_RENDER_PROFILE", "final") or "final").strip().lower()
+    if name != "draft":
+        return FINAL_PROFILE
+    return RenderProfile(
+        name="draft",
+        scale=max(0.1, min(1.0, _env_float("AO_DRAFT_SCALE", 0.33))),
+        fps=max(1, int(_env_float("AO_DRAFT_FPS", 15))),
+        preset="ultrafast",
+        crf=30,
+        effects=_env_bool("AO_DRAFT_EFFECTS", "0"),
+        window_start=_env_float("AO_DRAFT_WINDOW_START", 0.0),
+        window_sec=_env_float("AO_DRAFT_WINDOW_SEC", 0.0),
+    )
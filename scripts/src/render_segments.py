@@ -0,0 +1,469 @@
+# scripts/src/render_segments.py
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .ffmpeg_tools import FFmpegError, ensure_ffmpeg, get_scheduler, run_ffmpeg_with_progress
+from .renderer import (
+    _build_post_chain,
+    _build_scene_chain,
+    _env_float,
+    _project_root,
+    _scene_frame_counts,
+    _post_inputs,
+    _scene_runs,
+    _still_input_args,
+    _video_codec_args,
+)
+from .scene_cache import (
+    commit_clip,
+    get_cached_clip,
+    scene_cache_dir,
+    scene_cache_enabled,
+    scene_clip_key,
+    scene_clip_path,
+    tmp_clip_path,
+)
+
+
+@dataclass
+class SegmentJob:
+    index: int
+    image_path: str
+    motion: Dict[str, Any]
+    start_sec: float
+    frames: int
+    out_path: str
+
+
+def _segment_workers(n_jobs: int) -> int:
+    """Workers paralelos: AO_RENDER_WORKERS ou o limite de jobs do scheduler global."""
+    try:
+        env = int(os.getenv("AO_RENDER_WORKERS", "0") or "0")
+    except Exception:
+        env = 0
+    workers = env if env > 0 else get_scheduler().max_jobs
+    return max(1, min(workers, n_jobs))
+
+
+def _segment_threads(workers: int) -> int:
+    """Threads do encoder por segmento: nunca acima do orçamento por job do scheduler."""
+    return max(1, min(get_scheduler().threads_per_job, (os.cpu_count() or 1) // max(1, workers)))
+
+
+def plan_segment_jobs(
+    scenes: List[Dict[str, Any]],
+    image_paths: List[str],
+    *,
+    duration_sec: float,
+    fps: int,
+    seg_dir: str,
+) -> List[SegmentJob]:
+    """
+    Um job por segmento (cenas consecutivas iguais já agrupadas, ver _scene_runs),
+    com frames alinhados (ver _scene_frame_counts).
+    """
+    frame_counts = _scene_frame_counts(len(image_paths), duration_sec, fps)
+    jobs: List[SegmentJob] = []
+    f0 = 0
+    for idx, run in enumerate(_scene_runs(scenes, image_paths, frame_counts)):
+        jobs.append(
+            SegmentJob(
+                index=idx,
+                image_path=run.image_path,
+                motion=run.motion,
+                start_sec=f0 / float(fps),
+                frames=run.frames,
+                out_path=os.path.join(seg_dir, f"seg_{idx:03d}.mp4"),
+            )
+        )
+        f0 += run.frames
+    return jobs
+
+
+def build_segment_cmd(
+    job: SegmentJob,
+    *,
+    wm_path: Optional[str],
+    ass_arg: str,
+    width: int,
+    height: int,
+    fps: int,
+    parallax_enabled: bool,
+    threads: int,
+    reframe: str = "crop",
+) -> List[str]:
+    """
+    Uma cena = um clipe final (movimento + cinematic + camada estática + ASS).
+    O ASS é queimado com o PTS deslocado para o início da cena no vídeo completo.
+    """
+    cmd: List[str] = [ensure_ffmpeg(), "-y", *_still_input_args(job.image_path)]
+
+    post = _post_inputs(_project_root(), width, height, fps, wm_path, first_idx=1, start_sec=job.start_sec)
+    cmd += post.args
+
+    parts: List[str] = [
+        _build_scene_chain(
+            "0:v", "vscene", job.frames, job.motion,
+            width=width, height=height, fps=fps, tag="0",
+            parallax_enabled=parallax_enabled, reframe=reframe,
+        ),
+        f"[vscene]format=rgba,setpts=PTS-STARTPTS+{job.start_sec:.6f}/TB[vbase]",
+    ]
+    post_parts, vout = _build_post_chain("vbase", post, ass_arg)
+    parts += post_parts
+    parts.append(f"[{vout}]setpts=PTS-STARTPTS[vseg]")
+
+    cmd += [
+        "-filter_complex", ";".join(parts),
+        "-map", "[vseg]",
+        "-frames:v", str(job.frames),
+        "-r", str(fps),
+        "-an",
+        *_video_codec_args(),
+        "-threads", str(threads),
+        "-loglevel", "error",
+        job.out_path,
+    ]
+    return cmd
+
+
+def _motion_clip_codec_args() -> List[str]:
+    """Intermediário de alta qualidade (será re-encodado no composite final)."""
+    crf = os.getenv("AO_SCENE_CACHE_CRF", "14").strip() or "14"
+    return _video_codec_args() + ["-preset", "fast", "-crf", crf]
+
+
+def _motion_effects(motion: Dict[str, Any], parallax_enabled: bool) -> Dict[str, Any]:
+    """Parâmetros de efeito que mudam os pixels do clipe de movimento (entram na chave do cache)."""
+    is_parallax = parallax_enabled and (motion or {}).get("type", "ken_burns") == "parallax"
+    effects: Dict[str, Any] = {"parallax": is_parallax, "codec": _motion_clip_codec_args()}
+    if is_parallax:
+        effects["parallax_hz"] = _env_float("AO_PARALLAX_HZ", 0.22)
+    return effects
+
+
+def motion_clip_key(
+    job: SegmentJob,
+    *,
+    width: int,
+    height: int,
+    fps: int,
+    parallax_enabled: bool,
+    reframe: str,
+) -> str:
+    """Chave do clipe de movimento no cache de cenas (conteúdo + geometria + efeitos)."""
+    return scene_clip_key(
+        image_path=job.image_path,
+        motion=job.motion,
+        width=width,
+        height=height,
+        fps=fps,
+        frames=job.frames,
+        reframe=reframe,
+        effects=_motion_effects(job.motion, parallax_enabled),
+    )
+
+
+def build_motion_clip_cmd(
+    job: SegmentJob,
+    *,
+    out_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    parallax_enabled: bool,
+    threads: int,
+    reframe: str = "crop",
+) -> List[str]:
+    """Só enquadramento + movimento (sem efeitos, watermark ou legendas)."""
+    chain = _build_scene_chain(
+        "0:v", "vscene", job.frames, job.motion,
+        width=width, height=height, fps=fps, tag="0",
+        parallax_enabled=parallax_enabled, reframe=reframe,
+    )
+    return [
+        ensure_ffmpeg(), "-y",
+        *_still_input_args(job.image_path),
+        "-filter_complex", chain + ";[vscene]setpts=PTS-STARTPTS[vseg]",
+        "-map", "[vseg]",
+        "-frames:v", str(job.frames),
+        "-r", str(fps),
+        "-an",
+        *_motion_clip_codec_args(),
+        "-threads", str(threads),
+        "-f", "mp4",
+        "-loglevel", "error",
+        out_path,
+    ]
+
+
+def _run_segment(cmd: List[str]) -> None:
+    # o slot do scheduler limita quantos segmentos rodam de fato ao mesmo tempo,
+    # mesmo com vários renders (ou canais) disputando a máquina
+    with get_scheduler().slot(label="segmento"):
+        res = subprocess.run(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    if res.returncode != 0:
+        raise FFmpegError("FFmpeg falhou no segmento.", cmd=cmd, returncode=res.returncode, stderr_tail=res.stderr)
+
+
+def _concat_escape(path: str) -> str:
+    p = os.path.abspath(path).replace("\\", "/")
+    return p.replace("'", "'\\''")
+
+
+def write_concat_list(paths: List[str], list_path: str) -> str:
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in paths:
+            f.write(f"file '{_concat_escape(p)}'\n")
+    return list_path
+
+
+def concat_and_mux(
+    segment_paths: List[str],
+    *,
+    audio_path: str,
+    out_path: str,
+    duration_sec: float,
+    label: str,
+) -> str:
+    """Concat demuxer em stream copy + mux do áudio (único encode de áudio)."""
+    list_path = write_concat_list(segment_paths, os.path.splitext(out_path)[0] + "_concat.txt")
+    cmd = [
+        ensure_ffmpeg(), "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", audio_path,
+        "-map", "0:v",
+        "-map", "1:a",
+        "-c:v", "copy",
+        "-c:a", "aac",
+        "-shortest",
+        "-movflags", "+faststart",
+        "-loglevel", "error",
+        out_path,
+    ]
+    try:
+        run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label=label + " (concat)")
+    finally:
+        try:
+            os.remove(list_path)
+        except Exception:
+            pass
+    return out_path
+
+
+def composite_clips(
+    clip_paths: List[str],
+    *,
+    audio_path: str,
+    wm_path: Optional[str],
+    ass_arg: str,
+    out_path: str,
+    duration_sec: float,
+    width: int,
+    height: int,
+    fps: int,
+    label: str,
+) -> str:
+    """Concat dos clipes de movimento + cinematic/camada estática/ASS + áudio em um único encode."""
+    list_path = write_concat_list(clip_paths, os.path.splitext(out_path)[0] + "_concat.txt")
+    cmd: List[str] = [ensure_ffmpeg(), "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+    post = _post_inputs(_project_root(), width, height, fps, wm_path, first_idx=1)
+    cmd += post.args
+    cmd += ["-i", audio_path]
+    audio_input_idx = 1 + post.count
+
+    parts: List[str] = ["[0:v]format=rgba[vbase]"]
+    post_parts, vout = _build_post_chain("vbase", post, ass_arg)
+    parts += post_parts
+
+    cmd += [
+        "-filter_complex", ";".join(parts),
+        "-map", f"[{vout}]",
+        "-map", f"{audio_input_idx}:a",
+        "-shortest",
+        *_video_codec_args(),
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+        "-loglevel", "error",
+        out_path,
+    ]
+    try:
+        run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label=label + " (composite)")
+    finally:
+        try:
+            os.remove(list_path)
+        except Exception:
+            pass
+    return out_path
+
+
+def render_cached_scene_clips(
+    jobs: List[SegmentJob],
+    *,
+    width: int,
+    height: int,
+    fps: int,
+    parallax_enabled: bool,
+    reframe: str,
+    label: str,
+) -> List[str]:
+    """
+    Garante um clipe de movimento por cena no cache de cenas.
+    Só encoda cenas cujo conteúdo mudou; cenas idênticas (mesma chave) são encodadas uma vez.
+    """
+    cache_dir = scene_cache_dir(_project_root())
+    clip_paths: List[str] = []
+    missing: Dict[str, SegmentJob] = {}
+    for job in jobs:
+        key = motion_clip_key(
+            job, width=width, height=height, fps=fps,
+            parallax_enabled=parallax_enabled, reframe=reframe,
+        )
+        final = scene_clip_path(cache_dir, key)
+        clip_paths.append(final)
+        if not get_cached_clip(cache_dir, key) and key not in missing:
+            missing[key] = job
+
+    hits = len(jobs) - len(missing)
+    print(f"🗃️ {label}: cache de cenas {hits}/{len(jobs)} reaproveitadas | {len(missing)} para encodar")
+    if not missing:
+        return clip_paths
+
+    workers = _segment_workers(len(missing))
+    threads = _segment_threads(workers)
+
+    def _render_one(key: str, job: SegmentJob) -> None:
+        final = scene_clip_path(cache_dir, key)
+        tmp = tmp_clip_path(final)
+        try:
+            _run_segment(
+                build_motion_clip_cmd(
+                    job, out_path=tmp, width=width, height=height, fps=fps,
+                    parallax_enabled=parallax_enabled, threads=threads, reframe=reframe,
+                )
+            )
+            commit_clip(tmp, final)
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_one, key, job) for key, job in missing.items()]
+        try:
+            for fut in as_completed(futures):
+                fut.result()
+                done += 1
+                print(f"⏳ {label}: cena {done}/{len(missing)}")
+        except Exception:
+            for f in futures:
+                f.cancel()
+            raise
+    return clip_paths
+
+
+def render_scene_segments(
+    scenes: List[Dict[str, Any]],
+    image_paths: List[str],
+    *,
+    audio_path: str,
+    wm_path: Optional[str],
+    ass_arg: str,
+    duration_sec: float,
+    width: int,
+    height: int,
+    fps: int,
+    parallax_enabled: bool,
+    out_path: str,
+    label: str,
+    reframe: str = "crop",
+    cache: Optional[bool] = None,
+) -> str:
+    """
+    Render por segmentos:
+    1) cada cena vira um clipe independente, encodado em paralelo
+    2) concat demuxer em stream copy
+    3) mux do áudio uma única vez
+
+    Com o cache de cenas ativo (AO_SCENE_CACHE=1), os clipes guardam só o
+    movimento e ficam em output/cache/scenes; efeitos, watermark e legendas vão para
+    um composite final. Assim um ajuste de legenda não invalida nenhuma cena.
+    """
+    seg_dir = os.path.splitext(out_path)[0] + "_segments"
+
+    if cache is None:
+        cache = scene_cache_enabled()
+    if cache:
+        jobs = plan_segment_jobs(scenes, image_paths, duration_sec=duration_sec, fps=fps, seg_dir=seg_dir)
+        clips = render_cached_scene_clips(
+            jobs, width=width, height=height, fps=fps,
+            parallax_enabled=parallax_enabled, reframe=reframe, label=label,
+        )
+        return composite_clips(
+            clips,
+            audio_path=audio_path,
+            wm_path=wm_path,
+            ass_arg=ass_arg,
+            out_path=out_path,
+            duration_sec=duration_sec,
+            width=width,
+            height=height,
+            fps=fps,
+            label=label,
+        )
+
+    os.makedirs(seg_dir, exist_ok=True)
+    jobs = plan_segment_jobs(scenes, image_paths, duration_sec=duration_sec, fps=fps, seg_dir=seg_dir)
+    workers = _segment_workers(len(jobs))
+    threads = _segment_threads(workers)
+    print(f"🧱 {label}: {len(jobs)} segmentos | {workers} workers x {threads} threads")
+
+    cmds = [
+        build_segment_cmd(
+            job, wm_path=wm_path, ass_arg=ass_arg, width=width, height=height,
+            fps=fps, parallax_enabled=parallax_enabled, threads=threads, reframe=reframe,
+        )
+        for job in jobs
+    ]
+
+    # Cada worker só supervisiona um processo ffmpeg; o paralelismo real é entre processos.
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_run_segment, cmd): job for job, cmd in zip(jobs, cmds)}
+        try:
+            for fut in as_completed(futures):
+                fut.result()
+                done += 1
+                print(f"⏳ {label}: segmento {done}/{len(jobs)}")
+        except Exception:
+            for f in futures:
+                f.cancel()
+            raise
+
+    concat_and_mux(
+        [j.out_path for j in jobs],
+        audio_path=audio_path,
+        out_path=out_path,
+        duration_sec=duration_sec,
+        label=label,
+    )
+
+    if os.getenv("AO_KEEP_SEGMENTS", "0") != "1":
+        shutil.rmtree(seg_dir, ignore_errors=True)
+    return out_path
@@ -2,17 +2,25 @@ from __future__ import annotations
 
 import os
 import math
+from dataclasses import dataclass, replace
+from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 
 from .ffmpeg_tools import ensure_ffmpeg, run_ffmpeg_with_progress
 from .watermark import validate_watermark
 from .subtitle_timing import build_chunk_timeline
 from .subtitle_ass import write_karaoke_ass, AssStyle
-
-FFMPEG = ensure_ffmpeg()
+from .scene_cache import scene_cache_enabled
+from .overlay_layer import grain_texture, static_overlay_layer
+from .still_grade import grade_stills
+from .render_profile import RenderProfile, get_render_profile
 
 
 def _project_root() -> str:
+    """Raiz de output/ e dos caches do render. AO_RENDER_ROOT troca (ex.: casos isolados do render_bench)."""
+    override = (os.getenv("AO_RENDER_ROOT") or "").strip()
+    if override:
+        return os.path.abspath(override)
     return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 
@@ -44,6 +52,19 @@ def _ff_escape_ass_path_windows(p: str) -> str:
     return p2
 
 
+def _output_tag(data: Dict[str, Any]) -> str:
+    """data['_output_tag'] (ex.: item de um batch) vira sufixo dos arquivos de saída."""
+    tag = data.get("_output_tag") if isinstance(data, dict) else None
+    return "".join(c for c in str(tag or "") if c.isalnum() or c in "-_")
+
+
+def _tagged_filename(filename: str, tag: str) -> str:
+    if not tag:
+        return filename
+    base, ext = os.path.splitext(filename)
+    return f"{base}_{tag}{ext}"
+
+
 def _first_existing_image(scenes: List[Dict[str, Any]]) -> Optional[str]:
     for s in scenes:
         if isinstance(s, dict):
@@ -64,62 +85,528 @@ def _scene_zoom_params(motion: Dict[str, Any]) -> Tuple[float, float]:
         a, b = 1.00, 1.10
     if direction == "zoom_out":
         return b, a
+    if direction in ("pan_left", "pan_right"):
+        # zoom fixo: a folga (b - 1) é o espaço para o pan horizontal
+        return b, b
     return a, b
 
 
-def _build_watermark_chain(input_label: str, wm_input_idx: int) -> Tuple[str, str]:
+def _scene_pan_params(motion: Dict[str, Any]) -> Tuple[float, float]:
     """
-    Watermark canto inferior esquerdo usando entrada de vídeo/PNG (wm_input_idx).
-    Retorna (filter_snippet, out_label)
+    Posição horizontal da janela (0 = borda esquerda, 1 = borda direita) no início e no fim.
+    pan_right: câmera anda para a direita; pan_left: para a esquerda; demais: centro.
     """
-    out = f"{input_label}_wm"
-    # scale2ref para manter proporcional ao vídeo
-    snippet = (
-        f"[{wm_input_idx}:v]format=rgba[wm_rgba];"
-        f"[wm_rgba][{input_label}]scale2ref=w=rw*0.12:h=-1[wm_s][base2];"
-        f"[base2][wm_s]overlay=x=W*0.03:y=H-h-H*0.03:format=auto[{out}]"
-    )
-    return snippet, out
+    direction = (motion or {}).get("direction", "zoom_in")
+    if direction == "pan_right":
+        return 0.0, 1.0
+    if direction == "pan_left":
+        return 1.0, 0.0
+    return 0.5, 0.5
 
 
-def _build_cinematic_stack(input_label: str) -> Tuple[str, str]:
+def _zoompan_xy_exprs(motion: Dict[str, Any], frames: int) -> Tuple[str, str]:
+    x_start, x_end = _scene_pan_params(motion)
+    if x_start == x_end == 0.5:
+        pan_x = "iw/2-(iw/zoom/2)"
+    else:
+        pan_x = f"(iw-iw/zoom)*({x_start}+({x_end}-{x_start})*on/{frames})"
+    pan_y = "ih/2-(ih/zoom/2)"
+    return pan_x, pan_y
+
+
+def _scene_frame_counts(n: int, duration_sec: float, fps: int) -> List[int]:
     """
-    Efeitos cinematográficos opcionais (bem leves).
-    Controlados por AO_CINEMATIC_ENABLED=1
+    Frames por cena alinhados a frame: a soma é exatamente round(duration_sec * fps),
+    sem drift acumulado em relação às legendas.
     """
-    if not _env_bool("AO_CINEMATIC_ENABLED", "0"):
-        return "", input_label
+    n = max(1, n)
+    total_frames = max(n, int(round(float(duration_sec) * fps)))
+    return [
+        max(1, int(round((i + 1) * total_frames / n)) - int(round(i * total_frames / n)))
+        for i in range(n)
+    ]
+
+
+def _cinematic_enabled(profile: Optional[RenderProfile] = None) -> bool:
+    """AO_CINEMATIC_ENABLED=1 (desligado no perfil draft, ver render_profile)."""
+    return _env_bool("AO_CINEMATIC_ENABLED", "0") and (profile or get_render_profile()).effects
 
-    out = f"{input_label}_cine"
-    vignette = _env_float("AO_CINEMATIC_VIGNETTE", 0.25)
+
+def _static_overlay_path(root: str, width: int, height: int, wm_path: Optional[str]) -> Optional[str]:
+    """
+    Camada RGBA pré-composta (vinheta + watermark no tamanho/posição final) para width x height.
+    Gerada uma vez e reaproveitada (ver overlay_layer); None se não há nada estático.
+    """
+    vignette = _env_float("AO_CINEMATIC_VIGNETTE", 0.25) if _cinematic_enabled() else None
+    return static_overlay_layer(ensure_ffmpeg(), root, width, height, wm_path=wm_path, vignette=vignette)
+
+
+def _grain_texture_path(root: str, width: int, height: int, fps: int) -> Optional[str]:
+    """Textura de granulado pré-calculada (AO_CINEMATIC_GRAIN > 0), lida em loop."""
     grain = _env_float("AO_CINEMATIC_GRAIN", 0.0)  # 0 desliga
-    parts = [f"[{input_label}]"]
-    # leve vinheta
-    parts.append(f"vignette=PI/{max(0.01, vignette):.3f}")
-    # leve sharpen
-    parts.append("unsharp=5:5:0.5:5:5:0.0")
-    # granulado opcional
-    if grain > 0:
-        parts.append(f"noise=alls={grain:.2f}:allf=t")
-    parts.append(f"[{out}]")
-    return ",".join(parts), out
+    if grain <= 0 or not _cinematic_enabled():
+        return None
+    frames = int(_env_float("AO_GRAIN_FRAMES", 12))
+    return grain_texture(ensure_ffmpeg(), root, width, height, fps=fps, strength=grain, frames=frames)
 
 
-def _render_video_generic(
-    data: Dict[str, Any],
+@dataclass
+class _PostInputs:
+    """Entradas extras do pós-processamento: camada estática e granulado."""
+    args: List[str]
+    overlay_label: Optional[str] = None
+    grain_label: Optional[str] = None
+
+    @property
+    def count(self) -> int:
+        return (self.overlay_label is not None) + (self.grain_label is not None)
+
+
+def _post_inputs(
+    root: str,
+    width: int,
+    height: int,
+    fps: int,
+    wm_path: Optional[str],
+    first_idx: int,
+    start_sec: float = 0.0,
+) -> _PostInputs:
+    """
+    Argumentos -i da camada estática e do granulado, a partir do índice first_idx.
+    start_sec: PTS inicial do vídeo base (segmentos/janela), para o granulado não ser lido desde 0.
+    """
+    post = _PostInputs(args=[])
+    idx = first_idx
+    overlay_path = _static_overlay_path(root, width, height, wm_path)
+    if overlay_path:
+        post.args += ["-i", overlay_path]
+        post.overlay_label = f"{idx}:v"
+        idx += 1
+    grain_path = _grain_texture_path(root, width, height, fps)
+    if grain_path:
+        if start_sec > 0:
+            post.args += ["-itsoffset", f"{start_sec:.6f}"]
+        post.args += ["-stream_loop", "-1", "-i", grain_path]
+        post.grain_label = f"{idx}:v"
+    return post
+
+
+def _build_reframe_chain(
+    input_label: str,
+    out_label: str,
     *,
-    duration_sec: float,
     width: int,
     height: int,
-    out_dirname: str,
-    out_filename: str,
-    video_type: str,
-    label: str,
+    reframe: str,
+    tag: str,
+) -> str:
+    """
+    Enquadra a imagem fonte em width x height.
+    - crop: preenche e corta o centro (padrão)
+    - blur_pad: imagem inteira sobre fundo desfocado da própria imagem
+    - fit: imagem inteira com barras pretas
+    - pre: a entrada já é uma variante width x height enquadrada (ver image_variants)
+    """
+    if reframe == "pre":
+        return f"[{input_label}]setsar=1[{out_label}]"
+    if reframe == "blur_pad":
+        a, b, bg, fg = f"rf{tag}a", f"rf{tag}b", f"rf{tag}bg", f"rf{tag}fg"
+        return (
+            f"[{input_label}]split=2[{a}][{b}];"
+            f"[{a}]scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height},boxblur=20:2[{bg}];"
+            f"[{b}]scale={width}:{height}:force_original_aspect_ratio=decrease[{fg}];"
+            f"[{bg}][{fg}]overlay=x=(W-w)/2:y=(H-h)/2,setsar=1"
+            f"[{out_label}]"
+        )
+    if reframe == "fit":
+        return (
+            f"[{input_label}]"
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1"
+            f"[{out_label}]"
+        )
+    return (
+        f"[{input_label}]"
+        f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+        f"crop={width}:{height}"
+        f"[{out_label}]"
+    )
+
+
+def _build_ken_chain(
+    input_label: str,
+    out_label: str,
+    frames: int,
+    motion: Dict[str, Any],
+    *,
+    width: int,
+    height: int,
+    fps: int,
+) -> str:
+    """
+    Ken Burns sobre uma entrada já enquadrada em width x height.
+    A entrada é um único frame: o zoompan gera os `frames` quadros da cena a partir dele.
+    """
+    frames = max(1, int(frames))
+    zoom_start, zoom_end = _scene_zoom_params(motion)
+    zoom_expr = f"zoom='{zoom_start}+({zoom_end}-{zoom_start})*on/{frames}'"
+    pan_x, pan_y = _zoompan_xy_exprs(motion, frames)
+    return (
+        f"[{input_label}]"
+        f"zoompan={zoom_expr}:x='{pan_x}':y='{pan_y}':d={frames}:s={width}x{height}:fps={fps},"
+        f"trim=end_frame={frames},setpts=PTS-STARTPTS"
+        f"[{out_label}]"
+    )
+
+
+def _build_parallax_chain(
+    input_label: str,
+    out_label: str,
+    frames: int,
+    motion: Dict[str, Any],
+    *,
+    width: int,
+    height: int,
+    fps: int,
+    tag: str,
 ) -> str:
+    """
+    Parallax (BG desfocado + FG com zoom) sobre uma entrada já enquadrada em width x height.
+    A entrada é um único frame: o BG é escalado e desfocado uma vez e repetido (loop) antes
+    do crop animado; o FG sai do zoompan.
+    """
+    frames = max(1, int(frames))
+    intensity = (motion or {}).get("intensity", "medium")
+    if intensity == "low":
+        blur, bg_scale, depth = 6, 1.06, 10
+    elif intensity == "high":
+        blur, bg_scale, depth = 12, 1.12, 22
+    else:
+        blur, bg_scale, depth = 10, 1.10, 16
+
+    zoom_start, zoom_end = _scene_zoom_params(motion)
+    fg_zoom_expr = f"zoom='{zoom_start}+({zoom_end}-{zoom_start})*on/{frames}'"
+    pan_x, pan_y = _zoompan_xy_exprs(motion, frames)
+
+    hz = _env_float("AO_PARALLAX_HZ", 0.22)
+    # movimento suave do BG (offset no crop)
+    bg_x = f"(iw-{width})/2 + {depth}*sin(2*PI*t*{hz})"
+    bg_y = f"(ih-{height})/2 + {depth}*cos(2*PI*t*{hz})"
+
+    bgw, bgh = int(width * bg_scale), int(height * bg_scale)
+    # _blur_scale < 1 (ver render_plan): desfoca em resolução reduzida e amplia de volta
+    blur_scale = max(0.1, min(1.0, float((motion or {}).get("_blur_scale", 1.0))))
+    if blur_scale < 1.0:
+        sw, sh = max(2, int(bgw * blur_scale) // 2 * 2), max(2, int(bgh * blur_scale) // 2 * 2)
+        bg_blur = f"scale={sw}:{sh},boxblur={max(1, int(round(blur * blur_scale)))}:1,scale={bgw}:{bgh},"
+    else:
+        bg_blur = f"scale={bgw}:{bgh}:force_original_aspect_ratio=increase,boxblur={blur}:1,"
+
+    a = f"s{tag}a"
+    b = f"s{tag}b"
+    bg = f"bg{tag}"
+    fg = f"fg{tag}"
+
+    return (
+        f"[{input_label}]"
+        f"split=2[{a}][{b}];"
+        f"[{a}]{bg_blur}"
+        f"loop=loop={frames - 1}:size=1:start=0,setpts=N/{fps}/TB,"
+        f"crop={width}:{height}:x='{bg_x}':y='{bg_y}',format=rgba[{bg}];"
+        f"[{b}]zoompan={fg_zoom_expr}:x='{pan_x}':y='{pan_y}':d={frames}:s={width}x{height}:fps={fps},"
+        f"format=rgba[{fg}];"
+        f"[{bg}][{fg}]overlay=x=0:y=0:format=auto,trim=end_frame={frames},setpts=PTS-STARTPTS"
+        f"[{out_label}]"
+    )
+
+
+def _build_scene_chain(
+    input_label: str,
+    out_label: str,
+    frames: int,
+    motion: Dict[str, Any],
+    *,
+    width: int,
+    height: int,
+    fps: int,
+    tag: str,
+    parallax_enabled: bool,
+    reframe: str = "crop",
+) -> str:
+    """Enquadramento + Ken Burns ou parallax conforme motion_plan['type']."""
+    framed = f"rf{tag}"
+    return ";".join([
+        _build_reframe_chain(input_label, framed, width=width, height=height, reframe=reframe, tag=tag),
+        _build_motion_chain(
+            framed, out_label, frames, motion,
+            width=width, height=height, fps=fps, tag=tag, parallax_enabled=parallax_enabled,
+        ),
+    ])
+
+
+def _build_motion_chain(
+    input_label: str,
+    out_label: str,
+    frames: int,
+    motion: Dict[str, Any],
+    *,
+    width: int,
+    height: int,
+    fps: int,
+    tag: str,
+    parallax_enabled: bool,
+) -> str:
+    """Ken Burns ou parallax sobre uma entrada já enquadrada."""
+    motion_type = (motion or {}).get("type", "ken_burns")
+    if parallax_enabled and motion_type == "parallax":
+        return _build_parallax_chain(input_label, out_label, frames, motion, width=width, height=height, fps=fps, tag=tag)
+    return _build_ken_chain(input_label, out_label, frames, motion, width=width, height=height, fps=fps)
+
+
+def _build_post_chain(
+    current: str,
+    post: _PostInputs,
+    ass_arg: str,
+    tag: str = "",
+) -> Tuple[List[str], str]:
+    """
+    Granulado + camada estática (vinheta/watermark) + legendas ASS sobre o vídeo base.
+    O granulado vem da textura em loop (blend grainmerge); a camada é um PNG de frame único,
+    repetido pelo overlay. O grade de cor já vem aplicado nos stills (still_grade).
+    Retorna (partes do filter_complex, label final em yuv420p).
+    """
+    parts: List[str] = []
+
+    if post.grain_label is not None:
+        out = f"{current}_grain"
+        parts.append(f"[{current}]format=yuv420p[{current}_yuv]")
+        parts.append(
+            f"[{current}_yuv][{post.grain_label}]blend=all_mode=grainmerge:shortest=1,format=rgba[{out}]"
+        )
+        current = out
+
+    if post.overlay_label is not None:
+        out = f"{current}_ov"
+        parts.append(f"[{current}][{post.overlay_label}]overlay=0:0:format=auto:eof_action=repeat[{out}]")
+        current = out
+
+    parts.append(f"[{current}]ass='{ass_arg}'[v{tag}]")
+    parts.append(f"[v{tag}]format=yuv420p[vout{tag}]")
+    return parts, f"vout{tag}"
+
+
+def _video_codec_args() -> List[str]:
+    return ["-c:v", "libx264", "-pix_fmt", "yuv420p"] + get_render_profile().encoder_args()
+
+
+def _window_output_args(window: Optional[Tuple[float, float]]) -> List[str]:
+    """Opções de saída para renderizar só a janela (início, duração) do perfil."""
+    if not window:
+        return []
+    start, length = window
+    args = ["-ss", f"{start:.3f}"] if start > 0 else []
+    return args + ["-t", f"{length:.3f}"]
+
+
+@dataclass(frozen=True)
+class RenderTarget:
+    """Uma saída de vídeo: geometria, enquadramento e (opcional) bitrate/preset de preview."""
+    name: str
+    width: int
+    height: int
+    out_dirname: str
+    out_filename: str
+    label: str = "Renderizando"
+    # crop | blur_pad | fit (ver _build_reframe_chain)
+    reframe: str = "crop"
+    video_bitrate: Optional[str] = None
+    preset: Optional[str] = None
+
+    def out_path(self, root: str) -> str:
+        out_dir = os.path.join(root, "output", self.out_dirname)
+        os.makedirs(out_dir, exist_ok=True)
+        return os.path.join(out_dir, self.out_filename)
+
+
+def _target_codec_args(targets: List[RenderTarget]) -> List[str]:
+    """Encoder de vídeo por saída (v:i = vídeo da i-ésima target)."""
+    args = _video_codec_args()
+    for i, t in enumerate(targets):
+        if t.video_bitrate:
+            args += [f"-b:v:{i}", t.video_bitrate, f"-maxrate:v:{i}", t.video_bitrate, f"-bufsize:v:{i}", t.video_bitrate]
+        if t.preset:
+            args += [f"-preset:v:{i}", t.preset]
+    return args
+
+
+def _tee_escape(path: str) -> str:
+    p = path.replace("\\", "/")
+    for ch in ("|", "[", "]"):
+        p = p.replace(ch, "\\" + ch)
+    return p
+
+
+def _output_args(targets: List[RenderTarget], out_paths: List[str]) -> List[str]:
+    """
+    1 target: saída mp4 normal.
+    N targets: muxer tee (áudio encodado uma vez e compartilhado entre as saídas).
+    """
+    if len(out_paths) == 1:
+        return ["-movflags", "+faststart", out_paths[0]]
+    slaves = [
+        f"[f=mp4:movflags=+faststart:select=\\'v:{i},a\\']{_tee_escape(p)}"
+        for i, p in enumerate(out_paths)
+    ]
+    return ["-f", "tee", "|".join(slaves)]
+
+
+def _still_input_args(path: str) -> List[str]:
+    """
+    Imagem como entrada de frame único (sem -loop): o demuxer decodifica o PNG uma vez
+    em vez de uma vez por frame de saída.
+    """
+    return ["-i", path]
+
+
+def _scene_image_paths(scenes: List[Dict[str, Any]], img_any: str) -> List[str]:
+    image_paths: List[str] = []
+    for scene in scenes:
+        img = scene.get("_image_path") if isinstance(scene, dict) else None
+        if not isinstance(img, str) or not img or not os.path.exists(img):
+            img = img_any
+        image_paths.append(img)
+    return image_paths
+
+
+@dataclass
+class _SceneRun:
+    """Cenas consecutivas com a mesma imagem e o mesmo movimento, renderizadas como um segmento só."""
+    image_path: str
+    motion: Dict[str, Any]
+    frames: int
+    scene_indices: List[int]
+
+
+def _scene_runs(
+    scenes: List[Dict[str, Any]],
+    image_paths: List[str],
+    frame_counts: List[int],
+    merge: Optional[bool] = None,
+) -> List[_SceneRun]:
+    """
+    Agrupa cenas consecutivas com mesma imagem + motion_plan (AO_MERGE_SCENES=1, padrão).
+    Comum quando várias cenas caem no fallback img_any.
+    """
+    if merge is None:
+        merge = _env_bool("AO_MERGE_SCENES", "1")
+    runs: List[_SceneRun] = []
+    for idx, img in enumerate(image_paths):
+        scene = scenes[idx] if idx < len(scenes) and isinstance(scenes[idx], dict) else {}
+        motion = scene.get("motion_plan", {}) or {}
+        prev = runs[-1] if runs else None
+        if merge and prev is not None and prev.image_path == img and prev.motion == motion:
+            prev.frames += frame_counts[idx]
+            prev.scene_indices.append(idx)
+            continue
+        runs.append(_SceneRun(image_path=img, motion=motion, frames=frame_counts[idx], scene_indices=[idx]))
+    return runs
+
+
+def _render_mode(render_mode: Optional[str]) -> str:
+    """
+    Modo de render com imagens:
+    - graph: um único filter_complex com todas as cenas (padrão)
+    - segments: uma cena por processo + concat em stream copy
+    - farm: cenas distribuídas para workers em outros nós via diretório compartilhado (ver render_farm)
+    Controlado por AO_RENDER_MODE.
+    """
+    mode = (render_mode or os.getenv("AO_RENDER_MODE", "graph") or "graph").strip().lower()
+    return mode if mode in ("graph", "segments", "farm") else "graph"
+
+
+def _motion_engine(motion_engine: Optional[str]) -> str:
+    """
+    Motor de movimento:
+    - ffmpeg: zoompan no filter graph (padrão)
+    - numpy: frames calculados em NumPy e enviados como rawvideo (ver motion_numpy)
+    Controlado por AO_MOTION_ENGINE ou pelo parâmetro motion_engine do render.
+    """
+    engine = (motion_engine or os.getenv("AO_MOTION_ENGINE", "ffmpeg") or "ffmpeg").strip().lower()
+    return engine if engine in ("ffmpeg", "numpy") else "ffmpeg"
+
+
+def _target_variants(image_paths: List[str], target: RenderTarget, root: str) -> Tuple[Dict[str, str], str]:
+    """
+    (imagem -> variante pré-enquadrada para a target, reframe a usar no grafo).
+    Sem variantes (AO_IMAGE_VARIANTS=0 ou falha): ({}, target.reframe) e o grafo enquadra.
+    """
+    from .image_variants import target_variants, variants_enabled
+
+    if not variants_enabled() or not image_paths:
+        return {}, target.reframe
+    try:
+        variants = target_variants(
+            ensure_ffmpeg(), image_paths,
+            width=target.width, height=target.height, reframe=target.reframe, project_root=Path(root),
+        )
+    except RuntimeError as e:
+        print(f"⚠️ Variantes {target.width}x{target.height} indisponíveis, enquadrando no render: {e}")
+        return {}, target.reframe
+    return variants, "pre"
+
+
+def _graded_scenes(scenes: List[Dict[str, Any]], profile: RenderProfile) -> List[Dict[str, Any]]:
+    """
+    Troca _image_path pelos stills com o grade do canal (ver still_grade), gerados uma vez
+    por imagem. Só com o cinematic ativo; AO_STILL_GRADE=0 desliga.
+    """
+    if not _cinematic_enabled(profile) or not _env_bool("AO_STILL_GRADE", "1"):
+        return scenes
+    try:
+        import numpy  # noqa: F401  # type: ignore
+    except ImportError:
+        print("⚠️ numpy não instalado: stills sem grade de cor (pip install numpy).")
+        return scenes
+
+    paths = [
+        s.get("_image_path") for s in scenes
+        if isinstance(s, dict) and isinstance(s.get("_image_path"), str) and os.path.exists(s["_image_path"])
+    ]
+    graded = grade_stills(ensure_ffmpeg(), paths)
+    out: List[Dict[str, Any]] = []
+    for s in scenes:
+        if isinstance(s, dict) and s.get("_image_path") in graded:
+            s = dict(s, _image_path=graded[s["_image_path"]])
+        out.append(s)
+    return out
+
+
+@dataclass
+class _RenderInputs:
+    root: str
+    audio_path: str
+    wm_path: Optional[str]
+    scenes: List[Dict[str, Any]]
+    ass_arg: str
+    img_any: Optional[str]
+    parallax_enabled: bool
+    fps: int
+    profile: RenderProfile
+    window: Optional[Tuple[float, float]] = None
+
+    def render_seconds(self, duration_sec: float) -> float:
+        return self.window[1] if self.window else float(duration_sec)
+
+
+def _prepare_render_inputs(
+    data: Dict[str, Any],
+    duration_sec: float,
+    video_type: str,
+    profile: Optional[RenderProfile] = None,
+) -> _RenderInputs:
+    """Áudio, watermark, cenas e ASS karaokê: comum a todas as saídas de um mesmo roteiro."""
     root = _project_root()
-    out_dir = os.path.join(root, "output", out_dirname)
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, out_filename)
 
     audio_path = data.get("_audio_path")
     if not isinstance(audio_path, str) or not audio_path or not os.path.exists(audio_path):
@@ -136,192 +623,340 @@ def _render_video_generic(
     subs_dir = os.path.join(root, "output", "subs")
     os.makedirs(subs_dir, exist_ok=True)
     subs_name = f"{video_type}_karaoke.ass" if video_type == "long" else "short_karaoke.ass"
-    ass_path = os.path.join(subs_dir, subs_name)
+    ass_path = os.path.join(subs_dir, _tagged_filename(subs_name, _output_tag(data)))
     write_karaoke_ass(timeline, ass_path, style=AssStyle())
-    ass_arg = _ff_escape_ass_path_windows(ass_path)
-
-    img_any = _first_existing_image(scenes)
-
-    parallax_enabled = _env_bool("AO_PARALLAX_ENABLED", "0")
-
-    fps = 25
-
-    def build_ken(input_idx: int, out_label: str, dur: float, motion: Dict[str, Any]) -> str:
-        frames = max(1, int(dur * fps))
-        zoom_start, zoom_end = _scene_zoom_params(motion)
-        zoom_expr = f"zoom='{zoom_start}+({zoom_end}-{zoom_start})*on/{frames}'"
-        pan_x = "iw/2-(iw/zoom/2)"
-        pan_y = "ih/2-(ih/zoom/2)"
-        return (
-            f"[{input_idx}:v]"
-            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
-            f"crop={width}:{height},"
-            f"zoompan={zoom_expr}:x='{pan_x}':y='{pan_y}':d={frames}:s={width}x{height},"
-            f"fps={fps},trim=duration={dur:.3f},setpts=PTS-STARTPTS"
-            f"[{out_label}]"
-        )
-
-    def build_parallax(input_idx: int, out_label: str, dur: float, motion: Dict[str, Any]) -> str:
-        frames = max(1, int(dur * fps))
-        intensity = (motion or {}).get("intensity", "medium")
-        if intensity == "low":
-            blur, bg_scale, depth = 6, 1.06, 10
-        elif intensity == "high":
-            blur, bg_scale, depth = 12, 1.12, 22
-        else:
-            blur, bg_scale, depth = 10, 1.10, 16
-
-        zoom_start, zoom_end = _scene_zoom_params(motion)
-        fg_zoom_expr = f"zoom='{zoom_start}+({zoom_end}-{zoom_start})*on/{frames}'"
-        pan_x = "iw/2-(iw/zoom/2)"
-        pan_y = "ih/2-(ih/zoom/2)"
-
-        hz = _env_float("AO_PARALLAX_HZ", 0.22)
-        # movimento suave do BG (offset no crop)
-        bg_x = f"(iw-{width})/2 + {depth}*sin(2*PI*t*{hz})"
-        bg_y = f"(ih-{height})/2 + {depth}*cos(2*PI*t*{hz})"
-
-        bgw, bgh = int(width * bg_scale), int(height * bg_scale)
 
-        a = f"s{input_idx}a"
-        b = f"s{input_idx}b"
-        bg = f"bg{input_idx}"
-        fg = f"fg{input_idx}"
-
-        return (
-            f"[{input_idx}:v]"
-            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
-            f"crop={width}:{height},"
-            f"split=2[{a}][{b}];"
-            f"[{a}]scale={bgw}:{bgh}:force_original_aspect_ratio=increase,"
-            f"crop={width}:{height}:x='{bg_x}':y='{bg_y}',"
-            f"boxblur={blur}:1,format=rgba[{bg}];"
-            f"[{b}]zoompan={fg_zoom_expr}:x='{pan_x}':y='{pan_y}':d={frames}:s={width}x{height},"
-            f"fps={fps},format=rgba[{fg}];"
-            f"[{bg}][{fg}]overlay=x=0:y=0:format=auto,trim=duration={dur:.3f},setpts=PTS-STARTPTS"
-            f"[{out_label}]"
-        )
-
-    # ===== Sem imagens: fundo preto =====
-    if not img_any:
-        cmd: List[str] = [FFMPEG, "-y", "-f", "lavfi", "-i", f"color=c=black:s={width}x{height}:d={float(duration_sec):.3f}"]
-        wm_input_idx = None
-        if wm_path:
-            cmd += ["-loop", "1", "-t", f"{float(duration_sec):.3f}", "-i", wm_path]
-            wm_input_idx = 1
-        cmd += ["-i", audio_path]
-        audio_input_idx = 1 if wm_input_idx is None else 2
-
-        parts: List[str] = [f"[0:v]format=rgba[vbase]"]
-        current = "vbase"
-
-        fx_snip, fx_label = _build_cinematic_stack(current)
-        if fx_snip:
-            parts.append(fx_snip)
-            current = fx_label
-
-        if wm_input_idx is not None:
-            wm_snip, wm_out = _build_watermark_chain(current, wm_input_idx)
-            parts.append(wm_snip)
-            current = wm_out
-
-        parts.append(f"[{current}]ass='{ass_arg}'[v]")
-        parts.append("[v]format=yuv420p[vout]")
-        filter_complex = ";".join(parts)
-
-        cmd += [
-            "-filter_complex", filter_complex,
-            "-map", "[vout]",
-            "-map", f"{audio_input_idx}:a",
-            "-shortest",
-            "-c:v", "libx264",
-            "-pix_fmt", "yuv420p",
-            "-c:a", "aac",
-            "-movflags", "+faststart",
-            "-loglevel", "error",
-            out_path,
-        ]
-        run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label=label + " (sem imagens)")
-        return out_path
+    profile = profile or get_render_profile()
+    scenes = _graded_scenes(scenes, profile)
+    return _RenderInputs(
+        root=root,
+        audio_path=audio_path,
+        wm_path=wm_path,
+        scenes=scenes,
+        ass_arg=_ff_escape_ass_path_windows(ass_path),
+        img_any=_first_existing_image(scenes),
+        parallax_enabled=_env_bool("AO_PARALLAX_ENABLED", "0") and profile.effects,
+        fps=profile.fps,
+        profile=profile,
+        window=profile.window(float(duration_sec)),
+    )
 
-    # ===== Com imagens =====
-    n = max(1, len(scenes))
-    scene_duration = float(duration_sec) / n
 
-    # entradas: 1 por cena (loop)
-    cmd: List[str] = [FFMPEG, "-y"]
-    image_paths: List[str] = []
+def _render_without_images(inputs: _RenderInputs, target: RenderTarget, duration_sec: float) -> str:
+    """Sem imagens: fundo preto + efeitos + watermark + ASS."""
+    out_path = target.out_path(inputs.root)
+    width, height = target.width, target.height
+    cmd: List[str] = [ensure_ffmpeg(), "-y", "-f", "lavfi", "-i", f"color=c=black:s={width}x{height}:d={float(duration_sec):.3f}"]
+    post = _post_inputs(inputs.root, width, height, inputs.fps, inputs.wm_path, first_idx=1)
+    cmd += post.args
+    cmd += ["-i", inputs.audio_path]
+    audio_input_idx = 1 + post.count
 
-    for scene in scenes:
-        img = scene.get("_image_path") if isinstance(scene, dict) else None
-        if not isinstance(img, str) or not img or not os.path.exists(img):
-            img = img_any
-        image_paths.append(img)
+    parts: List[str] = [f"[0:v]format=rgba[vbase]"]
+    post_parts, vout = _build_post_chain("vbase", post, inputs.ass_arg)
+    parts += post_parts
+    filter_complex = ";".join(parts)
 
-    for img in image_paths:
-        cmd += ["-loop", "1", "-t", f"{scene_duration:.3f}", "-i", img]
+    cmd += [
+        "-filter_complex", filter_complex,
+        "-map", f"[{vout}]",
+        "-map", f"{audio_input_idx}:a",
+        "-shortest",
+        *_window_output_args(inputs.window),
+        *_target_codec_args([target]),
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+        "-loglevel", "error",
+        out_path,
+    ]
+    run_ffmpeg_with_progress(
+        cmd,
+        total_duration_sec=inputs.render_seconds(duration_sec),
+        label=target.label + " (sem imagens)",
+    )
+    return out_path
 
-    wm_input_idx = None
-    if wm_path:
-        cmd += ["-loop", "1", "-t", f"{float(duration_sec):.3f}", "-i", wm_path]
-        wm_input_idx = len(image_paths)
 
-    cmd += ["-i", audio_path]
-    audio_input_idx = len(image_paths) + (1 if wm_input_idx is not None else 0)
+def _render_targets_graph(
+    inputs: _RenderInputs,
+    targets: List[RenderTarget],
+    *,
+    duration_sec: float,
+    label: str,
+) -> Dict[str, str]:
+    """
+    Um único ffmpeg para todas as targets:
+    - cada imagem única é aberta uma vez (-i) e enquadrada uma vez por target; com variantes
+      (image_variants) cada target abre a sua, já enquadrada, e o grafo não reescala nada
+    - o frame enquadrado é dividido (split) entre os segmentos que o usam
+    - cenas consecutivas com mesma imagem/movimento viram um segmento só (_scene_runs)
+    - o áudio é encodado uma vez (muxer tee)
+    """
+    scenes = inputs.scenes
+    fps = inputs.fps
+    image_paths = _scene_image_paths(scenes, inputs.img_any or "")
+    runs = _scene_runs(scenes, image_paths, _scene_frame_counts(len(image_paths), duration_sec, fps))
+    n_out = len(targets)
+    out_paths = [t.out_path(inputs.root) for t in targets]
+
+    # imagens únicas; cada target lê a sua variante pré-enquadrada (ou a original, enquadrada no grafo)
+    unique_images: List[str] = []
+    for run in runs:
+        if run.image_path not in unique_images:
+            unique_images.append(run.image_path)
+    variants = [_target_variants(unique_images, t, inputs.root) for t in targets]
+    sources: Dict[Tuple[str, int], str] = {
+        (img, t): variants[t][0].get(img, img) for img in unique_images for t in range(n_out)
+    }
+
+    # entradas: 1 por arquivo único, frame único (o movimento gera os frames)
+    input_files: List[str] = list(dict.fromkeys(sources.values()))
+
+    cmd: List[str] = [ensure_ffmpeg(), "-y"]
+    for path in input_files:
+        cmd += _still_input_args(path)
+
+    # camada estática e granulado: um par por target (dependem da resolução)
+    posts: List[_PostInputs] = []
+    next_idx = len(input_files)
+    for target in targets:
+        post = _post_inputs(inputs.root, target.width, target.height, fps, inputs.wm_path, first_idx=next_idx)
+        cmd += post.args
+        next_idx += post.count
+        posts.append(post)
+
+    cmd += ["-i", inputs.audio_path]
+    audio_input_idx = next_idx
+
+    def _fan_out(src: str, prefix: str, count: int) -> Tuple[Optional[str], List[str]]:
+        if count == 1:
+            return None, [src]
+        labels = [f"{prefix}_{i}" for i in range(count)]
+        return f"[{src}]split={count}" + "".join(f"[{lb}]" for lb in labels), labels
 
     chain_parts: List[str] = []
-    video_nodes: List[str] = []
-
-    for idx, scene in enumerate(scenes):
-        motion = scene.get("motion_plan", {}) if isinstance(scene, dict) else {}
-        motion_type = (motion or {}).get("type", "ken_burns")
-        out_label = f"v{idx}"
-        if parallax_enabled and motion_type == "parallax":
-            chain_parts.append(build_parallax(idx, out_label, scene_duration, motion))
-        else:
-            chain_parts.append(build_ken(idx, out_label, scene_duration, motion))
-        video_nodes.append(f"[{out_label}]")
-
-    chain_parts.append("".join(video_nodes) + f"concat=n={len(video_nodes)}:v=1:a=0,format=rgba[vbase]")
-    current = "vbase"
-
-    fx_snip, fx_label = _build_cinematic_stack(current)
-    if fx_snip:
-        chain_parts.append(fx_snip)
-        current = fx_label
-
-    if wm_input_idx is not None:
-        wm_snip, wm_out = _build_watermark_chain(current, wm_input_idx)
-        chain_parts.append(wm_snip)
-        current = wm_out
-
-    chain_parts.append(f"[{current}]ass='{ass_arg}'[v]")
-    chain_parts.append("[v]format=yuv420p[vout]")
+
+    # arquivo -> (imagem, target) que o leem -> enquadramento (uma vez) -> segmentos que usam a imagem
+    uses: Dict[str, int] = {img: 0 for img in unique_images}
+    for run in runs:
+        uses[run.image_path] += 1
+    framed_labels: Dict[Tuple[str, int], List[str]] = {}
+    for k, path in enumerate(input_files):
+        consumers = [it for it, src in sources.items() if src == path]
+        split_snip, per_consumer = _fan_out(f"{k}:v", f"i{k}", len(consumers))
+        if split_snip:
+            chain_parts.append(split_snip)
+        for c, (img, t) in enumerate(consumers):
+            target = targets[t]
+            framed = f"rf{k}c{c}"
+            chain_parts.append(
+                _build_reframe_chain(
+                    per_consumer[c], framed,
+                    width=target.width, height=target.height, reframe=variants[t][1], tag=f"{k}c{c}",
+                )
+            )
+            split_snip, per_run = _fan_out(framed, framed, uses[img])
+            if split_snip:
+                chain_parts.append(split_snip)
+            framed_labels[(img, t)] = per_run
+
+    video_nodes: List[List[str]] = [[] for _ in targets]
+    for r, run in enumerate(runs):
+        for t, target in enumerate(targets):
+            tag = f"{r}t{t}"
+            out_label = f"v{tag}"
+            chain_parts.append(
+                _build_motion_chain(
+                    framed_labels[(run.image_path, t)].pop(0), out_label, run.frames, run.motion,
+                    width=target.width, height=target.height, fps=fps, tag=tag,
+                    parallax_enabled=inputs.parallax_enabled,
+                )
+            )
+            video_nodes[t].append(f"[{out_label}]")
+
+    maps: List[str] = []
+    for t in range(n_out):
+        base = f"vbaset{t}"
+        chain_parts.append("".join(video_nodes[t]) + f"concat=n={len(video_nodes[t])}:v=1:a=0,format=rgba[{base}]")
+        post_parts, vout = _build_post_chain(base, posts[t], inputs.ass_arg, tag=f"t{t}")
+        chain_parts += post_parts
+        maps += ["-map", f"[{vout}]"]
 
     filter_complex = ";".join(chain_parts)
 
     cmd += [
         "-filter_complex", filter_complex,
-        "-map", "[vout]",
+        *maps,
         "-map", f"{audio_input_idx}:a",
         "-shortest",
-        "-c:v", "libx264",
-        "-pix_fmt", "yuv420p",
+        *_window_output_args(inputs.window),
+        *_target_codec_args(targets),
         "-c:a", "aac",
-        "-movflags", "+faststart",
         "-loglevel", "error",
-        out_path,
+        *_output_args(targets, out_paths),
     ]
 
-    run_ffmpeg_with_progress(cmd, total_duration_sec=float(duration_sec), label=label)
-    return out_path
+    run_ffmpeg_with_progress(
+        cmd,
+        total_duration_sec=inputs.render_seconds(duration_sec),
+        label=label,
+    )
+    return {t.name: p for t, p in zip(targets, out_paths)}
+
+
+def _apply_profile(target: RenderTarget, profile: RenderProfile) -> RenderTarget:
+    if not profile.is_draft:
+        return target
+    width, height = profile.scale_size(target.width, target.height)
+    return replace(target, width=width, height=height, out_filename=profile.out_filename(target.out_filename))
+
+
+def _render_targets(
+    data: Dict[str, Any],
+    *,
+    duration_sec: float,
+    targets: List[RenderTarget],
+    video_type: str,
+    label: str,
+    render_mode: Optional[str] = None,
+    motion_engine: Optional[str] = None,
+) -> Dict[str, str]:
+    if not targets:
+        raise ValueError("Nenhuma target de render informada.")
+    profile = get_render_profile()
+    targets = [_apply_profile(t, profile) for t in targets]
+    tag = _output_tag(data)
+    if tag:
+        targets = [replace(t, out_filename=_tagged_filename(t.out_filename, tag)) for t in targets]
+    inputs = _prepare_render_inputs(data, float(duration_sec), video_type, profile)
+    if profile.is_draft:
+        w0 = f" | janela {inputs.window[0]:.1f}s+{inputs.window[1]:.1f}s" if inputs.window else ""
+        print(f"📝 Perfil draft: {', '.join(f'{t.width}x{t.height}' for t in targets)} @ {profile.fps} fps{w0}")
+
+    # ===== Sem imagens: fundo preto (barato, uma saída por vez) =====
+    if not inputs.img_any:
+        return {t.name: _render_without_images(inputs, t, float(duration_sec)) for t in targets}
+
+    # ===== Com imagens =====
+    # Estima o custo do grafo e, com AO_RENDER_BUDGET_SEC, rebaixa efeitos caros antes de lançar o ffmpeg
+    from .render_plan import plan_render
+
+    engine = _motion_engine(motion_engine)
+    plan = plan_render(inputs, targets, float(duration_sec), engine=engine)
+    inputs.scenes = plan.apply(inputs.scenes)
+
+    if engine == "numpy":
+        from .motion_numpy import render_targets_numpy
+
+        return render_targets_numpy(inputs, targets, float(duration_sec))
+
+    # O cache de cenas (AO_SCENE_CACHE=1) usa o pipeline por segmentos (clipes reaproveitáveis).
+    # Drafts são descartáveis e usam sempre o grafo único (a janela corta o trabalho na saída).
+    mode = _render_mode(render_mode)
+    if not profile.is_draft and mode == "farm":
+        from .render_farm import render_scene_farm
+
+        image_paths = _scene_image_paths(inputs.scenes, inputs.img_any)
+        outputs: Dict[str, str] = {}
+        for t in targets:
+            variants, reframe = _target_variants(image_paths, t, inputs.root)
+            outputs[t.name] = render_scene_farm(
+                inputs.scenes,
+                [variants.get(p, p) for p in image_paths],
+                audio_path=inputs.audio_path,
+                wm_path=inputs.wm_path,
+                ass_arg=inputs.ass_arg,
+                duration_sec=float(duration_sec),
+                width=t.width,
+                height=t.height,
+                fps=inputs.fps,
+                parallax_enabled=inputs.parallax_enabled,
+                out_path=t.out_path(inputs.root),
+                label=t.label,
+                reframe=reframe,
+            )
+        return outputs
+
+    if not profile.is_draft and (mode == "segments" or scene_cache_enabled()):
+        from .render_segments import render_scene_segments
+
+        image_paths = _scene_image_paths(inputs.scenes, inputs.img_any)
+        outputs = {}
+        for t in targets:
+            variants, reframe = _target_variants(image_paths, t, inputs.root)
+            outputs[t.name] = render_scene_segments(
+                inputs.scenes,
+                [variants.get(p, p) for p in image_paths],
+                audio_path=inputs.audio_path,
+                wm_path=inputs.wm_path,
+                ass_arg=inputs.ass_arg,
+                duration_sec=float(duration_sec),
+                width=t.width,
+                height=t.height,
+                fps=inputs.fps,
+                parallax_enabled=inputs.parallax_enabled,
+                out_path=t.out_path(inputs.root),
+                label=t.label,
+                reframe=reframe,
+            )
+        return outputs
+
+    return _render_targets_graph(inputs, targets, duration_sec=float(duration_sec), label=label)
+
+
+def _render_video_generic(
+    data: Dict[str, Any],
+    *,
+    duration_sec: float,
+    width: int,
+    height: int,
+    out_dirname: str,
+    out_filename: str,
+    video_type: str,
+    label: str,
+    render_mode: Optional[str] = None,
+    motion_engine: Optional[str] = None,
+) -> str:
+    target = RenderTarget(
+        name=out_filename,
+        width=width,
+        height=height,
+        out_dirname=out_dirname,
+        out_filename=out_filename,
+        label=label,
+    )
+    out = _render_targets(
+        data,
+        duration_sec=float(duration_sec),
+        targets=[target],
+        video_type=video_type,
+        label=label,
+        render_mode=render_mode,
+        motion_engine=motion_engine,
+    )
+    return out[target.name]
 
 
 # =========================
 # Public API
 # =========================
 
-def render_short_video(data: Dict[str, Any], duration_sec: float) -> str:
+LONG_TARGET_16X9 = RenderTarget(
+    name="16x9", width=1920, height=1080,
+    out_dirname="longs", out_filename="long_auto_16x9.mp4", label="Renderizando LONG 16:9",
+)
+LONG_TARGET_9X16 = RenderTarget(
+    name="9x16", width=1080, height=1920,
+    out_dirname="longs", out_filename="long_auto_9x16.mp4", label="Renderizando LONG 9:16",
+)
+LONG_TARGET_PREVIEW = RenderTarget(
+    name="preview", width=640, height=360,
+    out_dirname="longs", out_filename="long_preview_16x9.mp4", label="Renderizando LONG preview",
+    video_bitrate="600k", preset="veryfast",
+)
+
+
+def render_short_video(data: Dict[str, Any], duration_sec: float, motion_engine: Optional[str] = None) -> str:
     """SHORT 9:16 (1080x1920)"""
     return _render_video_generic(
         data,
@@ -332,10 +967,11 @@ def render_short_video(data: Dict[str, Any], duration_sec: float) -> str:
         out_filename="short_auto.mp4",
         video_type="short",
         label="Renderizando SHORT",
+        motion_engine=motion_engine,
     )
 
 
-def render_long_video_16x9(data: Dict[str, Any], duration_sec: float) -> str:
+def render_long_video_16x9(data: Dict[str, Any], duration_sec: float, motion_engine: Optional[str] = None) -> str:
     """LONG 16:9 (1920x1080)"""
     return _render_video_generic(
         data,
@@ -346,10 +982,11 @@ def render_long_video_16x9(data: Dict[str, Any], duration_sec: float) -> str:
         out_filename="long_auto_16x9.mp4",
         video_type="long",
         label="Renderizando LONG 16:9",
+        motion_engine=motion_engine,
     )
 
 
-def render_long_video_9x16(data: Dict[str, Any], duration_sec: float) -> str:
+def render_long_video_9x16(data: Dict[str, Any], duration_sec: float, motion_engine: Optional[str] = None) -> str:
     """LONG 9:16 (1080x1920)"""
     return _render_video_generic(
         data,
@@ -360,4 +997,56 @@ def render_long_video_9x16(data: Dict[str, Any], duration_sec: float) -> str:
         out_filename="long_auto_9x16.mp4",
         video_type="long",
         label="Renderizando LONG 9:16",
+        motion_engine=motion_engine,
+    )
+
+
+def render_video_targets(
+    data: Dict[str, Any],
+    duration_sec: float,
+    targets: List[RenderTarget],
+    *,
+    video_type: str = "long",
+    label: str = "Renderizando",
+    render_mode: Optional[str] = None,
+    motion_engine: Optional[str] = None,
+) -> Dict[str, str]:
+    """Renderiza várias saídas do mesmo roteiro em uma passada. Retorna {target.name: path}."""
+    return _render_targets(
+        data,
+        duration_sec=float(duration_sec),
+        targets=list(targets),
+        video_type=video_type,
+        label=label,
+        render_mode=render_mode,
+        motion_engine=motion_engine,
+    )
+
+
+def render_long_videos(
+    data: Dict[str, Any],
+    duration_sec: float,
+    preview: Optional[bool] = None,
+    motion_engine: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    LONG 16:9 + 9:16 (e preview opcional) em um único ffmpeg.
+    - AO_LONG_9X16_REFRAME: crop | blur_pad | fit (padrão crop)
+    - AO_LONG_PREVIEW=1: adiciona preview 640x360 de baixo bitrate
+    """
+    targets = [
+        LONG_TARGET_16X9,
+        replace(LONG_TARGET_9X16, reframe=os.getenv("AO_LONG_9X16_REFRAME", "crop").strip().lower() or "crop"),
+    ]
+    if preview is None:
+        preview = _env_bool("AO_LONG_PREVIEW", "0")
+    if preview:
+        targets.append(LONG_TARGET_PREVIEW)
+    return render_video_targets(
+        data,
+        duration_sec=float(duration_sec),
+        targets=targets,
+        video_type="long",
+        label="Renderizando LONG (16:9 + 9:16)",
+        motion_engine=motion_engine,
     )
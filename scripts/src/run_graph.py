@@ -0,0 +1,108 @@
+# scripts/src/run_graph.py
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Grafo de etapas de UMA execução (roteiro -> TTS || legendas/imagens -> render).
+# Cada nó é uma função síncrona (OpenAI, ffmpeg...) executada em thread via asyncio;
+# um nó começa assim que todas as dependências terminam, então etapas independentes
+# se sobrepõem e a latência vira o caminho crítico em vez da soma.
+#
+# AO_RUN_GRAPH=0 executa os nós em sequência (mesma ordem de inserção), útil para depurar.
+
+
+@dataclass
+class _Node:
+    name: str
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...]
+
+
+@dataclass
+class RunGraphResult:
+    values: Dict[str, Any]
+    node_sec: Dict[str, float]
+    wall_sec: float
+    critical_path: List[str] = field(default_factory=list)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    def summary(self, label: str) -> str:
+        steps = " | ".join(f"{n} {self.node_sec[n]:.1f}s" for n in self.values)
+        serial = sum(self.node_sec.values())
+        return (
+            f"🏁 {label}: {self.wall_sec:.1f}s (em sequência seria ~{serial:.1f}s) | {steps}\n"
+            f"   Caminho crítico: {' -> '.join(self.critical_path)}"
+        )
+
+
+class RunGraph:
+    def __init__(self) -> None:
+        self._nodes: Dict[str, _Node] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], *deps: str) -> "RunGraph":
+        """fn recebe os resultados das dependências, na ordem em que foram declaradas."""
+        if name in self._nodes:
+            raise ValueError(f"Nó duplicado no grafo: {name}")
+        missing = [d for d in deps if d not in self._nodes]
+        if missing:
+            raise ValueError(f"Nó '{name}' depende de nós ainda não declarados: {', '.join(missing)}")
+        self._nodes[name] = _Node(name=name, fn=fn, deps=tuple(deps))
+        return self
+
+    def _critical_path(self, node_sec: Dict[str, float]) -> List[str]:
+        finish: Dict[str, float] = {}
+        prev: Dict[str, Optional[str]] = {}
+        for name, node in self._nodes.items():  # ordem de inserção já é topológica
+            best = max(node.deps, key=lambda d: finish[d], default=None)
+            finish[name] = node_sec[name] + (finish[best] if best else 0.0)
+            prev[name] = best
+        cur: Optional[str] = max(finish, key=lambda n: finish[n]) if finish else None
+        path: List[str] = []
+        while cur:
+            path.append(cur)
+            cur = prev[cur]
+        return list(reversed(path))
+
+    async def _run_async(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        node_sec: Dict[str, float] = {}
+
+        async def _run_node(node: _Node) -> Any:
+            args = [await tasks[d] for d in node.deps]
+            t0 = time.perf_counter()
+            try:
+                return await asyncio.to_thread(node.fn, *args)
+            finally:
+                node_sec[node.name] = time.perf_counter() - t0
+
+        for node in self._nodes.values():
+            tasks[node.name] = asyncio.ensure_future(_run_node(node))
+        await asyncio.gather(*tasks.values())
+        return {n: t.result() for n, t in tasks.items()}, node_sec
+
+    def _run_serial(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        values: Dict[str, Any] = {}
+        node_sec: Dict[str, float] = {}
+        for node in self._nodes.values():
+            t0 = time.perf_counter()
+            values[node.name] = node.fn(*[values[d] for d in node.deps])
+            node_sec[node.name] = time.perf_counter() - t0
+        return values, node_sec
+
+    def run(self, concurrent: Optional[bool] = None) -> RunGraphResult:
+        if concurrent is None:
+            concurrent = os.getenv("AO_RUN_GRAPH", "1") != "0"
+        t0 = time.perf_counter()
+        values, node_sec = asyncio.run(self._run_async()) if concurrent else self._run_serial()
+        return RunGraphResult(
+            values={n: values[n] for n in self._nodes},
+            node_sec=node_sec,
+            wall_sec=time.perf_counter() - t0,
+            critical_path=self._critical_path(node_sec),
+        )
@@ -0,0 +1,95 @@
+# scripts/src/scene_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# Cache de clipes de movimento por cena (content-addressed).
+# Chave = hash da imagem + motion_plan + geometria + fps + frames + efeitos.
+# Um clipe só entra no cache depois de completo (rename atômico), então um
+# render que cai no meio deixa as cenas já prontas disponíveis para o próximo.
+
+SCENE_CACHE_VERSION = 3
+
+_FILE_HASH_MEMO: Dict[Tuple[str, int, int], str] = {}
+
+
+def scene_cache_enabled() -> bool:
+    """AO_SCENE_CACHE=1: renders passam pelos clipes cacheados (qualquer AO_RENDER_MODE)."""
+    return os.getenv("AO_SCENE_CACHE", "0").strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def scene_cache_dir(project_root: str) -> str:
+    d = os.path.join(project_root, "output", "cache", "scenes")
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def file_sha256(path: str) -> str:
+    """Hash do conteúdo, memoizado por (path, size, mtime)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), int(st.st_size), int(st.st_mtime_ns))
+    cached = _FILE_HASH_MEMO.get(memo_key)
+    if cached:
+        return cached
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    _FILE_HASH_MEMO[memo_key] = digest
+    return digest
+
+
+def scene_clip_key(
+    *,
+    image_path: str,
+    motion: Dict[str, Any],
+    width: int,
+    height: int,
+    fps: int,
+    frames: int,
+    reframe: str,
+    effects: Dict[str, Any],
+) -> str:
+    payload = {
+        "v": SCENE_CACHE_VERSION,
+        "image": file_sha256(image_path),
+        "motion": motion or {},
+        "w": int(width),
+        "h": int(height),
+        "fps": int(fps),
+        "frames": int(frames),
+        "reframe": reframe,
+        "effects": effects or {},
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def scene_clip_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{key}.mp4")
+
+
+def get_cached_clip(cache_dir: str, key: str) -> Optional[str]:
+    p = scene_clip_path(cache_dir, key)
+    if os.path.isfile(p) and os.path.getsize(p) > 0:
+        try:
+            os.utime(p, None)  # marca uso recente (útil para limpeza manual por idade)
+        except Exception:
+            pass
+        return p
+    return None
+
+
+def tmp_clip_path(final_path: str) -> str:
+    base, ext = os.path.splitext(final_path)
+    return f"{base}.tmp{os.getpid()}{ext}"
+
+
+def commit_clip(tmp_path: str, final_path: str) -> str:
+    """Publica o clipe no cache de forma atômica."""
+    os.replace(tmp_path, final_path)
+    return final_path
@@ -0,0 +1,178 @@
+# scripts/src/still_grade.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .cache_index import CacheIndex, get_cache_index
+from .scene_cache import file_sha256
+from .visual_dna import DNA, ChannelVisualDNA
+
+# Grade estático do canal aplicado UMA vez em cada imagem (e não por frame no ffmpeg):
+# - paleta do DNA (ex.: frias_dessaturadas -> saturação menor + leve desvio para o azul)
+# - contraste / lift de pretos
+# - sharpen leve (o antigo unsharp por frame)
+# O resultado fica em graded/ ao lado do original: <dir>/graded/<sha da fonte>.grade-<chave>.png
+# (fora de output/images, que é o cache de imagens com cota e estatísticas próprias)
+# A chave é o conteúdo da fonte + DNA/parâmetros: regenerar a imagem (force, chave de
+# intenção reaproveitada) ou trocar o look não reaproveita stills antigos.
+#
+# AO_STILL_GRADE_CACHE_MAX_MB (padrão 1024; 0 = sem limite): cota LRU de graded/, ver cache_index.
+
+GRADE_VERSION = 1
+GRADED_KEY_PATTERN = r"[0-9a-f]{24}\.grade-[0-9a-f]{12}"
+
+
+@dataclass(frozen=True)
+class StillGrade:
+    saturation: float = 1.0
+    temperature: float = 0.0  # < 0 esfria (menos vermelho, mais azul)
+    contrast: float = 1.0
+    lift: float = 0.0
+    sharpen: float = 0.0  # equivalente ao amount do unsharp 5x5
+
+
+_PALETTE_GRADES: Dict[str, StillGrade] = {
+    "frias_dessaturadas": StillGrade(saturation=0.78, temperature=-0.05, contrast=1.05, lift=0.015, sharpen=0.5),
+}
+
+
+def grade_for_dna(dna: ChannelVisualDNA = DNA) -> StillGrade:
+    return _PALETTE_GRADES.get(dna.palette, StillGrade(sharpen=0.5))
+
+
+def grade_key(grade: StillGrade, dna: ChannelVisualDNA = DNA) -> str:
+    payload = {"v": GRADE_VERSION, "dna": [dna.name, dna.palette, dna.texture], "grade": asdict(grade)}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def graded_dir(path: str) -> str:
+    return os.path.join(os.path.dirname(path), "graded")
+
+
+def graded_cache_index(cache_dir: Path) -> CacheIndex:
+    return get_cache_index(
+        "stills com grade", cache_dir,
+        quota_env="AO_STILL_GRADE_CACHE_MAX_MB", default_quota_mb=1024, file_glob="*.png", work_label="grade",
+        key_pattern=GRADED_KEY_PATTERN,
+    )
+
+
+def graded_still_key(path: str, grade: StillGrade, dna: ChannelVisualDNA = DNA) -> str:
+    return f"{file_sha256(path)[:24]}.grade-{grade_key(grade, dna)}"
+
+
+def graded_still_path(path: str, grade: StillGrade, dna: ChannelVisualDNA = DNA) -> str:
+    return os.path.join(graded_dir(path), f"{graded_still_key(path, grade, dna)}.png")
+
+
+def _require_numpy():
+    try:
+        import numpy as np  # type: ignore
+    except ImportError as e:
+        raise RuntimeError("O grade de imagens requer numpy. Instale com: pip install numpy") from e
+    return np
+
+
+def _box_blur_5(np, x):
+    """Média 5x5 separável (somas acumuladas), bordas replicadas."""
+    r = 2
+    pad = np.pad(x, ((r, r), (r, r), (0, 0)), mode="edge")
+    c = np.cumsum(pad, axis=0, dtype=np.float32)
+    c = np.concatenate([np.zeros_like(c[:1]), c], axis=0)
+    rows = (c[2 * r + 1:] - c[:-2 * r - 1]) / (2 * r + 1)
+    c = np.cumsum(rows, axis=1, dtype=np.float32)
+    c = np.concatenate([np.zeros_like(c[:, :1]), c], axis=1)
+    return (c[:, 2 * r + 1:] - c[:, :-2 * r - 1]) / (2 * r + 1)
+
+
+def apply_grade(rgb, grade: StillGrade):
+    """Aplica o grade em um array (H, W, 3) uint8, todo vetorizado. Retorna uint8."""
+    np = _require_numpy()
+    x = rgb.astype(np.float32) / 255.0
+
+    if grade.sharpen > 0:
+        x = x + grade.sharpen * (x - _box_blur_5(np, x))
+
+    luma = (x @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32))[..., None]
+    x = luma + (x - luma) * grade.saturation
+    x = x * np.array([1.0 + grade.temperature, 1.0, 1.0 - grade.temperature], dtype=np.float32)
+    x = (x - 0.5) * grade.contrast + 0.5
+    x = grade.lift + x * (1.0 - grade.lift)
+
+    return (np.clip(x, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def _decode_rgb(ffmpeg: str, path: str):
+    """Decodifica na resolução nativa via PPM (o cabeçalho traz as dimensões)."""
+    np = _require_numpy()
+    cmd = [ffmpeg, "-v", "error", "-i", path, "-frames:v", "1", "-f", "image2pipe", "-c:v", "ppm", "-"]
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    data = res.stdout
+    if res.returncode != 0 or not data.startswith(b"P6"):
+        err = res.stderr.decode("utf-8", errors="replace")
+        raise RuntimeError(f"Falha ao decodificar imagem para o grade: {path}\n{err}")
+    # P6\n<w> <h>\n255\n<rgb>
+    fields: List[bytes] = []
+    pos = 2
+    while len(fields) < 3:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[pos:end])
+        pos = end
+    pos += 1
+    w, h = int(fields[0]), int(fields[1])
+    return np.frombuffer(data[pos:pos + w * h * 3], dtype=np.uint8).reshape(h, w, 3)
+
+
+def _encode_png(ffmpeg: str, rgb, out_path: str) -> None:
+    h, w = rgb.shape[0], rgb.shape[1]
+    cmd = [
+        ffmpeg, "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-i", "-",
+        "-frames:v", "1", "-f", "image2", "-c:v", "png",
+        out_path,
+    ]
+    res = subprocess.run(cmd, input=rgb.tobytes(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if res.returncode != 0 or not os.path.isfile(out_path):
+        err = res.stderr.decode("utf-8", errors="replace")
+        raise RuntimeError(f"Falha ao gravar imagem com grade: {out_path}\n{err}")
+
+
+def grade_still(ffmpeg: str, path: str, grade: Optional[StillGrade] = None, dna: ChannelVisualDNA = DNA) -> str:
+    """Retorna o still com grade (gerando uma vez, gravação atômica; hit conta no índice)."""
+    grade = grade or grade_for_dna(dna)
+    cache_dir = Path(graded_dir(path))
+    idx = graded_cache_index(cache_dir)
+    key = graded_still_key(path, grade, dna)
+    out_path = cache_dir / f"{key}.png"
+    if out_path.is_file() and out_path.stat().st_size > 0 and idx.lookup(key, out_path) is not None:
+        return str(out_path)
+    t0 = time.perf_counter()
+    rgb = apply_grade(_decode_rgb(ffmpeg, path), grade)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_dir / f"{key}.tmp{os.getpid()}.png"
+    _encode_png(ffmpeg, rgb, str(tmp_path))
+    os.replace(tmp_path, out_path)
+    idx.put(key, out_path, api_sec=time.perf_counter() - t0, grade=grade_key(grade, dna))
+    return str(out_path)
+
+
+def grade_stills(ffmpeg: str, paths: List[str], dna: ChannelVisualDNA = DNA) -> Dict[str, str]:
+    """original -> still com grade, uma vez por imagem única."""
+    grade = grade_for_dna(dna)
+    out: Dict[str, str] = {}
+    for p in paths:
+        if p and p not in out:
+            out[p] = grade_still(ffmpeg, p, grade, dna)
+    return out
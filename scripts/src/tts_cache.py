@@ -0,0 +1,35 @@
+# scripts/src/tts_cache.py
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any, Optional
+
+from .cache_index import CacheIndex, get_cache_index
+
+# output/tts/<chave>.mp3 + index.json (ver cache_index): mesma cota LRU e estatísticas
+# do cache de imagens. A chave é o texto já sanitizado + modelo + voz + velocidade +
+# formato: re-render depois de ajustar legendas/visual reaproveita a narração.
+# AO_TTS_CACHE=0 desliga; AO_TTS_CACHE_MAX_MB (padrão 512; 0 = sem limite).
+
+def tts_cache_key(text: str, model: str, voice: str, speed: float, fmt: str) -> str:
+    h = hashlib.sha256()
+    h.update((model + "\n" + voice + "\n" + f"{float(speed):.4f}" + "\n" + fmt + "\n" + text).encode("utf-8"))
+    return h.hexdigest()[:24]
+
+def tts_cache_dir(project_root: Path) -> Path:
+    return Path(project_root) / "output" / "tts"
+
+def tts_cache_path(cache_dir: Path, key: str, fmt: str = "mp3") -> Path:
+    return cache_dir / f"{key}.{fmt}"
+
+def tts_cache_index(cache_dir: Path) -> CacheIndex:
+    return get_cache_index("TTS", cache_dir, quota_env="AO_TTS_CACHE_MAX_MB", default_quota_mb=512, file_glob="*.mp3")
+
+def get_cached_tts(cache_dir: Path, key: str, fmt: str = "mp3") -> Optional[Path]:
+    """Hit conta no índice (último uso + hits)."""
+    return tts_cache_index(cache_dir).lookup(key, tts_cache_path(cache_dir, key, fmt))
+
+def record_cached_tts(cache_dir: Path, key: str, *, fmt: str = "mp3", cost_usd: float, api_sec: float, **meta: Any) -> None:
+    """Registra uma narração recém-gerada no índice e aplica a cota."""
+    tts_cache_index(cache_dir).put(key, tts_cache_path(cache_dir, key, fmt), cost_usd=cost_usd, api_sec=api_sec, **meta)
@@ -1,12 +1,82 @@
 # scripts/src/tts_openai.py
 import os
+import shutil
+import threading
+import time
 from pathlib import Path
-from openai import OpenAI
+from typing import Any
+
+from .openai_client import get_openai_client
+from .rate_limit import SingleFlight
+from .tts_cache import get_cached_tts, record_cached_tts, tts_cache_dir, tts_cache_key, tts_cache_path
+
+# Narrações iguais (texto sanitizado + modelo + voz + velocidade + formato) saem do
+# cache em output/tts (ver tts_cache) sem chamar a API. AO_TTS_CACHE=0 força a chamada.
+# AO_TTS_COST_PER_1K_CHARS (padrão 0): custo estimado, só para a economia nas estatísticas.
+TTS_FORMAT = "mp3"  # formato padrão do endpoint (não enviamos response_format)
+_TTS_FLIGHTS: SingleFlight[str] = SingleFlight()
+
+def _project_root() -> Path:
+    return Path(__file__).resolve().parents[2]
 
 def _sanitize_for_tts(text: str) -> str:
     # Remove marcador de pausa (ele é só para ritmo do roteiro)
     return text.replace("[PAUSA_FINAL]", "").strip() + "\n"
 
+def _tts_cache_enabled() -> bool:
+    return (os.getenv("AO_TTS_CACHE", "1") or "1").strip().lower() in ("1", "true", "yes", "on")
+
+def _copy_atomic(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f"{dst.stem}.tmp{os.getpid()}-{threading.get_ident()}{dst.suffix}")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def _speech_bytes(audio: Any) -> bytes:
+    if hasattr(audio, "read"):
+        return audio.read()
+    if hasattr(audio, "iter_bytes"):
+        return b"".join(list(audio.iter_bytes()))
+    if hasattr(audio, "content"):
+        return audio.content
+    try:
+        return bytes(audio)
+    except Exception as e:
+        raise RuntimeError(f"Resposta de TTS inesperada: {type(audio)}") from e
+
+def _synthesize(clean_text: str, model: str, voice: str, speed: float) -> bytes:
+    client = get_openai_client(require_key=True)
+    audio = client.audio.speech.create(
+        model=model,
+        voice=voice,
+        input=clean_text,
+        speed=speed,
+    )
+    return _speech_bytes(audio)
+
+def _synthesize_cached(cache_dir: Path, key: str, clean_text: str, model: str, voice: str, speed: float) -> str:
+    # outra chamada pode ter terminado entre a checagem do cache e o single-flight
+    cached = get_cached_tts(cache_dir, key, TTS_FORMAT)
+    if cached:
+        return str(cached)
+    t0 = time.perf_counter()
+    data = _synthesize(clean_text, model, voice, speed)
+    api_sec = time.perf_counter() - t0
+    path = tts_cache_path(cache_dir, key, TTS_FORMAT)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{key}.tmp{os.getpid()}-{threading.get_ident()}.{TTS_FORMAT}")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    try:
+        per_1k = float(os.getenv("AO_TTS_COST_PER_1K_CHARS", "0") or "0")
+    except ValueError:
+        per_1k = 0.0
+    record_cached_tts(
+        cache_dir, key, fmt=TTS_FORMAT, cost_usd=per_1k * len(clean_text) / 1000.0, api_sec=api_sec,
+        model=model, voice=voice, speed=speed, chars=len(clean_text),
+    )
+    return str(path)
+
 def generate_tts_mp3(
     text: str,
     out_path: str,
@@ -14,37 +84,31 @@ def generate_tts_mp3(
     voice: str = "cedar",
     speed: float = 0.98,  # leve desaceleração para evitar corte de fonema final
 ) -> str:
-    """Gera narração em MP3 usando OpenAI TTS (SDK compatível)."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY não encontrada. Defina a variável de ambiente antes de rodar.")
-
-    client = OpenAI(api_key=api_key)
-
+    """Gera narração em MP3 usando OpenAI TTS (SDK compatível), com cache por conteúdo."""
     out_file = Path(out_path)
     out_file.parent.mkdir(parents=True, exist_ok=True)
 
     clean_text = _sanitize_for_tts(text)
 
-    audio = client.audio.speech.create(
-        model=model,
-        voice=voice,
-        input=clean_text,
-        speed=speed,
-    )
+    if not _tts_cache_enabled():
+        out_file.write_bytes(_synthesize(clean_text, model, voice, speed))
+        return str(out_file)
 
-    data = None
-    if hasattr(audio, "read"):
-        data = audio.read()
-    elif hasattr(audio, "iter_bytes"):
-        data = b"".join(list(audio.iter_bytes()))
-    elif hasattr(audio, "content"):
-        data = audio.content
-    else:
+    cache_dir = tts_cache_dir(_project_root())
+    key = tts_cache_key(clean_text, model, voice, speed, TTS_FORMAT)
+    for _ in range(2):
+        cached = get_cached_tts(cache_dir, key, TTS_FORMAT)
+        if cached:
+            src = cached
+        else:
+            src = Path(_TTS_FLIGHTS.do(key, lambda: _synthesize_cached(cache_dir, key, clean_text, model, voice, speed))[0])
         try:
-            data = bytes(audio)
-        except Exception as e:
-            raise RuntimeError(f"Resposta de TTS inesperada: {type(audio)}") from e
-
-    out_file.write_bytes(data)
+            _copy_atomic(src, out_file)
+        except FileNotFoundError:
+            # outro processo despejou o arquivo entre o lookup e a cópia: na próxima volta é miss
+            continue
+        if cached:
+            print(f"🗃️ Narração reaproveitada do cache ({cached.name})")
+        return str(out_file)
+    out_file.write_bytes(_synthesize(clean_text, model, voice, speed))
     return str(out_file)
@@ -16,6 +16,9 @@ class ChannelVisualDNA:
     texture: str = "fotografia_de_arquivo_grao_sutil"
     allow_faces: bool = False  # nunca rostos nítidos
     allow_people: bool = True  # apenas silhuetas desfocadas quando necessário
+    # Suba ao mudar o look do canal: as chaves de intenção do cache de imagens (ver
+    # visual_extractor.canonical_intent) incluem a versão e deixam de casar com as antigas.
+    version: int = 1
 
     # Mapeamentos (conceito -> símbolo visual)
     concept_to_symbol: Dict[str, str] = None  # type: ignore
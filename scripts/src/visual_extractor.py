@@ -3,10 +3,11 @@ from __future__ import annotations
 
 import os
 import re
+import string
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
-from .visual_dna import DNA
+from .visual_dna import DNA, ChannelVisualDNA
 from .visual_templates import TEMPLATES, render_template
 
 _TIME_HINTS = [
@@ -297,6 +298,31 @@ def enrich_visual_plan(data: Dict[str, Any], video_type: str = "short") -> Dict[
     data["scenes"] = enriched
     return data
 
+def canonical_intent(scene: Dict[str, Any], dna: ChannelVisualDNA = DNA) -> Optional[Dict[str, str]]:
+    """Intenção canônica da cena para a chave de cache de imagem (AO_IMAGE_INTENT_KEYS=1).
+
+    Só entram as âncoras que o template usa (o fallback não usa nenhuma), normalizadas
+    (minúsculas, espaços colapsados), mais o id do template e o nome@versão do DNA.
+    None se a cena não passou por enrich_visual_plan.
+    """
+    intent = scene.get("visual_intent")
+    template_key = (scene.get("validation") or {}).get("template")
+    template = getattr(TEMPLATES, str(template_key or ""), None)
+    if not isinstance(intent, dict) or not isinstance(template, str):
+        return None
+    anchors = intent.get("anchors") or {}
+    values = {
+        "environment": anchors.get("environment"),
+        "primary_object": anchors.get("primary_object"),
+        "secondary_object": anchors.get("secondary_object"),
+        "emotion": (intent.get("mood") or {}).get("emotion"),
+    }
+    canon = {"template": str(template_key), "dna": f"{dna.name}@{dna.version}"}
+    for _, field_name, _, _ in string.Formatter().parse(template):
+        if field_name:
+            canon[field_name] = " ".join(str(values.get(field_name) or "").split()).casefold()
+    return canon
+
 def visual_plan_summary(data: Dict[str, Any]) -> str:
     scenes = data.get("scenes") or []
     if not isinstance(scenes, list) or not scenes:
@@ -1,28 +1,100 @@
 # scripts/src/visual_image_pipeline.py
 from __future__ import annotations
 
-from typing import Any, Dict
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from .image_openai import generate_image_cached
+from .image_cache import image_cache_index
+from .image_openai import _project_root, generate_image_cached
+from .visual_extractor import canonical_intent
 
-def generate_images_for_scenes(data: Dict[str, Any], video_type: str = "short") -> Dict[str, Any]:
+# As cenas são geradas em paralelo (AO_IMAGE_WORKERS, padrão 4). Prompts repetidos
+# (ex.: todas as cenas do template fallback) viram uma única chamada; o limite de
+# requisições e o budget ficam em image_openai.
+#
+# AO_IMAGE_INTENT_KEYS=1: agrupa as cenas pela intenção canônica (âncoras + template +
+# DNA) em vez do texto do prompt, e o cache reaproveita imagens entre roteiros dentro
+# do limite de reusos por mês (AO_IMAGE_INTENT_MAX_REUSES). Menos variedade, menos API.
+
+
+def _images_dir() -> Path:
+    return _project_root() / "output" / "images"
+
+
+def _image_workers(n_prompts: int, workers: Optional[int]) -> int:
+    if workers is None:
+        try:
+            workers = int(os.getenv("AO_IMAGE_WORKERS", "4") or "4")
+        except ValueError:
+            workers = 4
+    return max(1, min(int(workers), n_prompts))
+
+
+def _intent_keys_enabled() -> bool:
+    return (os.getenv("AO_IMAGE_INTENT_KEYS", "0") or "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def generate_images_for_scenes(
+    data: Dict[str, Any],
+    video_type: str = "short",
+    workers: Optional[int] = None,
+    generate: Optional[Callable[..., Tuple[str, bool]]] = None,
+) -> Dict[str, Any]:
     """Gera (ou reutiliza cache) imagens para cada cena baseada em scene['image_prompt'].
     Escreve scene['_image_path'].
     """
     scenes = data.get("scenes") or []
     if not isinstance(scenes, list) or not scenes:
         return data
+    generate = generate or generate_image_cached
 
-    for idx, scene in enumerate(scenes):
+    # chave (prompt ou intenção) -> prompt, intenção, cenas que a usam (ordem preservada)
+    use_intent = _intent_keys_enabled()
+    groups: Dict[str, Tuple[str, Optional[Dict[str, str]], List[Dict[str, Any]]]] = {}
+    for scene in scenes:
         if not isinstance(scene, dict):
             continue
         prompt = scene.get("image_prompt")
         if not isinstance(prompt, str) or not prompt.strip():
             continue
+        intent = canonical_intent(scene) if use_intent else None
+        key = "intent:" + json.dumps(intent, sort_keys=True, ensure_ascii=False) if intent else prompt
+        groups.setdefault(key, (prompt, intent, []))[2].append(scene)
+    if not groups:
+        return data
+
+    def _call(prompt: str, intent: Optional[Dict[str, str]]) -> Tuple[str, bool]:
+        if intent is None:
+            return generate(prompt=prompt, video_type=video_type)
+        return generate(prompt=prompt, video_type=video_type, intent=intent)
+
+    n_workers = _image_workers(len(groups), workers)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="img") as pool:
+        futures = {key: pool.submit(_call, prompt, intent) for key, (prompt, intent, _) in groups.items()}
+        try:
+            results = {key: fut.result() for key, fut in futures.items()}
+        except BaseException:
+            for fut in futures.values():
+                fut.cancel()
+            raise
 
-        # Short: opcionalmente permitir pular algumas cenas para economizar (deixa para depois).
-        img_path, from_cache = generate_image_cached(prompt=prompt, video_type=video_type)
-        scene["_image_path"] = img_path
-        scene["_image_cached"] = bool(from_cache)
+    hits = 0
+    for key, (img_path, from_cache) in results.items():
+        hits += int(bool(from_cache))
+        for scene in groups[key][2]:
+            scene["_image_path"] = img_path
+            scene["_image_cached"] = bool(from_cache)
 
+    usd, sec = image_cache_index(_images_dir()).savings(hits)
+    print(
+        f"🖼️ Imagens: {len(results)} {'intenções únicas' if use_intent else 'prompts únicos'} para "
+        f"{sum(len(g[2]) for g in groups.values())} cenas "
+        f"| {hits} do cache (~${usd:.2f}, ~{sec:.0f}s de API economizados) | {n_workers} workers "
+        f"| {time.perf_counter() - t0:.1f}s"
+    )
     return data
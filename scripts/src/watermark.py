@@ -21,4 +21,10 @@ def find_watermark(project_root: str) -> Optional[str]:
 
 def validate_watermark(project_root: str) -> Optional[str]:
     # Compat: retorna path ou None (não quebra render)
+    # AO_WATERMARK_ENABLED=0 desliga; AO_WATERMARK_PATH aponta um arquivo específico
+    if os.getenv("AO_WATERMARK_ENABLED", "1").strip().lower() in ("0", "false", "no", "n", "off"):
+        return None
+    override = os.getenv("AO_WATERMARK_PATH")
+    if override and os.path.isfile(override):
+        return os.path.abspath(override)
     return find_watermark(project_root)
@@ -0,0 +1,70 @@
+# tests/test_image_pipeline_fake_server.py
+import pytest
+
+pytest.importorskip("openai")
+
+from scripts.src import image_openai, openai_client, visual_image_pipeline  # noqa: E402
+from scripts.src.image_budget import get_month_spend, load_budget_config  # noqa: E402
+from scripts.src.image_fake_server import FakeImageServer  # noqa: E402
+
+WORKERS = 3
+COST_USD = 0.04
+
+# como o template fallback: poucas frases repetidas em muitas cenas
+FALLBACK_PROMPTS = [
+    "arquivo antigo sobre a mesa, luz fria, documental",
+    "corredor vazio de um prédio abandonado, noite",
+    "fotografia desbotada presa em um quadro de evidências",
+    "estrada deserta ao amanhecer, neblina baixa",
+    "envelope lacrado com carimbo oficial, close",
+]
+
+
+@pytest.fixture
+def fake_server(tmp_path, monkeypatch):
+    server = FakeImageServer(latency_sec=0.2).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    monkeypatch.setenv("AO_IMAGE_WORKERS", str(WORKERS))
+    monkeypatch.setenv("AO_IMAGE_RPM", "6000")
+    monkeypatch.setenv("AO_IMAGE_BURST", "100")
+    monkeypatch.setenv("AO_IMAGE_INTENT_KEYS", "0")
+    monkeypatch.setenv("AO_BUDGET_USD", "100")
+    monkeypatch.setenv("AO_COST_PER_IMAGE_USD", str(COST_USD))
+    # cliente novo apontando para este servidor; cache de imagens e ledger em um diretório temporário
+    monkeypatch.setattr(openai_client, "_CLIENT", None)
+    monkeypatch.setattr(image_openai, "_project_root", lambda: tmp_path)
+    monkeypatch.setattr(visual_image_pipeline, "_project_root", lambda: tmp_path)
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+def test_duplicate_prompts_hit_the_api_once_within_worker_limit(fake_server, tmp_path):
+    scenes = [{"scene_id": i + 1, "image_prompt": FALLBACK_PROMPTS[i % len(FALLBACK_PROMPTS)]} for i in range(20)]
+
+    visual_image_pipeline.generate_images_for_scenes({"scenes": scenes}, "short")
+
+    assert fake_server.requests == len(FALLBACK_PROMPTS)
+    assert 1 <= fake_server.max_concurrent <= WORKERS
+    paths = {s["image_prompt"]: s["_image_path"] for s in scenes}
+    assert len(set(paths.values())) == len(FALLBACK_PROMPTS)
+    assert all(s["_image_path"] == paths[s["image_prompt"]] for s in scenes)
+
+    spent, _ = get_month_spend(load_budget_config(tmp_path))
+    assert spent == pytest.approx(fake_server.requests * COST_USD)
+
+
+def test_second_run_is_served_from_cache(fake_server, tmp_path):
+    scenes = [{"scene_id": i + 1, "image_prompt": p} for i, p in enumerate(FALLBACK_PROMPTS * 2)]
+    visual_image_pipeline.generate_images_for_scenes({"scenes": scenes}, "short")
+    first = fake_server.requests
+
+    again = [{"scene_id": i + 1, "image_prompt": p} for i, p in enumerate(FALLBACK_PROMPTS)]
+    visual_image_pipeline.generate_images_for_scenes({"scenes": again}, "short")
+
+    assert fake_server.requests == first == len(FALLBACK_PROMPTS)
+    assert all(s["_image_cached"] for s in again)
+    spent, _ = get_month_spend(load_budget_config(tmp_path))
+    assert spent == pytest.approx(first * COST_USD)
@@ -0,0 +1,42 @@
+# tests/test_import_budget.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from main import HEAVY_MODULES, IMPORT_BUDGET_MODULES, _IMPORT_PROBE, check_import_budget
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = float(os.getenv("AO_IMPORT_BUDGET_MS", "500"))
+
+
+def _probe(mod: str) -> dict:
+    code = _IMPORT_PROBE.format(mod=mod, heavy=HEAVY_MODULES)
+    res = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("mod", IMPORT_BUDGET_MODULES)
+def test_module_imports_within_budget_without_heavy_deps(mod):
+    data = _probe(mod)
+    assert data["heavy"] == [], f"{mod} carregou {data['heavy']} no import"
+    assert data["ms"] <= BUDGET_MS, f"{mod}: {data['ms']:.0f} ms > {BUDGET_MS:.0f} ms"
+
+
+def test_all_budget_modules_together_skip_heavy_deps():
+    code = (
+        "import json, sys; "
+        + "; ".join(f"import {m}" for m in IMPORT_BUDGET_MODULES)
+        + f"; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    res = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert json.loads(res.stdout.strip().splitlines()[-1]) == []
+
+
+def test_check_import_budget_cli_check(capsys):
+    assert check_import_budget(BUDGET_MS)
+    assert "❌" not in capsys.readouterr().out